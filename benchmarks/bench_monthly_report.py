@@ -0,0 +1,96 @@
+"""
+هزینه پاس تمیزکاری دوم در تب «گزارش ماهانه» (در هر بار نمایش) در مقایسه با
+استانداردسازی یکباره نام ماه‌ها در ETL، روی یک لیست ماهانه مصنوعی.
+
+اجرا:  python benchmarks/bench_monthly_report.py [تعداد ردیف]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hr_etl import canonicalize_months, normalize_text_series  # noqa: E402
+
+SAMPLES = {
+    'شماره پرسنلی': list(range(1000, 1400)),
+    'نام خانوادگی': ['كريمي', 'احمدی', 'رضايی‌نژاد', 'محمدى', 'آقایی', ' صادقی '],
+    'واحد': ['تولید', 'كنترل كيفيت', 'انبار', 'اداری', 'فروش'],
+    'ماه': ['مهر', 'آبان', 'آذر', 'دی', 'ابان', 'اذر'],
+    'وضعیت': ['فعال', 'ترک کار', 'قطع همکاری'],
+    'تاریخ استخدام': ['1402/01/15', '1403/08/01', '1403/09/20', 'نامشخص'],
+    'محل خدمت': ['تهران', 'قزوین', 'كرج'],
+    'روز کارکرد': list(range(0, 31)),
+    'علت ترک کار': ['شخصی', 'حقوق پايين', 'مسير دور', None],
+}
+
+
+def build_sheet(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        col: pd.Series(np.array(values, dtype=object)[rng.integers(0, len(values), size=rows)], dtype=object)
+        for col, values in SAMPLES.items()
+    })
+
+
+def clean_all_values(val):
+    """پاس قدیمی تب گزارش ماهانه (سلول به سلول، در هر بار نمایش)"""
+    if pd.isna(val): return val
+    val = str(val).strip().replace('ي', 'ی').replace('ك', 'ک')
+    if val == "ابان": return "آبان"
+    if val == "اذر": return "آذر"
+    return val
+
+
+def ingest(df):
+    """تمیزکاری یکباره ETL (همان مراحل clean_sheet_rows برای متن و ماه)"""
+    df = df.copy()
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = normalize_text_series(df[col])
+    df['ماه'] = canonicalize_months(df['ماه'])
+    return df
+
+
+def old_render(shared):
+    df = shared.copy()
+    df.columns = [str(col).strip().replace('ي', 'ی').replace('ك', 'ک') for col in df.columns]
+    for col in df.columns:
+        df[col] = df[col].apply(clean_all_values)
+    return df
+
+
+def new_render(shared):
+    return shared.copy(deep=False)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(rows=50_000, repeat=3):
+    raw = build_sheet(rows)
+    print(f"لیست ماهانه مصنوعی: {rows:,} ردیف × {len(raw.columns)} ستون")
+
+    ingest_seconds, shared = best_of(lambda: ingest(raw), repeat)
+    old_seconds, old_df = best_of(lambda: old_render(shared), repeat)
+    new_seconds, new_df = best_of(lambda: new_render(shared), repeat)
+
+    print(f"{'ETL یکباره (تمیزکاری + ماه)':<32} {ingest_seconds * 1000:9.1f} ms")
+    print(f"{'هر نمایش - پاس دوم قدیمی':<32} {old_seconds * 1000:9.1f} ms")
+    print(f"{'هر نمایش - نسخه مشترک':<32} {new_seconds * 1000:9.1f} ms")
+
+    if old_df['ماه'].tolist() != new_df['ماه'].tolist():
+        raise SystemExit("❌ نام ماه‌ها یکسان نیست")
+    print(f"✅ نام ماه‌ها یکسان است | صرفه‌جویی در هر نمایش: {(old_seconds - new_seconds) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,375 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from functools import partial
+
+import pandas as pd
+
+# در پانداس ۳ به بعد Copy-on-Write همیشه فعال است؛ برای نسخه‌های قدیمی‌تر روشنش می‌کنیم
+# تا نماهای سطحی (shallow) هیچ‌وقت نسخه مشترک را تغییر ندهند
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# پوشه پیش‌فرض نسخه‌های ذخیره‌شده روی دیسک (قابل تغییر با متغیر محیطی)
+SNAPSHOT_DIR = os.environ.get(
+    "HR_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots"),
+)
+
+# فاصله تلاش مجدد بعد از خطای دریافت: ۳۰ ثانیه و دو برابر به ازای هر خطای پشت سر هم (حداکثر ۳۰ دقیقه)
+RETRY_BACKOFF = timedelta(seconds=30)
+MAX_RETRY_BACKOFF = timedelta(minutes=30)
+
+
+@dataclass(frozen=True)
+class SheetEntry:
+    """یک نسخه تمیز شده از یک شیت که بین تمام کاربران مشترک است"""
+    name: str
+    data: pd.DataFrame
+    version: int
+    loaded_at: datetime
+    nbytes: int
+    watermark: str = None
+    raw_nbytes: int = None  # حافظه پیش از فشرده‌سازی dtypeها
+    stale: bool = False
+    fetch_seconds: float = None
+    content_hash: str = None
+    snapshot_at: datetime = None  # اگر از نسخه روی دیسک بارگذاری شده باشد: زمان ذخیره آن
+    etl_version: int = None
+
+    @property
+    def cache_key(self):
+        """کلید یکتای این نسخه: (نام شیت، نسخه ETL، شماره نسخه داده)"""
+        return (self.name, self.etl_version, self.version)
+
+    def view(self):
+        """
+        نمای فقط‌خواندنی از داده (بدون کپی کردن سلول‌ها).
+        به لطف Copy-on-Write هر تغییری در نما، فقط روی همان نما اعمال می‌شود.
+        """
+        return self.data.copy(deep=False)
+
+
+def content_hash(df):
+    """هش محتوای یک شیت (ستون‌ها و تمام سلول‌ها)"""
+    digest = hashlib.sha1("|".join(map(str, df.columns)).encode())
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class SnapshotCache:
+    """
+    ذخیره نسخه تمیز شده هر شیت به صورت Parquet روی دیسک.
+    نام فایل شامل نام شیت، نسخه ETL و هش محتوا است و یک فایل manifest آخرین نسخه را مشخص می‌کند.
+    نسخه‌ای که با منطق ETL دیگری تمیز شده باشد خوانده نمی‌شود (نیازی به پاک کردن دستی نیست).
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, etl_version=None):
+        self.directory = directory
+        self.etl_version = etl_version
+
+    def _manifest_path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def read_manifest(self, name):
+        try:
+            with open(self._manifest_path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, name):
+        """خواندن آخرین نسخه ذخیره‌شده: (دیتافریم، manifest) یا None"""
+        manifest = self.read_manifest(name)
+        if manifest is None or manifest.get('etl_version') != self.etl_version:
+            return None
+        try:
+            df = pd.read_parquet(os.path.join(self.directory, manifest['file']))
+        except Exception:
+            return None
+        return df, manifest
+
+    def save(self, name, df, digest, watermark=None):
+        """ذخیره نسخه جدید (اگر محتوا تغییری نکرده باشد فقط manifest بروز می‌شود)"""
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{name}-etl{self.etl_version}-{digest}.parquet"
+        path = os.path.join(self.directory, file_name)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+        manifest = {
+            'file': file_name,
+            'hash': digest,
+            'watermark': watermark,
+            'etl_version': self.etl_version,
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_manifest = f"{self._manifest_path(name)}.tmp"
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_manifest, self._manifest_path(name))
+
+        # حذف نسخه‌های قدیمی همین شیت
+        for old in os.listdir(self.directory):
+            if old.startswith(f"{name}-") and old.endswith(".parquet") and old != file_name:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+
+
+class SheetStore:
+    """
+    انبار مشترک داده‌ها در سطح پروسه: از هر شیت فقط یک نسخه در حافظه نگه داشته می‌شود
+    و هر بار جایگزینی، شماره نسخه آن شیت را یک واحد بالا می‌برد.
+    اگر snapshots داده شود، هر نسخه جدید روی دیسک هم ذخیره می‌شود تا بعد از ری‌استارت
+    برنامه بدون انتظار برای Apps Script بالا بیاید.
+    etl_version نسخه منطق تمیزکاری است و جزء کلید هر نسخه (SheetEntry.cache_key) ثبت می‌شود.
+    compact(name, df) در صورت وجود، پیش از ثبت هر نسخه نوع ستون‌ها را فشرده می‌کند
+    (حافظه قبل و بعد از آن در memory_report نمایش داده می‌شود).
+    """
+
+    def __init__(self, snapshots=None, etl_version=None, compact=None):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._versions = {}
+        self._refreshing = set()
+        self._errors = {}
+        self._failures = {}  # نام شیت ← (تعداد خطای پشت سر هم، زمان آخرین خطا)
+        self.snapshots = snapshots
+        self.etl_version = etl_version
+        self.compact = compact
+
+    def get(self, name):
+        """آخرین نسخه شیت (یا None اگر هنوز بارگذاری نشده)"""
+        with self._lock:
+            return self._entries.get(name)
+
+    def put(self, name, df, watermark=None, fetch_seconds=None):
+        """ثبت نسخه جدید شیت و برگرداندن SheetEntry آن"""
+        raw_nbytes = None
+        if self.compact is not None:
+            raw_nbytes = int(df.memory_usage(deep=True).sum())
+            df = self.compact(name, df)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        digest = content_hash(df)
+        with self._lock:
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            entry = SheetEntry(name=name, data=df, version=version, loaded_at=datetime.now(),
+                               nbytes=nbytes, raw_nbytes=raw_nbytes, watermark=watermark, fetch_seconds=fetch_seconds,
+                               content_hash=digest, etl_version=self.etl_version)
+            self._entries[name] = entry
+            self._errors.pop(name, None)
+            self._failures.pop(name, None)
+
+        if self.snapshots is not None:
+            try:
+                self.snapshots.save(name, df, digest, watermark)
+            except Exception as e:
+                with self._lock:
+                    self._errors[name] = f"ذخیره نسخه روی دیسک: {e}"
+        return entry
+
+    def touch(self, name, watermark=None, fetch_seconds=None):
+        """تمدید اعتبار شیت بدون تغییر داده (وقتی دریافت دلتا تغییری نداشته)"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            entry = replace(entry, loaded_at=datetime.now(), stale=False, snapshot_at=None,
+                            watermark=watermark or entry.watermark, fetch_seconds=fetch_seconds)
+            self._entries[name] = entry
+            self._errors.pop(name, None)
+            self._failures.pop(name, None)
+            return entry
+
+    def commit(self, name, base, df, watermark=None, fetch_seconds=None):
+        """ثبت نتیجه یک دریافت: اگر دیتافریم همان نسخه قبلی باشد فقط اعتبارش تمدید می‌شود"""
+        if base is not None and df is base:
+            return self.touch(name, watermark, fetch_seconds=fetch_seconds)
+        return self.put(name, df, watermark=watermark, fetch_seconds=fetch_seconds)
+
+    def warm_start(self, names):
+        """بارگذاری آخرین نسخه‌های روی دیسک (به صورت منقضی تا در پس‌زمینه بروز شوند)"""
+        if self.snapshots is None:
+            return
+        for name in names:
+            loaded = self.snapshots.load(name)
+            if loaded is None:
+                continue
+            df, manifest = loaded
+            saved_at = datetime.fromisoformat(manifest['saved_at'])
+            with self._lock:
+                if name in self._entries:
+                    continue
+                version = self._versions.get(name, 0) + 1
+                self._versions[name] = version
+                self._entries[name] = SheetEntry(
+                    name=name, data=df, version=version, loaded_at=saved_at,
+                    nbytes=int(df.memory_usage(deep=True).sum()), watermark=manifest.get('watermark'),
+                    stale=True, content_hash=manifest.get('hash'), snapshot_at=saved_at,
+                    etl_version=manifest.get('etl_version'),
+                )
+
+    def record_failure(self, name, error):
+        """ثبت خطای دریافت؛ تا پایان فاصله انتظار (retry_at) تلاش خودکار دیگری انجام نمی‌شود"""
+        with self._lock:
+            count = self._failures.get(name, (0, None))[0] + 1
+            self._failures[name] = (count, datetime.now())
+            self._errors[name] = str(error)
+
+    def retry_at(self, name):
+        """زمان مجاز تلاش بعدی پس از خطاهای پشت سر هم (یا None اگر آخرین دریافت موفق بوده)"""
+        with self._lock:
+            failure = self._failures.get(name)
+        if failure is None:
+            return None
+        count, failed_at = failure
+        return failed_at + min(RETRY_BACKOFF * 2 ** min(count - 1, 16), MAX_RETRY_BACKOFF)
+
+    def in_backoff(self, name):
+        retry_at = self.retry_at(name)
+        return retry_at is not None and datetime.now() < retry_at
+
+    def refresh_async(self, name, fetch, force=False):
+        """
+        بروزرسانی شیت در پس‌زمینه (در هر لحظه حداکثر یک بروزرسانی برای هر شیت).
+        fetch(entry) باید (base, df, watermark, seconds) برگرداند.
+        تا آماده شدن نسخه جدید، کاربران همان نسخه قبلی را می‌بینند.
+        بعد از خطا تا retry_at تلاشی انجام نمی‌شود، مگر force (بروزرسانی دستی) داده شود.
+        """
+        with self._lock:
+            if name in self._refreshing or (not force and self.in_backoff(name)):
+                return False
+            self._refreshing.add(name)
+
+        def run():
+            try:
+                base, df, watermark, seconds = fetch(self.get(name))
+                self.commit(name, base, df, watermark, fetch_seconds=seconds)
+            except Exception as e:
+                self.record_failure(name, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(name)
+
+        threading.Thread(target=run, name=f"refresh-{name}", daemon=True).start()
+        return True
+
+    def is_refreshing(self, name=None):
+        """آیا شیت (یا هر شیتی اگر نام داده نشود) در حال بروزرسانی پس‌زمینه است؟"""
+        with self._lock:
+            return bool(self._refreshing) if name is None else name in self._refreshing
+
+    def names(self):
+        with self._lock:
+            return list(self._entries)
+
+    def mark_stale(self, name=None):
+        """منقضی کردن شیت (یا همه شیت‌ها) بدون دور ریختن داده و واترمارک"""
+        with self._lock:
+            names = list(self._entries) if name is None else [name]
+            for n in names:
+                if n in self._entries:
+                    self._entries[n] = replace(self._entries[n], stale=True)
+
+    def last_loaded_at(self):
+        """زمان آخرین بارگذاری در بین تمام شیت‌ها"""
+        with self._lock:
+            times = [e.loaded_at for e in self._entries.values()]
+        return max(times) if times else None
+
+    def oldest_snapshot_at(self):
+        """زمان ذخیره قدیمی‌ترین نسخه دیسکی که هنوز در حال نمایش است (یا None)"""
+        with self._lock:
+            times = [e.snapshot_at for e in self._entries.values() if e.snapshot_at is not None]
+        return min(times) if times else None
+
+    def memory_report(self):
+        """گزارش مصرف حافظه به تفکیک شیت"""
+        with self._lock:
+            entries = list(self._entries.values())
+            errors = dict(self._errors)
+            retries = {name: self.retry_at(name) for name in self._failures}
+        return pd.DataFrame([
+            {
+                'شیت': e.name,
+                'نسخه': e.version,
+                'نسخه ETL': e.etl_version,
+                'تعداد ردیف': len(e.data),
+                'تعداد ستون': len(e.data.columns),
+                'حافظه قبل از فشرده‌سازی (MB)': round(e.raw_nbytes / (1024 * 1024), 2) if e.raw_nbytes is not None else None,
+                'حافظه (MB)': round(e.nbytes / (1024 * 1024), 2),
+                'زمان بارگذاری': e.loaded_at.strftime('%H:%M:%S'),
+                'واترمارک': e.watermark or '-',
+                'زمان دریافت (ثانیه)': round(e.fetch_seconds, 2) if e.fetch_seconds is not None else None,
+                'هش محتوا': e.content_hash or '-',
+                'منبع': 'دیسک' if e.snapshot_at is not None else 'Apps Script',
+                'خطای آخر': errors.get(e.name, '-'),
+                'تلاش مجدد': retries[e.name].strftime('%H:%M:%S') if retries.get(e.name) else '-',
+            }
+            for e in entries
+        ])
+
+
+class RefreshScheduler:
+    """
+    زمان‌بند پس‌زمینه: هر شیت بارگذاری‌شده را با فاصله زمانی مخصوص خودش بروز می‌کند
+    (stale-while-revalidate). نسخه جدید به صورت اتمی در انبار جایگزین می‌شود و
+    صفحه‌ها هیچ‌وقت منتظر دریافت مجدد نمی‌مانند.
+    """
+
+    def __init__(self, store, fetch, intervals=None, default_interval=timedelta(hours=2), tick_seconds=60):
+        self.store = store
+        self.fetch = fetch
+        self.intervals = intervals or {}
+        self.default_interval = default_interval
+        self.tick_seconds = tick_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def interval_for(self, name):
+        return self.intervals.get(name, self.default_interval)
+
+    def is_due(self, name):
+        """
+        آیا شیت موجود نیست، منقضی شده یا عمرش از فاصله بروزرسانی گذشته است؟
+        در فاصله انتظار بعد از خطای دریافت، شیت سررسید حساب نمی‌شود.
+        """
+        if self.store.in_backoff(name):
+            return False
+        entry = self.store.get(name)
+        if entry is None or entry.stale:
+            return True
+        return datetime.now() - entry.loaded_at >= self.interval_for(name)
+
+    def refresh(self, name, force=False):
+        """شروع بروزرسانی پس‌زمینه یک شیت (اگر از قبل در جریان نباشد)"""
+        return self.store.refresh_async(name, partial(self.fetch, name), force=force)
+
+    def tick(self):
+        for name in self.store.names():
+            if self.is_due(name):
+                self.refresh(name)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sheet-refresh-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.tick_seconds):
+            self.tick()
@@ -0,0 +1,369 @@
+import textwrap
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from hr_etl import (CHURN_FLAG, CHURN_STATUSES, HIRED_FLAG, KNOWN_STATUSES, PERSIAN_MONTHS, UNKNOWN_TEXT,
+                    jalali_part_column, parse_jalali_series, start_date_flags)
+
+# =========================================================
+# 📊 تجمیع‌های از پیش محاسبه‌شده داشبورد منابع انسانی
+# =========================================================
+
+# کلید «همه» در ابعاد واحد و جنسیت
+ALL = "همه"
+
+CHURN_STATUS_PATTERN = 'ترک کار|قطع همکاری'
+
+PERSONNEL_KEY = 'شماره پرسنلی'
+
+
+@dataclass(frozen=True)
+class HeadcountCell:
+    """شاخص‌های یک خانه از مکعب (ماه × واحد × جنسیت)"""
+    total: int = 0
+    active: int = 0
+    new_hires: int = 0
+    churn: int = 0
+
+    @property
+    def churn_rate(self):
+        return round((self.churn / self.total * 100), 1) if self.total > 0 else 0
+
+
+EMPTY_CELL = HeadcountCell()
+
+
+def date_month(df, column):
+    """ماه عددی یک ستون تاریخ شمسی (از ستون آماده ETL؛ در غیر این صورت همین‌جا تجزیه می‌شود)"""
+    parsed = jalali_part_column(column, 'ماه')
+    if parsed in df.columns:
+        return df[parsed]
+    return parse_jalali_series(df[column])['ماه']
+
+
+class PersonnelIndex:
+    """
+    ایندکس شماره پرسنلی بانک پرسنلی: کلید (یکسان‌شده در ETL) → ردیف بانک پرسنلی و چند ویژگی منتخب.
+    برای هر نسخه بانک پرسنلی یک بار ساخته می‌شود؛ هر شیت دیگر با یک جستجوی آرایه‌ای (get_indexer)
+    غنی می‌شود، بدون merge و بدون تمیزکاری دوباره کلیدها. از شماره‌های تکراری اولین ردیف نگه داشته می‌شود.
+    """
+
+    ATTRIBUTES = ('جنسیت', 'واحد', 'تاریخ استخدام')
+
+    def __init__(self, personnel, attributes=ATTRIBUTES):
+        if PERSONNEL_KEY in personnel.columns:
+            keys = pd.Series(personnel[PERSONNEL_KEY].to_numpy(dtype=object))
+        else:
+            keys = pd.Series([], dtype=object)
+        # شماره پرسنلی خالی در ETL «نامشخص» شده است و کلید اتصال حساب نمی‌شود
+        valid = keys.notna() & (keys != UNKNOWN_TEXT)
+        first = (valid & ~keys.duplicated()).to_numpy()
+
+        self.positions = np.flatnonzero(first)
+        self.keys = pd.Index(keys.to_numpy()[self.positions], dtype=object)
+        self.duplicates = int(valid.sum()) - len(self.positions)
+        self.attributes = {
+            col: personnel[col].to_numpy(dtype=object)[self.positions]
+            for col in attributes if col in personnel.columns
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """شماره ردیف (در ایندکس) هر کلید؛ -1 یعنی در بانک پرسنلی پیدا نشد"""
+        return self.keys.get_indexer(pd.Index(np.asarray(keys, dtype=object)))
+
+    def attribute(self, column, found, fill=UNKNOWN_TEXT):
+        """مقدار یک ویژگی برای نتیجه lookup (کلیدهای پیدانشده و مقادیر خالی: fill)"""
+        values = np.full(len(found), fill, dtype=object)
+        source = self.attributes.get(column)
+        if source is not None:
+            hit = found >= 0
+            values[hit] = source[found[hit]]
+            values[pd.isna(values)] = fill
+        return values
+
+    def enrich(self, df, columns, fill=UNKNOWN_TEXT):
+        """افزودن ویژگی‌های بانک پرسنلی به یک شیت (بر اساس شماره پرسنلی همان شیت)"""
+        df = df.copy(deep=False)
+        if PERSONNEL_KEY in df.columns:
+            found = self.lookup(df[PERSONNEL_KEY])
+        else:
+            found = np.full(len(df), -1, dtype=np.intp)
+        for column in columns:
+            df[column] = self.attribute(column, found, fill)
+        return df
+
+    def unmatched(self, keys):
+        """شماره‌های پرسنلی (یکتا و مرتب) که در بانک پرسنلی رکوردی ندارند"""
+        keys = pd.Series(np.asarray(keys, dtype=object)).dropna()
+        keys = keys[keys != UNKNOWN_TEXT].unique()
+        return sorted(keys[self.lookup(keys) < 0].tolist())
+
+
+class HeadcountCube:
+    """
+    مکعب تجمیعی پرسنل: تعداد کل، پرسنل فعال، جذب جدید و ریزش برای هر ماه × واحد × جنسیت.
+    یک بار برای هر نسخه داده ساخته می‌شود و هر تغییر فیلتر فقط یک جستجوی دیکشنری است.
+    سطح «همه» برای واحد و جنسیت هم از قبل محاسبه شده است.
+    """
+
+    def __init__(self, cells, months, units):
+        self.cells = cells
+        self.months = months
+        self.units = units
+
+    def lookup(self, month, unit=ALL, gender=ALL):
+        return self.cells.get((month, unit, gender), EMPTY_CELL)
+
+    @classmethod
+    def build(cls, monthly, personnel_index):
+        # نام ستون‌ها در ETL طبق sheet_schema یکسان شده‌اند
+        if 'ماه' not in monthly.columns:
+            return cls({}, [], [])
+
+        # نام ماه‌ها در ETL استاندارد شده‌اند (آبان/آذر)؛ جنسیت با ایندکس شماره پرسنلی اضافه می‌شود
+        df = personnel_index.enrich(monthly, ['جنسیت'])
+
+        # شماره ماه هر ردیف (برای مقایسه عددی با ماه تاریخ‌ها)
+        month_num = df['ماه'].astype(object).map({name: i + 1 for i, name in enumerate(PERSIAN_MONTHS)}).fillna(0).astype('int16')
+
+        n = len(df)
+        if 'وضعیت' in df.columns:
+            active = ~df['وضعیت'].astype(str).str.contains(CHURN_STATUS_PATTERN, case=False, na=False)
+        else:
+            active = pd.Series(True, index=df.index)
+
+        if 'تاریخ استخدام' in df.columns:
+            new_hire = date_month(df, 'تاریخ استخدام') == month_num
+        else:
+            new_hire = pd.Series(False, index=df.index)
+
+        if 'تاریخ ترک کار' in df.columns:
+            churn = date_month(df, 'تاریخ ترک کار') == month_num
+        elif 'علت ترک کار' in df.columns:
+            churn = df['علت ترک کار'].notna() & (df['علت ترک کار'] != UNKNOWN_TEXT)
+        else:
+            churn = pd.Series(False, index=df.index)
+
+        facts = pd.DataFrame({
+            'month': df['ماه'].to_numpy(),
+            'unit': df['واحد'].to_numpy() if 'واحد' in df.columns else np.full(n, None, dtype=object),
+            'gender': df['جنسیت'].to_numpy(),
+            'total': np.ones(n, dtype=np.int64),
+            'active': active.to_numpy(dtype=bool),
+            'new_hires': new_hire.fillna(False).to_numpy(dtype=bool),
+            'churn': churn.fillna(False).to_numpy(dtype=bool),
+        })
+        metrics = ['total', 'active', 'new_hires', 'churn']
+
+        # هر سطح تجمیع مستقیماً از ردیف‌ها جمع زده می‌شود (ردیف‌های بدون واحد هم در «همه» شمرده می‌شوند)
+        cells = {}
+        for keys in (['month', 'unit', 'gender'], ['month', 'unit'], ['month', 'gender'], ['month']):
+            grouped = facts.groupby(keys, dropna=False, sort=False)[metrics].sum()
+            for key, row in zip(grouped.index, grouped.itertuples(index=False)):
+                key = key if isinstance(key, tuple) else (key,)
+                parts = dict(zip(keys, key))
+                cell_key = (parts['month'], parts.get('unit', ALL), parts.get('gender', ALL))
+                cells[cell_key] = HeadcountCell(*(int(v) for v in row))
+
+        present = set(facts['month'].dropna())
+        months = [m for m in PERSIAN_MONTHS if m in present]
+        units = sorted(facts['unit'].dropna().unique().tolist()) if 'واحد' in df.columns else []
+        return cls(cells, months, units)
+
+
+# =========================================================
+# 🧲 قیف جذب و استخدام
+# =========================================================
+
+GENDER_MALE = 'مرد'
+GENDER_FEMALE = 'زن'
+
+
+@dataclass(frozen=True)
+class GenderSplit:
+    """تعداد آقایان و خانم‌ها در یک زیرمجموعه از متقاضیان"""
+    male: int = 0
+    female: int = 0
+    total: int = 0
+
+    @property
+    def male_pct(self):
+        return int((self.male / self.total) * 100) if self.total > 0 else 0
+
+    @property
+    def female_pct(self):
+        return int((self.female / self.total) * 100) if self.total > 0 else 0
+
+
+class RecruitmentFunnel:
+    """
+    شمارش متقاضیان به تفکیک وضعیت × واحد × جنسیت × معرف × شروع بکار.
+    جدول شمارش یک بار با یک groupby برای هر نسخه داده ساخته می‌شود؛ کارت‌ها، نرخ‌ها و
+    «واحد برتر» فقط روی همین جدول کوچک محاسبه می‌شوند و دیگر ردیف‌های شیت را پیمایش نمی‌کنند.
+    """
+
+    DIMENSIONS = ['status', 'unit', 'gender', 'referrer', 'started']
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    @classmethod
+    def build(cls, employment):
+        n = len(employment)
+
+        # پرچم «استخدام شده» در ETL ساخته شده است؛ در غیر این صورت همین‌جا محاسبه می‌شود
+        if HIRED_FLAG in employment.columns:
+            started = employment[HIRED_FLAG]
+        elif 'تاریخ شروع بکار' in employment.columns:
+            started = start_date_flags(employment['تاریخ شروع بکار'])[0]
+        else:
+            started = pd.Series(False, index=employment.index)
+
+        def column(name):
+            if name in employment.columns:
+                return employment[name].astype(object).to_numpy()
+            return np.full(n, None, dtype=object)
+
+        facts = pd.DataFrame({
+            'status': column('وضعیت نهایی'),
+            'unit': column('واحد'),
+            'gender': column('جنسیت'),
+            'referrer': pd.Series(column('معرف')).fillna(UNKNOWN_TEXT).astype(str).to_numpy(),
+            'started': started.to_numpy(dtype=bool),
+        })
+        counts = facts.groupby(cls.DIMENSIONS, dropna=False, sort=False).size().rename('n').reset_index()
+        return cls(counts)
+
+    def for_gender(self, gender):
+        """قیف محدود به یک جنسیت (ALL یعنی همه متقاضیان)"""
+        if gender == ALL:
+            return self
+        return RecruitmentFunnel(self.counts[self.counts['gender'] == gender])
+
+    def _select(self, **filters):
+        counts = self.counts
+        for dim, value in filters.items():
+            counts = counts[counts[dim] == value]
+        return counts
+
+    @property
+    def total(self):
+        return int(self.counts['n'].sum())
+
+    def count(self, **filters):
+        return int(self._select(**filters)['n'].sum())
+
+    @property
+    def unknown(self):
+        """متقاضیانی که وضعیت نهایی‌شان هیچ‌کدام از وضعیت‌های شناخته‌شده نیست"""
+        return int(self.counts.loc[~self.counts['status'].isin(KNOWN_STATUSES), 'n'].sum())
+
+    def counts_by(self, dim, **filters):
+        """تعداد به تفکیک یک بعد (بدون مقادیر خالی و صفر)، به ترتیب نزولی"""
+        grouped = self._select(**filters).groupby(dim, sort=True)['n'].sum()
+        return grouped[grouped > 0].sort_values(ascending=False, kind='stable')
+
+    def top(self, dim, **filters):
+        """(مقدار پرتکرار، تعداد) یک بعد یا None اگر داده‌ای نباشد"""
+        ranked = self.counts_by(dim, **filters)
+        if ranked.empty:
+            return None
+        return ranked.index[0], int(ranked.iloc[0])
+
+    def gender_split(self, unknown_status=False, **filters):
+        selected = self._select(**filters)
+        if unknown_status:
+            selected = selected[~selected['status'].isin(KNOWN_STATUSES)]
+        return GenderSplit(
+            male=int(selected.loc[selected['gender'] == GENDER_MALE, 'n'].sum()),
+            female=int(selected.loc[selected['gender'] == GENDER_FEMALE, 'n'].sum()),
+            total=int(selected['n'].sum()),
+        )
+
+
+# =========================================================
+# 🗺️ ماتریس ریزش (علت × واحد) برای نمودار حبابی رد و انصراف
+# =========================================================
+
+# سطوح نمایش نمودار: وضعیت، علت دسته‌بندی‌شده و علت دقیق
+CHURN_VIEWS = ['وضعیت نهایی', 'علت_دسته_بندی_شده', 'علت نپذیرفتن']
+
+# محور نمودار (برچسب شکسته‌شده) و ستون شمارش
+CHURN_LABEL = 'نمایش_محور'
+CHURN_COUNT = 'تعداد'
+
+
+@lru_cache(maxsize=4096)
+def wrap_label(text, width=35):
+    """برچسب چندخطی محور (هر متن یکتا فقط یک بار شکسته می‌شود)"""
+    return '<br>'.join(textwrap.wrap(str(text), width=width))
+
+
+class ChurnMatrix:
+    """
+    شمارش ردیف‌های رد شده و انصراف داده به تفکیک (سطح نمایش × واحد) برای هر جنسیت.
+    هر سه سطح نمایش یک بار برای هر نسخه داده ساخته می‌شوند و عوض کردن سطح نمایش
+    فقط یک جستجوی دیکشنری است. آمار کنار نمودار و پارتو هم از همین جدول‌ها خوانده می‌شوند.
+    """
+
+    def __init__(self, tables, charts):
+        self.tables = tables
+        self.charts = charts
+
+    @classmethod
+    def build(cls, employment):
+        if CHURN_FLAG in employment.columns:
+            churn = employment[employment[CHURN_FLAG]]
+        else:
+            churn = employment[employment['وضعیت نهایی'].astype(object).isin(CHURN_STATUSES)]
+        n = len(churn)
+
+        def column(name):
+            if name in churn.columns:
+                return churn[name].astype(object).to_numpy()
+            return np.full(n, UNKNOWN_TEXT if name != 'واحد' else None, dtype=object)
+
+        gender = pd.Series(column('جنسیت')).fillna(UNKNOWN_TEXT).to_numpy()
+        tables = {}
+        for view in CHURN_VIEWS:
+            facts = pd.DataFrame({view: column(view), 'واحد': column('واحد'), 'gender': gender})
+            tables[view] = facts.groupby([view, 'واحد', 'gender'], dropna=False).size().rename(CHURN_COUNT).reset_index()
+
+        charts = {}
+        for view, table in tables.items():
+            for g in [ALL] + sorted(set(gender)):
+                selected = table if g == ALL else table[table['gender'] == g]
+                chart = selected.dropna(subset=[view, 'واحد']).groupby([view, 'واحد'], sort=True)[CHURN_COUNT].sum()
+                chart = chart[chart > 0].reset_index()
+                chart[CHURN_LABEL] = chart[view].map(wrap_label)
+                charts[(view, g)] = chart
+        return cls(tables, charts)
+
+    def chart_data(self, view, gender=ALL):
+        """جدول نمودار حبابی: [سطح نمایش، واحد، تعداد، برچسب محور]"""
+        chart = self.charts.get((view, gender))
+        if chart is None:
+            return pd.DataFrame(columns=[view, 'واحد', CHURN_COUNT, CHURN_LABEL])
+        return chart
+
+    def _table(self, view, gender):
+        table = self.tables[view]
+        return table if gender == ALL else table[table['gender'] == gender]
+
+    def total(self, gender=ALL):
+        return int(self._table(CHURN_VIEWS[0], gender)[CHURN_COUNT].sum())
+
+    def count(self, status, gender=ALL):
+        table = self._table(CHURN_VIEWS[0], gender)
+        return int(table.loc[table[CHURN_VIEWS[0]] == status, CHURN_COUNT].sum())
+
+    def counts_by(self, dim, gender=ALL, view=CHURN_VIEWS[0]):
+        """تعداد ریزش به تفکیک یک ستون (واحد یا سطح نمایش)، بدون مقادیر خالی و به ترتیب نزولی"""
+        grouped = self._table(view, gender).groupby(dim, sort=True)[CHURN_COUNT].sum()
+        return grouped[grouped > 0].sort_values(ascending=False, kind='stable')
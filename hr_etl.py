@@ -0,0 +1,260 @@
+import re
+from functools import lru_cache
+
+import jdatetime
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# 🛠️ موتور مرکزی ETL (تمیزکاری و استانداردسازی داده‌ها)
+# =========================================================
+
+# نسخه منطق تمیزکاری؛ با هر تغییر در قواعد ETL (این فایل، sheet_schema یا clean_sheet_rows) یک واحد بالا برود
+# تا نسخه‌های قدیمی در حافظه و روی دیسک خودبه‌خود نامعتبر شوند
+ETL_VERSION = 7
+
+UNKNOWN_TEXT = "نامشخص"
+
+# مقادیری که معادل «خالی» در نظر گرفته می‌شوند
+MISSING_MARKERS = ['nan', 'none', 'null']
+
+# جدول تبدیل یکجای نویسه‌ها (استانداردسازی ی/ک و حذف نیم‌فاصله)
+TEXT_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ك': 'ک', 'ى': 'ی', 'ة': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا',
+    '\u200c': ' ', '¬': ''
+})
+
+
+def global_clean_text(text):
+    """
+    تابع تمیزکاری متون فارسی (استانداردسازی ی/ک و حذف فاصله)
+    نسخه تک‌سلولی و مرجع؛ در ETL از normalize_text_series استفاده می‌شود.
+    """
+    if pd.isna(text) or text == "" or str(text).lower() in MISSING_MARKERS:
+        return UNKNOWN_TEXT
+    
+    # همان جدول TEXT_TRANSLATION که normalize_text_series استفاده می‌کند
+    return str(text).strip().translate(TEXT_TRANSLATION)
+
+
+def normalize_text_series(series):
+    """
+    نسخه برداری (vectorized) از global_clean_text برای یک ستون کامل.
+    هر مقدار یکتا فقط یک بار تمیز می‌شود و نتیجه با یک take در NumPy
+    به تمام ردیف‌ها پخش می‌شود؛ خروجی دقیقاً برابر با apply(global_clean_text) است.
+    """
+    missing = series.isna().to_numpy()
+    codes, uniques = pd.factorize(series)
+    if pd.api.types.infer_dtype(uniques, skipna=True) not in ('string', 'empty'):
+        # ستون ترکیبی (عدد و متن): 1 و 1.0 و True در هش یکی می‌شوند؛ پس روی متن آن‌ها گروه‌بندی می‌کنیم
+        codes, uniques = pd.factorize(series.astype(object).astype(str))
+    uniques = pd.Index(np.asarray(uniques, dtype=object).astype(str), dtype=object)
+
+    unknown = (uniques == "") | uniques.str.lower().isin(MISSING_MARKERS)
+    cleaned = uniques.str.strip().str.translate(TEXT_TRANSLATION).to_numpy(dtype=object)
+    cleaned[np.asarray(unknown)] = UNKNOWN_TEXT
+
+    result = np.full(len(series), UNKNOWN_TEXT, dtype=object)
+    valid = (codes >= 0) & ~missing
+    result[valid] = cleaned[codes[valid]]
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+PERSIAN_MONTHS = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+                  "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
+
+# normalize_text_series حرف «آ» را به «ا» تبدیل می‌کند؛ نام ماه‌ها به شکل استاندارد برگردانده می‌شوند
+MONTH_ALIASES = {"ابان": "آبان", "اذر": "آذر"}
+
+
+def canonicalize_months(series):
+    """استانداردسازی نام ماه‌ها (ابان ← آبان، اذر ← آذر) روی ستونی که قبلاً تمیز شده است"""
+    return series.replace(MONTH_ALIASES)
+
+
+# کلمات کلیدی هر دسته (ترتیب دسته‌ها اولویت تطبیق را مشخص می‌کند)
+REJECTION_KEYWORDS = {
+    'حقوق': ['حقوق', 'تومان', 'مبلغ', 'پول', 'درامد', 'مزایا', 'پایه'],
+    'مشکل_اضافه_کاری': ['اضافه', 'ساعت', 'شیفت', 'تایم', 'تعطیل', 'پنجشنبه'],
+    'مسیر_و_سرویس': ['ناهار', 'سرویس', 'غذا', 'مسیر', 'راه', 'تردد', 'دور', 'مسافت'],
+    'عدم_مراجعه': ['مراجعه', 'انصراف', 'نیامد', 'پاسخ', 'گوشی', 'تماس', 'جواب'],
+    'عدم_تایید_فنی': ['تایید', 'رد', 'فنی', 'قبول', 'شرایط', 'سن', 'مهارت', 'سابقه'],
+    'محیط_کاری': ['محیط', 'برخورد', 'فرهنگ', 'جو', 'اخلاق']
+}
+
+OTHER_REASON = 'سایر موارد'
+
+# یک الگوی کامپایل‌شده برای هر دسته (به جای حلقه روی تک‌تک کلمات)
+REJECTION_PATTERNS = [
+    (category.replace('_', ' '), re.compile('|'.join(re.escape(k) for k in keys)))
+    for category, keys in REJECTION_KEYWORDS.items()
+]
+
+
+@lru_cache(maxsize=4096)
+def categorize_rejection_reason(text):
+    """دسته‌بندی هوشمند دلایل رد یا انصراف (نتیجه برای هر متن یکتا حافظه می‌شود)"""
+    if text == UNKNOWN_TEXT: return UNKNOWN_TEXT
+    text = text.replace(' ', '') # حذف فاصله برای جستجوی بهتر
+
+    for label, pattern in REJECTION_PATTERNS:
+        if pattern.search(text):
+            return label
+
+    return OTHER_REASON
+
+
+def categorize_rejection_series(series):
+    """
+    دسته‌بندی یک ستون کامل در یک گذر: هر علت یکتا فقط یک بار بررسی می‌شود
+    (دلایل رد بسیار تکراری هستند) و نتیجه با take به تمام ردیف‌ها پخش می‌شود.
+    مقادیر خالی «نامشخص» در نظر گرفته می‌شوند.
+    """
+    codes, uniques = pd.factorize(series)
+    # کد -1 (مقدار خالی) به آخرین عنصر یعنی «نامشخص» می‌رسد
+    labels = np.array([categorize_rejection_reason(str(u)) for u in uniques] + [UNKNOWN_TEXT], dtype=object)
+    return pd.Series(labels[codes], index=series.index, name=series.name)
+
+
+# وضعیت‌های نهایی شیت جذب
+HIRED_STATUS = 'استخدام شد'
+REJECTED_STATUS = 'رد شد'
+WITHDRAWN_STATUS = 'انصراف داد'
+KNOWN_STATUSES = [HIRED_STATUS, REJECTED_STATUS, WITHDRAWN_STATUS]
+CHURN_STATUSES = [REJECTED_STATUS, WITHDRAWN_STATUS]
+
+# مقادیری از «تاریخ شروع بکار» که یعنی فرد شروع به کار نکرده است
+NOT_STARTED_PATTERN = re.compile('عدم استخدام|نامشخص')
+
+# ستون‌های مشتق شیت جذب (یک بار در ETL ساخته می‌شوند)
+HIRED_FLAG = 'استخدام_شده'          # تاریخ شروع بکار معتبر دارد
+UNDECIDED_FLAG = 'شروع_نامشخص'      # تاریخ شروع بکار «نامشخص» است
+CHURN_FLAG = 'ریزش'                 # رد شده یا انصراف داده
+CHURN_CATEGORY = 'نوع_ریزش'         # «رد شد» / «انصراف داد» (برای بقیه خالی)
+
+
+def start_date_flags(series):
+    """
+    (استخدام شده، نامشخص) برای ستون «تاریخ شروع بکار»؛ هر مقدار یکتا فقط یک بار بررسی می‌شود.
+    مقادیر خالی نه استخدام شده‌اند و نه نامشخص.
+    """
+    codes, uniques = pd.factorize(series)
+    texts = [str(u) for u in uniques]
+    hired = np.array([not NOT_STARTED_PATTERN.search(t) for t in texts] + [False], dtype=bool)
+    undecided = np.array([UNKNOWN_TEXT in t for t in texts] + [False], dtype=bool)
+    return (pd.Series(hired[codes], index=series.index),
+            pd.Series(undecided[codes], index=series.index))
+
+
+def add_recruitment_flags(df):
+    """افزودن ستون‌های مشتق وضعیت جذب تا صفحه‌ها دوباره روی متن‌ها regex اجرا نکنند"""
+    if 'تاریخ شروع بکار' in df.columns:
+        df[HIRED_FLAG], df[UNDECIDED_FLAG] = start_date_flags(df['تاریخ شروع بکار'])
+    else:
+        df[HIRED_FLAG] = False
+        df[UNDECIDED_FLAG] = False
+
+    status = df['وضعیت نهایی'].astype(object)
+    df[CHURN_FLAG] = status.isin(CHURN_STATUSES)
+    df[CHURN_CATEGORY] = status.where(df[CHURN_FLAG])
+    return df
+
+
+JALALI_PARTS = ('سال', 'ماه', 'روز')
+
+# ارقام فارسی و عربی به ارقام لاتین
+DIGIT_TRANSLATION = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+# سال/ماه/روز با جداکننده / یا - (روز اختیاری است)
+JALALI_DATE_PATTERN = r'^(\d{1,4})\s*[/-]\s*(\d{1,2})(?:\s*[/-]\s*(\d{1,2}))?'
+
+
+def jalali_part_column(column, part):
+    """نام ستون عددی یک بخش از تاریخ؛ مثلاً تاریخ_استخدام_ماه"""
+    return f"{column.replace(' ', '_')}_{part}"
+
+
+def parse_jalali_series(series, gregorian=False):
+    """
+    تبدیل برداری تاریخ‌های شمسی متنی («۱۴۰۳/۰۸/۱۵»، «1403/8/15» یا «1403/08») به
+    ستون‌های عددی سال، ماه و روز (Int16 با پشتیبانی از مقدار خالی).
+    هر تاریخ یکتا فقط یک بار پردازش می‌شود؛ مقادیر نامعتبر (مثل «نامشخص» یا ماه ۱۳) خالی می‌شوند.
+    با gregorian=True ستون «میلادی» (datetime64) هم با jdatetime ساخته می‌شود.
+    """
+    codes, uniques = pd.factorize(series.astype(object).astype(str))
+    text = pd.Series(np.asarray(uniques, dtype=object), dtype=object).str.strip().str.translate(DIGIT_TRANSLATION)
+    parts = text.str.extract(JALALI_DATE_PATTERN).apply(pd.to_numeric)
+    parts.columns = list(JALALI_PARTS)
+
+    valid = (parts['سال'] > 0) & parts['ماه'].between(1, 12) & (parts['روز'].isna() | parts['روز'].between(1, 31))
+    parts = parts.where(valid)
+
+    # ردیف آخر برای کدهای -1 (مقدار خالی در ستون اصلی)
+    table = np.vstack([parts.to_numpy(dtype=float), np.full((1, len(JALALI_PARTS)), np.nan)])
+    rows = table[codes]
+    result = pd.DataFrame(
+        {part: pd.array(rows[:, i], dtype='Int16') for i, part in enumerate(JALALI_PARTS)},
+        index=series.index,
+    )
+
+    if gregorian:
+        def to_gregorian(y, m, d):
+            try:
+                return pd.Timestamp(jdatetime.date(int(y), int(m), int(d)).togregorian())
+            except ValueError:
+                return pd.NaT
+        complete = parts.dropna()
+        converted = [to_gregorian(y, m, d) for y, m, d in complete.itertuples(index=False)]
+        gregorian_uniques = pd.Series(pd.NaT, index=parts.index, dtype='datetime64[ns]')
+        gregorian_uniques[complete.index] = pd.to_datetime(pd.Series(converted, index=complete.index, dtype=object))
+        taken = np.append(gregorian_uniques.to_numpy(), np.datetime64('NaT'))[codes]
+        result['میلادی'] = pd.Series(taken, index=series.index)
+
+    return result
+
+
+def add_jalali_date_parts(df, columns, gregorian=False):
+    """افزودن ستون‌های عددی سال/ماه/روز (و در صورت نیاز میلادی) برای هر ستون تاریخ موجود"""
+    for column in columns:
+        if column not in df.columns:
+            continue
+        parsed = parse_jalali_series(df[column], gregorian=gregorian)
+        for part in parsed.columns:
+            df[jalali_part_column(column, part)] = parsed[part]
+    return df
+
+
+def normalize_personnel_key(series):
+    """
+    یکسان‌سازی شماره پرسنلی برای اتصال شیت‌ها به هم: متن بدون فاصله، ارقام لاتین و بدون «.0»
+    (عددی که از شیت به صورت اعشاری آمده است). مقادیر خالی مثل بقیه ستون‌های متنی «نامشخص» نمایش
+    داده می‌شوند و ایندکس اتصال (PersonnelIndex) آن‌ها را کلید حساب نمی‌کند.
+    هر مقدار یکتا فقط یک بار پردازش می‌شود.
+    """
+    codes, uniques = pd.factorize(series)
+    keys = []
+    for value in uniques:
+        key = re.sub(r'\.0+$', '', str(value).strip().translate(DIGIT_TRANSLATION))
+        keys.append(UNKNOWN_TEXT if key == '' or key.lower() in MISSING_MARKERS else key)
+    keys = np.array(keys + [UNKNOWN_TEXT], dtype=object)
+    return pd.Series(keys[codes], index=series.index, name=series.name)
+
+
+def compact_dtypes(df, category_columns=()):
+    """
+    فشرده‌سازی نوع ستون‌ها پس از تمیزکاری:
+    ستون‌های کم‌تنوع (category_columns) به categorical و ستون‌های عدد صحیح به
+    کوچک‌ترین نوع عددی کافی تبدیل می‌شوند. فیلتر و groupby روی این ستون‌ها با کدهای عددی انجام می‌شود.
+    """
+    for col in category_columns:
+        if col not in df.columns:
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+        else:
+            df[col] = df[col].astype('category')
+
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
@@ -1,35 +1,28 @@
 import streamlit as st
 from auth import authenticate_user, USERS, has_access
-from styles import load_login_css, load_dashboard_css, show_custom_navbar
+from styles import css_scope, load_login_css, load_dashboard_css, show_custom_navbar
+from data_store import RefreshScheduler, SheetStore, SnapshotCache
+from sheet_sync import ROW_KEY, SheetSyncError, fetch_sheet_payload
+from sheet_pipeline import apply_sheet_delta, build_sheet
+from hr_etl import (ETL_VERSION, HIRED_FLAG, HIRED_STATUS, PERSIAN_MONTHS, REJECTED_STATUS, UNDECIDED_FLAG, WITHDRAWN_STATUS,
+                    compact_dtypes)
+from hr_analytics import (ALL, GENDER_FEMALE, GENDER_MALE, PERSONNEL_KEY, ChurnMatrix, HeadcountCube,
+                          PersonnelIndex, RecruitmentFunnel)
+from referrer_analytics import ReferrerStatsTracker, stats_frame
+from sheet_schema import SHEET_SCHEMAS, SheetSchemaError
+from search_index import MONTHLY_FILTER_COLUMNS, PERSONNEL_SEARCH_COLUMNS, FilterIndex, SearchIndex
+from table_view import STYLER_THEME, render_table
 import pandas as pd
 from datetime import datetime, timedelta
 import jdatetime
-import requests
 import plotly.express as px
 import plotly.graph_objects as go
 import base64
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-# رنگ جداول گوگل شیت
-def style_dataframe(df):
-    return df.style.set_properties(**{
-        'background-color': '#F0F8FF',     # آبی ملیح برای سلول‌ها
-        'color': '#000000',
-        'font-family': 'B Nazanin',
-        'border-color': '#ffffff',
-        'text-align': 'right',
-        'font-size': '15px'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#2E86C1'), # ✅ آبی روشن (دیگر مشکی نیست)
-            ('color', 'white'),
-            ('font-family', 'B Nazanin'),
-            ('font-size', '16px'),
-            ('text-align', 'center'),
-            ('font-weight', 'bold')
-        ]}
-    ])
-    
 #بالای سایت 
 st.set_page_config(
     page_title="سامانه پیلوت گاز",
@@ -41,29 +34,8 @@ st.set_page_config(
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
-if 'personnel_data' not in st.session_state:
-    st.session_state.personnel_data = None
-
-if 'employee_data' not in st.session_state:
-    st.session_state.employee_data = None
-    
-if 'monthlylist_data' not in st.session_state:
-    st.session_state.monthlylist_data = None
-
-if 'last_update_monthlylist' not in st.session_state:
-    st.session_state.last_update_monthlylist = None
-    
-if 'last_update_personnel' not in st.session_state:
-    st.session_state.last_update_personnel = None
-
-if 'last_update_employee' not in st.session_state:
-    st.session_state.last_update_employee = None
-    
 if 'search_triggered' not in st.session_state:
     st.session_state.search_triggered = False
-    
-if 'last_update_hr_global' not in st.session_state:
-    st.session_state.last_update_hr_global = None
 
 target_user = st.query_params.get("user")
 if target_user and target_user in USERS:
@@ -79,151 +51,199 @@ if st.query_params.get("action") == "logout":
 #ادرس گوگل شیت
 SCRIPT_URL = "https://script.google.com/macros/s/AKfycbw9VrEUyzTpbxeQf7vB8IzZ7BmmsYP65yy-dWGvTCBRLorDc8dCm0f5O3NPQxV9hXn0/exec"
 
-# =========================================================
-# 🛠️ موتور مرکزی ETL (تمیزکاری و استانداردسازی داده‌ها)
-# =========================================================
+# حالت رنگ آبی جدول‌ها: STYLER_THEME (استایل سلولی، فقط صفحه جاری) یا COLUMNS_THEME (column_config + تم).
+# COLUMNS_THEME اختیاری است: فقط چینش راست و رنگ سرستون را دارد و زمینه #F0F8FF سلول‌ها و فونت
+# B Nazanin جدول (که در تم استریم‌لیت کلیدی ندارند) را ندارد؛ پیش‌فرض همان ظاهر قبلی جدول‌هاست.
+TABLE_THEME = STYLER_THEME
+
+# نام شیت‌های گوگل به ازای هر نوع داده منابع انسانی
+HR_SHEETS = {
+    "personnel": "personnel",
+    "employee": "employment",
+    "monthly": "monthlylist",
+}
+
+# فاصله بروزرسانی خودکار هر شیت (بانک پرسنلی کمتر تغییر می‌کند)
+SHEET_REFRESH_INTERVALS = {
+    "personnel": timedelta(hours=12),
+    "employment": timedelta(hours=2),
+    "monthlylist": timedelta(hours=2),
+}
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_store(etl_version=ETL_VERSION):
+    """
+    انبار مشترک شیت‌ها (یک نمونه برای کل پروسه، نه برای هر کاربر).
+    بعد از ری‌استارت، آخرین نسخه‌های روی دیسک فوراً بارگذاری می‌شوند.
+    نسخه ETL جزء کلید کش است: با تغییر قواعد تمیزکاری، انبار و نسخه‌های دیسکی قبلی استفاده نمی‌شوند.
+    """
+    store = SheetStore(snapshots=SnapshotCache(etl_version=etl_version), etl_version=etl_version,
+                       compact=compact_sheet)
+    store.warm_start(HR_SHEETS.values())
+    return store
 
-def global_clean_text(text):
-    """تابع تمیزکاری متون فارسی (استانداردسازی ی/ک و حذف فاصله)"""
-    if pd.isna(text) or text == "" or str(text).lower() in ['nan', 'none', 'null']:
-        return "نامشخص"
-    
-    text = str(text).strip()
-    replacements = {
-        'ي': 'ی', 'ك': 'ک', 'ى': 'ی', 'ة': 'ه',
-        'أ': 'ا', 'إ': 'ا', 'آ': 'ا',
-        '\u200c': ' ', '¬': ''
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    return text
-
-def categorize_rejection_reason(text):
-    """دسته‌بندی هوشمند دلایل رد یا انصراف"""
-    if text == "نامشخص": return "نامشخص"
-    text = text.replace(' ', '') # حذف فاصله برای جستجوی بهتر
-    
-    keywords = {
-        'حقوق': ['حقوق', 'تومان', 'مبلغ', 'پول', 'درامد', 'مزایا', 'پایه'],
-        'مشکل_اضافه_کاری': ['اضافه', 'ساعت', 'شیفت', 'تایم', 'تعطیل', 'پنجشنبه'],
-        'مسیر_و_سرویس': ['ناهار', 'سرویس', 'غذا', 'مسیر', 'راه', 'تردد', 'دور', 'مسافت'],
-        'عدم_مراجعه': ['مراجعه', 'انصراف', 'نیامد', 'پاسخ', 'گوشی', 'تماس', 'جواب'],
-        'عدم_تایید_فنی': ['تایید', 'رد', 'فنی', 'قبول', 'شرایط', 'سن', 'مهارت', 'سابقه'],
-        'محیط_کاری': ['محیط', 'برخورد', 'فرهنگ', 'جو', 'اخلاق']
-    }
-    
-    for category, keys in keywords.items():
-        if any(k in text for k in keys):
-            return category.replace('_', ' ')
-            
-    return 'سایر موارد'
+def compact_sheet(sheet_name, df):
+    """فشرده‌سازی نوع ستون‌ها طبق ستون‌های categorical تعریف‌شده در sheet_schema"""
+    return compact_dtypes(df, SHEET_SCHEMAS[sheet_name].category_columns)
 
-@st.cache_data(ttl=7200, show_spinner=False)
-def fetch_and_clean_data(sheet_name):
+def fetch_and_clean_data(sheet_name, base=None, since=None):
     """
     این تابع هم داده را می‌گیرد و هم همان لحظه تمیز می‌کند.
-    نتیجه در کش ذخیره می‌شود تا سرعت بالا برود.
+    چون در ترد کارگر اجرا می‌شود، خطاها را raise می‌کند و از st استفاده نمی‌کند.
+    اگر نسخه قبلی (base) و واترمارک آن (since) داده شود، فقط ردیف‌های تغییرکرده
+    دریافت و تمیز می‌شوند و با نسخه قبلی ادغام می‌گردند.
+    خروجی: (دیتافریم، واترمارک جدید)
     """
-    try:
-        response = requests.get(f"{SCRIPT_URL}?sheet={sheet_name}", timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, dict) and 'error' in data:
-                st.error(f"خطا: {data['error']}")
-                return None
-            
-            if not data:
-                return pd.DataFrame() # برگرداندن جدول خالی به جای None
+    payload = fetch_sheet_payload(SCRIPT_URL, sheet_name, since=since)
+    if payload.is_delta and (base is None or ROW_KEY not in base.columns):
+        # نسخه قبلی قابل ادغام نیست؛ دریافت کامل
+        payload = fetch_sheet_payload(SCRIPT_URL, sheet_name)
 
-            # 1. تبدیل به دیتافریم
-            df = pd.DataFrame(data)
-            
-            # 2. تمیزکاری نام ستون‌ها
-            df.columns = df.columns.str.strip()
-            
-            # 3. تمیزکاری سلول‌ها (اعمال روی تمام ستون‌های متنی)
-            # این کار باعث می‌شود دیگر نیازی به clean_text در محیط کاربری نباشد
-            object_cols = df.select_dtypes(include=['object']).columns
-            for col in object_cols:
-                df[col] = df[col].apply(global_clean_text)
+    if payload.is_delta:
+        if not payload.rows and not payload.deleted:
+            return base, payload.watermark # تغییری نبوده است
+        # آمار معرف‌ها فقط با ردیف‌های تغییرکرده شیت جذب بروز می‌شود
+        on_change = partial(get_referrer_tracker().apply_delta, since, payload.watermark) if sheet_name == "employment" else None
+        return apply_sheet_delta(sheet_name, base, payload.rows, payload.deleted, on_change=on_change), payload.watermark
 
-            # 4. عملیات اختصاصی بر اساس نوع شیت (Specific Transformations)
-            
-            # الف) اگر شیت استخدام بود: دسته‌بندی دلایل اضافه شود
-            if sheet_name == "employment":
-                if 'علت نپذیرفتن' in df.columns:
-                    df['علت_دسته_بندی_شده'] = df['علت نپذیرفتن'].apply(categorize_rejection_reason)
-                else:
-                    df['علت_دسته_بندی_شده'] = "نامشخص"
+    return build_sheet(sheet_name, payload.rows), payload.watermark
+
+def _timed_fetch(sheet_name, entry):
+    """
+    اجرای fetch_and_clean_data در ترد کارگر به همراه زمان‌سنجی.
+    اگر نسخه قبلی واترمارک داشته باشد فقط تغییرات دریافت می‌شود.
+    خروجی: (نسخه پایه، دیتافریم، واترمارک، ثانیه)
+    """
+    base = entry.data if entry is not None and entry.watermark else None
+    since = entry.watermark if base is not None else None
+    started = time.perf_counter()
+    df, watermark = fetch_and_clean_data(sheet_name, base=base, since=since)
+    return base, df, watermark, time.perf_counter() - started
 
-            # ب) اگر شیت کارکرد ماهانه بود: مرتب‌سازی ماه‌ها
-            if sheet_name == "monthlylist" and 'ماه' in df.columns:
-                persian_months = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور", 
-                                  "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
-                df['month_idx'] = df['ماه'].apply(lambda x: persian_months.index(x) if x in persian_months else -1)
-                df = df.sort_values('month_idx', ascending=False).drop(columns=['month_idx'])
+def load_sheets(data_types):
+    """
+    دریافت همزمان چند شیت (هر شیت در یک ترد) و ثبت آن‌ها در انبار مشترک.
+    زمان بارگذاری سرد برابر کندترین شیت است، نه مجموع آن‌ها.
+    خروجی: زمان دریافت هر شیت (ثانیه)
+    """
+    store = get_sheet_store()
+    sheet_names = [HR_SHEETS[d] for d in data_types]
+    timings = {}
+    if not sheet_names:
+        return timings
+
+    # تردها فقط داده را می‌گیرند؛ پیام خطا و ثبت در انبار در ترد اصلی استریم‌لیت انجام می‌شود
+    with ThreadPoolExecutor(max_workers=len(sheet_names)) as pool:
+        futures = {name: pool.submit(_timed_fetch, name, store.get(name)) for name in sheet_names}
+        for sheet_name, future in futures.items():
+            try:
+                base, df, watermark, elapsed = future.result()
+            except (SheetSyncError, SheetSchemaError) as e:
+                store.record_failure(sheet_name, e)
+                st.error(str(e))
+                continue
+            except Exception as e:
+                store.record_failure(sheet_name, e)
+                st.error(f"خطا سیستمی: {str(e)}")
+                continue
+
+            timings[sheet_name] = elapsed
+            store.commit(sheet_name, base, df, watermark, fetch_seconds=elapsed)
+    return timings
+
+@st.cache_resource(show_spinner=False)
+def get_refresh_scheduler(etl_version=ETL_VERSION):
+    """زمان‌بند بروزرسانی پس‌زمینه (یک ترد برای کل پروسه)"""
+    # باید همان انبار صفحه‌ها باشد: get_sheet_store(نسخه) و get_sheet_store() در کش دو کلید جدا دارند
+    return RefreshScheduler(get_sheet_store(), _timed_fetch, SHEET_REFRESH_INTERVALS).start()
+
+def refresh_sheet(sheet_name):
+    """منقضی کردن و بروزرسانی پس‌زمینه فقط یک شیت (بقیه شیت‌ها دست نمی‌خورند)"""
+    get_sheet_store().mark_stale(sheet_name)
+    return get_refresh_scheduler().refresh(sheet_name, force=True)
+
+def needs_refresh(data_type):
+    """آیا داده موجود نیست، دستی منقضی شده یا عمرش از فاصله بروزرسانی گذشته است؟ (نه در فاصله انتظار بعد از خطا)"""
+    return get_refresh_scheduler().is_due(HR_SHEETS[data_type])
+
+def get_hr_entry(data_type):
+    """آخرین نسخه شیت در انبار مشترک (همراه با کلید نسخه آن) یا None"""
+    return get_sheet_store().get(HR_SHEETS[data_type])
+
+def get_hr_data(data_type):
+    """نمای فقط‌خواندنی از داده مشترک (یا None اگر هنوز بارگذاری نشده)"""
+    entry = get_hr_entry(data_type)
+    return entry.view() if entry is not None else None
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_personnel_index(_personnel, personnel_key):
+    """ایندکس شماره پرسنلی بانک پرسنلی؛ برای هر نسخه شیت پرسنلی یک بار ساخته می‌شود"""
+    return PersonnelIndex(_personnel)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_headcount_cube(_monthly, _personnel, monthly_key, personnel_key):
+    """
+    مکعب تجمیعی داشبورد پرسنل؛ کلید کش فقط نسخه دو شیت است
+    (پارامترهای با _ توسط استریم‌لیت هش نمی‌شوند).
+    """
+    return HeadcountCube.build(_monthly, get_personnel_index(_personnel, personnel_key))
 
-            # ج) اگر شیت پرسنل بود: معکوس کردن ستون‌ها (طبق سلیقه شما)
-            if sheet_name == "personnel":
-                df = df[df.columns[::-1]]
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_recruitment_funnel(_employment, employment_key):
+    """جدول شمارش قیف جذب (وضعیت × واحد × جنسیت × معرف) برای هر نسخه شیت جذب یک بار"""
+    return RecruitmentFunnel.build(_employment)
 
-            return df
-            
-        else:
-            st.error(f"خطا در اتصال: {response.status_code}")
-            return None
-    except Exception as e:
-        st.error(f"خطا سیستمی: {str(e)}")
-        return None
-
-# توابع Wrapper برای سازگاری با کد قبلی شما
-df = fetch_and_clean_data("personnel")
-if df is not None:
-        st.session_state.personnel_data = df
-        st.session_state.last_update_personnel = datetime.now()
-        st.session_state.last_update_hr_global = datetime.now()
-def load_employee_data():
-    df = fetch_and_clean_data("employment")
-    if df is not None:
-        st.session_state.employee_data = df
-        st.session_state.last_update_employee = datetime.now()
-        st.session_state.last_update_hr_global = datetime.now()
-
-def load_monthlylist_data():
-    df = fetch_and_clean_data("monthlylist")
-    if df is not None:
-        st.session_state.monthlylist_data = df
-        st.session_state.last_update_monthlylist = datetime.now()
-        st.session_state.last_update_hr_global = datetime.now() 
-        # =========================================================
+@st.cache_resource(show_spinner=False)
+def get_referrer_tracker():
+    """آمار کانال‌های جذب (یک نمونه برای کل پروسه) که با دریافت تغییرات شیت جذب افزایشی بروز می‌شود"""
+    return ReferrerStatsTracker()
+
+def get_referrer_stats(entry, gender):
+    """آمار کانال‌های جذب برای نسخه فعلی شیت جذب و یک جنسیت (کپی مخصوص همین اجرا)"""
+    return get_referrer_tracker().stats_for(entry.data, entry.cache_key, entry.watermark, gender)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_churn_matrix(_employment, employment_key):
+    """ماتریس‌های ریزش (وضعیت/علت دسته‌بندی‌شده/علت دقیق × واحد × جنسیت) برای هر نسخه شیت جذب"""
+    return ChurnMatrix.build(_employment)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_cached_figure(chart_id, data_version, filters, _build):
+    """
+    مشخصات JSON نمودار Plotly برای (شناسه نمودار، نسخه داده، مقادیر فیلتر)؛
+    اگر ورودی‌های نمودار تغییر نکرده باشد، _build دوباره اجرا نمی‌شود.
+    به جای شیء Figure مشترک، هر نشست یک کپی از dict نمودار می‌گیرد و تغییر آن به کاربر دیگری نمی‌رسد.
+    """
+    return _build().to_plotly_json()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_personnel_search_index(_personnel, personnel_key):
+    """ایندکس n-gram جستجوی نام و شماره پرسنلی (برای هر نسخه بانک پرسنلی یک بار)"""
+    return SearchIndex(_personnel, PERSONNEL_SEARCH_COLUMNS)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_monthly_report_index(_monthly, monthly_key):
+    """
+    ایندکس مشترک فیلترهای گزارش ماهانه (برای هر نسخه لیست ماهانه یک بار):
+    ماه ← واحد ← محل خدمت به شماره ردیف‌ها، به‌علاوه ایندکس n-gram نام خانوادگی و شماره پرسنلی
+    """
+    return FilterIndex(_monthly, MONTHLY_FILTER_COLUMNS), SearchIndex(_monthly, PERSONNEL_SEARCH_COLUMNS)
+
+# =========================================================
 # ⏰ توابع مدیریت زمان و آپدیت خودکار
 # =========================================================
 
-def should_update_data(last_update):
-    """بررسی می‌کند آیا ۲ ساعت از آخرین آپدیت گذشته است؟"""
-    if last_update is None:
-        return True
-    time_diff = datetime.now() - last_update
-    return time_diff >= timedelta(hours=2)
+def format_age(delta):
+    """نمایش فاصله زمانی به صورت «۵ دقیقه پیش»"""
+    minutes = int(delta.total_seconds() // 60)
+    if minutes < 1:
+        return "لحظاتی پیش"
+    if minutes < 60:
+        return f"{minutes} دقیقه پیش"
+    if minutes < 24 * 60:
+        return f"{minutes // 60} ساعت پیش"
+    return f"{minutes // (24 * 60)} روز پیش"
 
-def auto_update_check():
-    """چک کردن تمام دیتاها و آپدیت خودکار در صورت قدیمی بودن"""
-    
-    # 1. بررسی پرسنل
-    if should_update_data(st.session_state.last_update_personnel):
-        # پاک کردن کش تابعی که ساختیم
-        fetch_and_clean_data.clear()
-        load_personnel_data()
-        
-    # 2. بررسی استخدام
-    if should_update_data(st.session_state.last_update_employee):
-        fetch_and_clean_data.clear()
-        load_employee_data()
-
-    # 3. بررسی گزارش ماهانه (اختیاری)
-    if should_update_data(st.session_state.last_update_monthlylist):
-        fetch_and_clean_data.clear()
-        load_monthlylist_data()
 def login_page():
     load_login_css()
     c1, c2, c3 = st.columns([1, 2, 1])
@@ -260,76 +280,9 @@ def login_page():
 
 def show_home_content():
     # ==========================================
-    # 💎 استایل سراسری فونت بی نازنین (برای کل سامانه)
-    # ==========================================
-    st.markdown("""
-        <style>
-            /* 1. تعریف فونت (اگر روی سیستم نصب باشد یا از CDN) */
-            @font-face {
-                font-family: 'B Nazanin';
-                src: local('B Nazanin'), local('B_Nazanin');
-            }
-
-            /* 2. اعمال فونت روی تمام اجزای HTML بصورت اجباری */
-            html, body, [class*="css"] {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-            }
-
-            /* 3. اصلاح دقیق‌تر برای اجزای خاص استریم‌لیت */
-            .stTextInput, .stNumberInput, .stSelectbox, .stDateInput, 
-            .stTimeInput, .stTextArea, .stButton, .stCheckbox, .stRadio,
-            .stExpander, .stTabs, .stDataFrame, .stTable, .stMetric {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-            }
-
-            /* 4. متن‌های داخل دکمه‌ها، لیبل‌ها و ورودی‌ها */
-            button, input, textarea, select, label, p, span, div {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-            }
-
-            /* 5. تیترها */
-            h1, h2, h3, h4, h5, h6 {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-                font-weight: 900 !important; /* ضخیم کردن تیترها */
-            }
-
-            /* 6. اعداد داخل جداول و دیتافریم‌ها */
-            .stDataFrame div, .stDataFrame span {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-                font-size: 15px !important;
-            }
-            
-            /* 7. اصلاح فونت تولتیپ‌های نمودارهای Plotly */
-            .js-plotly-plot .plotly, .js-plotly-plot .plotly text, 
-            .js-plotly-plot .plotly .hovertext text {
-                font-family: 'B Nazanin', 'Tahoma', sans-serif !important;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-    # ==========================================
-    # 🎨 تنظیمات: اسلایدر با ارتفاع کمتر (350 پیکسل)
+    # 💎 استایل‌های صفحه خانه: فونت بی نازنین، فاصله‌ها و کارت‌ها (assets/css/home.css در باندل CSS)
     # ==========================================
-    st.markdown("""
-        <style>
-            /* تنظیم فاصله کانتینر اصلی (همان تنظیماتی که برای هماهنگی با دکمه‌ها داشتید) */
-            [data-testid="block-container"] {
-                padding-left: 60px !important;   /* این عدد را طبق آخرین تغییرتان نگه دارید */
-                padding-right: 60px !important;  
-                padding-top: 90px !important;
-                max-width: 100% !important;
-            }
-
-            iframe {
-                width: 100% !important;
-                border: none !important;
-                display: block !important;
-            }
-            
-            div[data-testid="stVerticalBlock"] {
-                gap: 0 !important;
-            }
-        </style>
-    """, unsafe_allow_html=True)
+    css_scope("home")
     # 1. تابع کمکی برای تبدیل عکس به کد
     def get_base64_image(image_path):
         try:
@@ -430,68 +383,6 @@ def show_home_content():
     st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
     
     # ✅ 2. استایل CSS مخصوص کارت‌های واتر‌مارک‌دار (مشابه جذب)
-    st.markdown("""
-        <style>
-            .home-stat-card {
-                border-radius: 16px;
-                padding: 15px;
-                height: 160px;
-                display: flex;
-                flex-direction: column;
-                justify-content: center;
-                align-items: center;
-                position: relative;
-                overflow: hidden; /* برای اینکه استیکر بیرون نزند */
-                box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-                transition: transform 0.3s ease;
-                border: 1px solid rgba(255,255,255,0.3);
-            }
-            .home-stat-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-            }
-            
-            /* استایل استیکر پس‌زمینه (واترمارک) */
-            .card-watermark {
-                position: absolute;
-                top: -15px;
-                left: -15px;
-                font-size: 80px;
-                opacity: 0.15; /* شفافیت کم */
-                pointer-events: none;
-                transform: rotate(15deg);
-                z-index: 0;
-            }
-            
-            /* محتوای روی کارت */
-            .card-content-home {
-                position: relative;
-                z-index: 1;
-                text-align: center;
-                width: 100%;
-            }
-            
-            .home-card-title {
-                font-size: 18px !important;
-                font-weight: 900 !important;
-                margin-bottom: 10px !important;
-                color: #000 !important;
-            }
-            .home-card-value {
-                font-size: 32px !important;
-                font-weight: 900 !important;
-                margin: 5px 0 !important;
-                color: #000 !important;
-                text-shadow: none !important;
-            }
-            .home-card-sub {
-                font-size: 14px !important;
-                font-weight: bold !important;
-                opacity: 0.8;
-                color: #333 !important;
-            }
-        </style>
-    """, unsafe_allow_html=True)
 
     col1, col2, col3, col4 = st.columns(4)
     
@@ -546,533 +437,97 @@ def show_home_content():
 # 🛠️ توابع کمکی لود دیتا (حتما قبل از show_hr_content باشد)
 # =========================================================
 
-def should_update_data(last_update):
-    """بررسی می‌کند آیا ۲ ساعت از آخرین آپدیت گذشته است؟"""
-    if last_update is None:
-        return True
-    time_diff = datetime.now() - last_update
-    return time_diff >= timedelta(hours=12)
+# پیام انتظار هر نوع داده
+HR_LOADING_MESSAGES = {
+    "personnel": "بانک اطلاعات سرمایه",
+    "employee": "اطلاعات جذب و استخدام",
+    "monthly": "گزارش کارکرد ماهیانه",
+}
 
-def ensure_data_loaded(data_type):
+def ensure_data_loaded(*data_types):
     """
     این تابع چک می‌کند اگر داده مورد نیاز موجود نبود یا قدیمی بود، آن را دانلود کند.
-    data_type: 'personnel', 'employee', 'monthly'
+    همه شیت‌های مورد نیاز یک صفحه را یکجا بدهید تا همزمان دریافت شوند.
+    data_types: 'personnel', 'employee', 'monthly'
     """
-    if data_type == "personnel":
-        if st.session_state.personnel_data is None or should_update_data(st.session_state.last_update_personnel):
-            with st.spinner("⏳ در حال دریافت بانک اطلاعات سرمایه ..."):
-                load_personnel_data()
-                
-    elif data_type == "employee":
-        if st.session_state.employee_data is None or should_update_data(st.session_state.last_update_employee):
-            with st.spinner("⏳ در حال دریافت اطلاعات جذب و استخدام..."):
-                load_employee_data()
-                
-    elif data_type == "monthly":
-        if st.session_state.monthlylist_data is None or should_update_data(st.session_state.last_update_monthlylist):
-            with st.spinner("⏳ در حال دریافت گزارش کارکرد ماهیانه..."):
-                load_monthlylist_data()
-def show_hr_content():
-   # محاسبه تاریخ و زمان فعلی
-    now = datetime.now()
-    shamsi_now = jdatetime.datetime.fromgregorian(datetime=now)
-    today_date = shamsi_now.strftime('%Y/%m/%d')
-    now_time = shamsi_now.strftime('%H:%M')
-    
-    # ==========================================
-    # 🎨 استایل CSS مدرن برای هدر و دکمه آپدیت
-    # ==========================================
-    st.markdown("""
-        <style>
-        div[data-testid="stVerticalBlock"] {
-            gap: 0.5rem !important;
-        }
-        
-        .block-container {
-            padding-top: 3rem !important;
-            padding-bottom: 2rem !important;
-        }
-        
-        /* استایل باکس تیتر مدرن - ارتفاع کاهش یافته */
-        .header-box {
-            position: relative;
-            background: linear-gradient(120deg, #ffffff 0%, #f0f7ff 100%);
-            width: 100%;
-            padding: 18px 30px;
-            border-radius: 16px;
-            border: 1px solid #eef2f6;
-            border-right: 6px solid #033270;
-            box-shadow: 0 10px 30px -10px rgba(3, 50, 112, 0.1);
-            margin-bottom: 25px;
-            direction: rtl;
-            text-align: right;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            overflow: hidden;
-            transition: transform 0.3s ease;
-            min-height: 70px;
-        }
-        
-        .header-box:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 15px 35px -10px rgba(3, 50, 112, 0.15);
-        }
-
-        .header-watermark {
-            position: absolute;
-            left: -10px;
-            bottom: -15px;
-            font-size: 90px;
-            opacity: 0.04;
-            color: #033270;
-            transform: rotate(15deg);
-            pointer-events: none;
-            z-index: 0;
-        }
-
-        .header-content {
-            position: relative;
-            z-index: 1;
-            flex: 1;
-        }
-        
-        .header-title {
-            color: #033270;
-            margin: 0;
-            font-size: 28px;
-            font-weight: 900;
-            font-family: 'B Nazanin', 'Tahoma', sans-serif;
-            letter-spacing: -0.5px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        
-        /* 🔥 استایل دکمه آپدیت جدید - داخل باکس */
-        .update-button-box {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 10px 18px;
-            border-radius: 12px;
-            text-align: center;
-            border: 2px solid rgba(255,255,255,0.3);
-            z-index: 1;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-            min-width: 180px;
-        }
-        
-        .update-button-box:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 6px 20px rgba(102, 126, 234, 0.6);
-        }
-        
-        .update-icon {
-            color: white;
-            font-weight: 900;
-            font-size: 16px;
-            margin: 0;
-            text-shadow: 0 2px 4px rgba(0,0,0,0.2);
-        }
-        
-        .update-time {
-            color: rgba(255,255,255,0.95);
-            font-size: 11px;
-            margin: 3px 0 0 0;
-            font-weight: 600;
-        }
-
-        .compact-separator {
-            margin-top: -20px !important;
-            margin-bottom: -20px !important;
-            border-bottom: 1px solid #E2E8F0;
-            width: 100%;
-            display: block;
-        }
-        
-        /* استایل دکمه‌های تب */
-        div.stButton > button[kind="primary"] {
-            background: linear-gradient(135deg, #034870 0%, #164e96 100%) !important;
-            border: none !important;
-            border-radius: 12px !important;
-            padding: 10px 20px !important;
-            box-shadow: 0 4px 10px rgba(3, 50, 112, 0.3) !important;
-            transition: all 0.3s ease !important;
-        }
-        div.stButton > button[kind="primary"] p {
-            color: #ffffff !important; 
-            font-weight: 900 !important;
-            font-size: 16px !important;
-        }
-        div.stButton > button[kind="primary"] * { color: #ffffff !important; }
-
-        div.stButton > button[kind="primary"]:hover {
-            box-shadow: 0 6px 15px rgba(3, 60, 112, 0.4) !important;
-            transform: translateY(-1px) !important;
-        }
-
-        div.stButton > button[kind="secondary"] {
-            background-color: #f8fafc !important;
-            border: 1px solid #e2e8f0 !important;
-            border-radius: 12px !important;
-            padding: 10px 20px !important;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.02) !important;
-            transition: all 0.3s ease !important;
-        }
-        div.stButton > button[kind="secondary"] p {
-            color: #475569 !important;
-            font-weight: 700 !important;
-        }
-        div.stButton > button[kind="secondary"] * { color: #475569 !important; }
-
-        div.stButton > button[kind="secondary"]:hover {
-            background-color: #e2e8f0 !important;
-            border-color: #cbd5e1 !important;
-            color: #033270 !important;
-            transform: translateY(-2px) !important;
-        }
-        div.stButton > button[kind="secondary"]:hover p {
-             color: #033270 !important;
-        }
-
-        </style>
-        """, unsafe_allow_html=True)
-    
-    # محاسبه تاریخ آخرین آپدیت
-    if st.session_state.last_update_hr_global:
-        shamsi_update = jdatetime.datetime.fromgregorian(datetime=st.session_state.last_update_hr_global)
-        last_update_text = shamsi_update.strftime('%Y/%m/%d - %H:%M')
-    else:
-        last_update_text = "هنوز بروزرسانی نشده"
-    
-# ---------------------------------------------------------
-    # 👇👇👇 اصلاح نهایی: جابجایی آیکون به سمت راست دکمه 👇👇👇
-    # ---------------------------------------------------------
-    
-    st.markdown("""
-        <style>
-        @keyframes shine {
-            0% { left: -100%; opacity: 0; }
-            5% { left: -100%; opacity: 0.3; }
-            20% { left: 100%; opacity: 0.3; }
-            100% { left: 100%; opacity: 0; }
-        }
-
-        @keyframes floatIcon {
-            0% { transform: rotate(15deg) translateY(0px); }
-            50% { transform: rotate(10deg) translateY(-10px); }
-            100% { transform: rotate(15deg) translateY(0px); }
-        }
-
-        .header-box {
-            position: relative;
-            /* رنگ آبی ملیح */
-            background: linear-gradient(135deg, #e6f2ff 0%, #cfe5ff 100%);
-            border-right: 6px solid #033270;
-            border-radius: 16px;
-            box-shadow: 0 8px 20px rgba(3, 50, 112, 0.15);
-            overflow: hidden;
-            border: 1px solid #bbdefb;
-            transition: all 0.3s cubic-bezier(0.25, 0.8, 0.25, 1);
-        }
-
-        .header-box:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 15px 30px rgba(3, 50, 112, 0.3);
-            border-color: #64b5f6;
-        }
-
-        .header-box::after {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: -100%;
-            width: 50%;
-            height: 100%;
-            background: linear-gradient(to right, 
-                rgba(255,255,255,0) 0%, 
-                rgba(255,255,255,0.6) 50%, 
-                rgba(255,255,255,0) 100%);
-            transform: skewX(-25deg);
-            animation: shine 6s infinite;
-            pointer-events: none;
-        }
-
-        .header-watermark {
-            position: absolute;
-            /* ✅✅✅ تغییر مکان آیکون: */
-            left: 250px;  /* قبلا 20px بود، الان 180px شد تا از زیر دکمه بیاید بیرون */
-            bottom: -20px;
-            font-size: 100px;
-            opacity: 0.08;
-            color: #033270;
-            z-index: 0;
-            animation: floatIcon 6s ease-in-out infinite;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
-    # 1. رسم باکس پس‌زمینه (لایه زیرین)
-    # ارتفاع 90 پیکسل برای فضای کافی جهت وسط‌چین کردن
-    st.markdown(f"""
-    <div class="header-box" style="margin-bottom: -85px; height: 90px; z-index: 0;">
-        <div class="header-watermark"><i class="fas fa-users"></i></div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 2. ایجاد ستون‌ها روی باکس (لایه رویی)
-    # ساختار ستون‌ها در حالت فارسی (RTL):
-    # [متن (راست)] --- [دکمه (چپ)] --- [فاصله خالی (لبه چپ)]
-    # نسبت‌ها: 6 واحد متن | 1.3 واحد دکمه | 0.3 واحد فاصله خالی (برای هل دادن دکمه به داخل)
-    c_text, c_btn, c_spacer = st.columns([6, 1.3, 0.3])
-    
-    with c_text:
-        # متن تیتر (سمت راست)
-        # padding-top: 25px باعث می‌شود متن دقیقاً وسط باکس 90 پیکسلی قرار گیرد
-        st.markdown("""
-        <div style="padding-right: 20px; padding-top: 10px;">
-            <div class="header-title">👥 مدیریت منابع انسانی</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with c_btn:
-        # دکمه (سمت چپ)
-        # فاصله از بالا برای تراز عمودی با باکس
-        st.markdown("<div style='height: 12px;'></div>", unsafe_allow_html=True) 
-        
-        if st.button("🔄 بروزرسانی", use_container_width=True, key="header_update_btn"):
-            fetch_and_clean_data.clear()
-            st.session_state.last_update_personnel = None
-            st.session_state.last_update_employee = None
-            st.session_state.last_update_monthlylist = None
-            st.session_state.last_update_hr_global = datetime.now()
-            st.rerun()
-            
-        # نمایش تاریخ زیر دکمه (بزرگتر و خواناتر)
-        st.markdown(f"""
-        <div style='text-align:center; font-size:13px; font-weight:bold; color:#555; margin-top: -9px; text-shadow: 0 1px 0 rgba(255,255,255,0.8);'>
-            {last_update_text} 📅
-        </div>
-        """, unsafe_allow_html=True)
+    store = get_sheet_store()
+    scheduler = get_refresh_scheduler()
+    pending = []
+    for data_type in data_types:
+        if not needs_refresh(data_type):
+            continue
+        sheet_name = HR_SHEETS[data_type]
+        if store.get(sheet_name) is not None:
+            # نسخه فعلی (حتی قدیمی) نمایش داده می‌شود و در پس‌زمینه بروز می‌گردد
+            scheduler.refresh(sheet_name)
+        else:
+            pending.append(data_type)
+    if not pending:
+        return
+    # فقط بار اول (بدون هیچ نسخه‌ای در حافظه یا روی دیسک) منتظر دریافت می‌مانیم
+    labels = "، ".join(HR_LOADING_MESSAGES[d] for d in pending)
+    with st.spinner(f"⏳ در حال دریافت {labels}..."):
+        load_sheets(pending)
 
-    # ستون سوم (c_spacer) خالی می‌ماند تا دکمه به سمت راست (داخل باکس) متمایل شود
 
-    # یک فاصله خالی پایین باکس برای جلوگیری از تداخل
-    st.markdown("<div style='margin-bottom: 50px;'></div>", unsafe_allow_html=True)
+@st.fragment
+def show_personnel_dashboard():
+    """
+    تب «تحلیل پرسنل» داشبورد تحلیلی. به صورت fragment اجرا می‌شود: تغییر فیلتر جنسیت/ماه/واحد
+    فقط همین کارت‌ها را دوباره اجرا می‌کند، نه هدر و منو و بقیه صفحه.
+    """
+    st.markdown("#### 📊 داشبورد جامع تحلیل سرمایه انسانی")
+
+    # اطمینان از لود بودن داده‌ها
+    monthly_entry = get_hr_entry("monthly")
+    personnel_entry = get_hr_entry("personnel")
+    if monthly_entry is not None and personnel_entry is not None:
+
+        # 1. مکعب تجمیعی (ماه × واحد × جنسیت) که برای هر نسخه داده فقط یک بار ساخته می‌شود
+        cube = get_headcount_cube(monthly_entry.data, personnel_entry.data,
+                                  monthly_entry.cache_key, personnel_entry.cache_key)
+
+        # 2. چیدمان فیلترها
+        sorted_months = cube.months
+
+        # کانتینر فیلترها
+        st.markdown('<div style="background-color: white; padding: 15px; border-radius: 10px; border: 1px solid #eee; box-shadow: 0 2px 5px rgba(0,0,0,0.05); margin-bottom: 20px;">', unsafe_allow_html=True)
+        f_col1, f_col2, f_col3 = st.columns([1.5, 1, 1])
+
+        with f_col1:
+            selected_gender = st.radio(
+                "تفکیک جنسیتی:",
+                ["👥 همه", "👨 آقایان", "👩 خانم‌ها"],
+                horizontal=True,
+                key="dash_gender_filter_new"
+            )
 
+        with f_col2:
+            # انتخاب پیش‌فرض: آخرین ماه لیست (که الان باید آبان یا آذر باشد)
+            default_idx = len(sorted_months) - 1 if sorted_months else 0
+            selected_month = st.selectbox("📅 انتخاب ماه:", sorted_months, index=default_idx, key="dash_month_filter_new")
 
+        with f_col3:
+            units_list = ['همه'] + cube.units
+            selected_unit = st.selectbox("🏭 انتخاب واحد:", units_list, key="dash_unit_filter_new")
 
-    # 3. مدیریت وضعیت تب فعال
-    if 'hr_active_tab' not in st.session_state:
-        st.session_state.hr_active_tab = "رویدادها"
-    
-    # 3. مدیریت وضعیت تب فعال
-    if 'hr_active_tab' not in st.session_state:
-        st.session_state.hr_active_tab = "رویدادها" # پیش‌فرض
-    # نوار دکمه‌ها
-    b1, b2, b3, b4, b5 = st.columns(5)
-    
-    with b1:
-        type_ = "primary" if st.session_state.hr_active_tab == "رویدادها" else "secondary"
-        if st.button("رویدادها 📅", use_container_width=True, type=type_):
-            st.session_state.hr_active_tab = "رویدادها"
-            st.rerun()
-            
-    with b2:
-        type_ = "primary" if st.session_state.hr_active_tab == "بانک اطلاعات سرمایه انسانی" else "secondary"
-        if st.button(" بانک اطلاعات سرمایه انسانی🗂️", use_container_width=True, type=type_):
-            st.session_state.hr_active_tab = "بانک اطلاعات سرمایه انسانی"
-            st.rerun()
-    with b3:
-        type_ = "primary" if st.session_state.hr_active_tab == "گزارش ماهانه" else "secondary"
-        if st.button("گزارش ماهانه 📊", use_container_width=True, type=type_):
-            st.session_state.hr_active_tab = "گزارش ماهانه"
-            st.rerun()
-            
-    with b4:
-        type_ = "primary" if st.session_state.hr_active_tab == "جذب و استخدام" else "secondary"
-        if st.button("جذب و استخدام 📝", use_container_width=True, type=type_):
-            st.session_state.hr_active_tab = "جذب و استخدام"
-            st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    with b5:
-        type_ = "primary" if st.session_state.hr_active_tab == "داشبورد تحلیلی" else "secondary"
-        if st.button("داشبورد تحلیلی 📈", use_container_width=True, type=type_):
-            st.session_state.hr_active_tab = "داشبورد تحلیلی"
-            st.rerun()
+        # 3 و 4. محاسبات کارت‌ها: یک جستجو در مکعب به جای فیلتر کردن کل جدول
+        gender_key = {"👨 آقایان": GENDER_MALE, "👩 خانم‌ها": GENDER_FEMALE}.get(selected_gender, ALL)
+        cell = cube.lookup(selected_month, selected_unit, gender_key)
+        total_active_count = cell.active
+        new_hires_count = cell.new_hires
+        churn_count = cell.churn
+        churn_rate = cell.churn_rate
 
-    st.markdown("---") 
+        # 5. نمایش کارت‌ها
+        css_scope("hr-personnel")
 
-    # =========================================================
-    # محتوای صفحات (کپی دقیق از کد اصلی شما)
-    # =========================================================
+        c1, c2, c3 = st.columns(3)
 
-    # بخش ۵: داشبورد تحلیل (شامل تمام نمودارها و تحلیل‌ها)
-    # ---------------------------------------------------------
-    # ---------------------------------------------------------
-    # بخش ۵: داشبورد تحلیل (شامل تمام نمودارها و تحلیل‌ها)
-    # ---------------------------------------------------------
-    if st.session_state.hr_active_tab == "داشبورد تحلیلی":
-        # ✅✅✅ این خط جدید را حتماً اضافه کنید:
-        ensure_data_loaded("monthly") 
-        
-        # خطوط قبلی که بودند:
-        ensure_data_loaded("employee")
-        ensure_data_loaded("personnel")
-        
-        # تب‌های فرعی...
-        sub_tab1, sub_tab2 = st.tabs(["👥 تحلیل پرسنل", "📝 تحلیل جذب و استخدام"])
-        
-        with sub_tab1:
-            st.markdown("#### 📊 داشبورد جامع تحلیل سرمایه انسانی")
-            
-            # اطمینان از لود بودن داده‌ها
-            if st.session_state.monthlylist_data is not None and st.session_state.personnel_data is not None:
-                
-                # 1. آماده‌سازی داده‌ها
-                df_main = st.session_state.monthlylist_data.copy()
-                df_gender_source = st.session_state.personnel_data.copy()
-                
-                # تمیزکاری اولیه نام ستون‌ها
-                df_main.columns = [str(col).strip().replace('ي', 'ی').replace('ك', 'ک') for col in df_main.columns]
-                df_gender_source.columns = [str(col).strip().replace('ي', 'ی').replace('ك', 'ک') for col in df_gender_source.columns]
-
-                # ✅✅✅ بخش جدید: استانداردسازی نام ماه‌ها (حل مشکل ابان/آبان)
-                if 'ماه' in df_main.columns:
-                    def normalize_month(m):
-                        if pd.isna(m): return m
-                        m = str(m).strip().replace('ي', 'ی').replace('ك', 'ک')
-                        if m == "ابان": return "آبان"
-                        if m == "اذر": return "آذر"
-                        return m
-                    df_main['ماه'] = df_main['ماه'].apply(normalize_month)
-
-                # ادغام برای افزودن جنسیت به گزارش ماهانه
-                if 'شماره پرسنلی' in df_main.columns and 'شماره پرسنلی' in df_gender_source.columns and 'جنسیت' in df_gender_source.columns:
-                    df_main['شماره پرسنلی'] = df_main['شماره پرسنلی'].astype(str).str.strip()
-                    df_gender_source['شماره پرسنلی'] = df_gender_source['شماره پرسنلی'].astype(str).str.strip()
-                    
-                    # حذف تکراری‌ها در فایل پرسنلی
-                    gender_map = df_gender_source.drop_duplicates('شماره پرسنلی')[['شماره پرسنلی', 'جنسیت']]
-                    
-                    # ادغام
-                    df_merged = pd.merge(df_main, gender_map, on='شماره پرسنلی', how='left')
-                    df_merged['جنسیت'] = df_merged['جنسیت'].fillna('نامشخص')
-                else:
-                    df_merged = df_main.copy()
-                    df_merged['جنسیت'] = 'نامشخص'
-
-                # 2. چیدمان فیلترها
-                persian_months_order = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور", "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
-                
-                # پیدا کردن ماه‌های موجود
-                available_months = df_merged['ماه'].unique().tolist() if 'ماه' in df_merged.columns else []
-                # مرتب‌سازی ماه‌ها
-                sorted_months = sorted([m for m in available_months if m in persian_months_order], key=lambda x: persian_months_order.index(x))
-                
-                # کانتینر فیلترها
-                st.markdown('<div style="background-color: white; padding: 15px; border-radius: 10px; border: 1px solid #eee; box-shadow: 0 2px 5px rgba(0,0,0,0.05); margin-bottom: 20px;">', unsafe_allow_html=True)
-                f_col1, f_col2, f_col3 = st.columns([1.5, 1, 1])
-                
-                with f_col1:
-                    selected_gender = st.radio(
-                        "تفکیک جنسیتی:",
-                        ["👥 همه", "👨 آقایان", "👩 خانم‌ها"],
-                        horizontal=True,
-                        key="dash_gender_filter_new"
-                    )
-                
-                with f_col2:
-                    # انتخاب پیش‌فرض: آخرین ماه لیست (که الان باید آبان یا آذر باشد)
-                    default_idx = len(sorted_months) - 1 if sorted_months else 0
-                    selected_month = st.selectbox("📅 انتخاب ماه:", sorted_months, index=default_idx, key="dash_month_filter_new")
-                
-                with f_col3:
-                    units_list = ['همه'] + sorted(df_merged['واحد'].dropna().unique().tolist()) if 'واحد' in df_merged.columns else ['همه']
-                    selected_unit = st.selectbox("🏭 انتخاب واحد:", units_list, key="dash_unit_filter_new")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-
-                # 3. فیلتر کردن داده‌ها
-                df_month_filtered = df_merged[df_merged['ماه'] == selected_month].copy()
-                
-                if selected_unit != "همه":
-                    df_month_filtered = df_month_filtered[df_month_filtered['واحد'] == selected_unit]
-                
-                if selected_gender == "👨 آقایان":
-                    df_month_filtered = df_month_filtered[df_month_filtered['جنسیت'] == "مرد"]
-                elif selected_gender == "👩 خانم‌ها":
-                    df_month_filtered = df_month_filtered[df_month_filtered['جنسیت'] == "زن"]
-
-                # 4. محاسبات کارت‌ها
-                
-                # A: تعداد کل پرسنل فعال (کسانی که وضعیتشان ترک کار نیست)
-                if 'وضعیت' in df_month_filtered.columns:
-                    active_df = df_month_filtered[~df_month_filtered['وضعیت'].astype(str).str.contains('ترک کار|قطع همکاری', case=False, na=False)]
-                    total_active_count = len(active_df)
-                else:
-                    total_active_count = len(df_month_filtered)
-
-                # تابع کمکی تاریخ
-                month_map = {name: str(i+1).zfill(2) for i, name in enumerate(persian_months_order)}
-                target_month_num = month_map.get(selected_month, "00")
-
-                def check_date_in_month(date_val, m_num):
-                    try:
-                        s = str(date_val).strip()
-                        if pd.isna(s) or s == 'nan' or s == 'None': return False
-                        parts = s.split('/')
-                        if len(parts) >= 2:
-                            return parts[1] == m_num
-                        return False
-                    except: return False
-
-                # B: جذب جدید
-                new_hires_count = 0
-                if 'تاریخ استخدام' in df_month_filtered.columns:
-                    new_hires_df = df_month_filtered[df_month_filtered['تاریخ استخدام'].apply(lambda x: check_date_in_month(x, target_month_num))]
-                    new_hires_count = len(new_hires_df)
-
-                # C: نرخ ریزش
-                churn_count = 0
-                if 'تاریخ ترک کار' in df_month_filtered.columns:
-                    churn_df = df_month_filtered[df_month_filtered['تاریخ ترک کار'].apply(lambda x: check_date_in_month(x, target_month_num))]
-                    churn_count = len(churn_df)
-                elif 'علت ترک کار' in df_month_filtered.columns:
-                     churn_count = len(df_month_filtered[df_month_filtered['علت ترک کار'].notna() & (df_month_filtered['علت ترک کار'] != "نامشخص")])
-
-                churn_rate = round((churn_count / len(df_month_filtered) * 100), 1) if len(df_month_filtered) > 0 else 0
-
-                # 5. نمایش کارت‌ها
-                st.markdown("""
-                <style>
-                    .gradient-card {
-                        border-radius: 16px;
-                        padding: 15px !important;
-                        height: 160px !important;
-                        display: flex; flex-direction: column; justify-content: space-between;
-                        position: relative; overflow: hidden;
-                        border: 1px solid rgba(255,255,255,0.5);
-                        font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                        transition: transform 0.3s;
-                    }
-                    .gradient-card:hover { transform: translateY(-5px); box-shadow: 0 10px 20px rgba(0,0,0,0.1); }
-                    .watermark-icon {
-                        position: absolute; top: -15px; left: -15px;
-                        font-size: 80px; opacity: 0.1; pointer-events: none; transform: rotate(15deg);
-                    }
-                    .card-content { position: relative; z-index: 2; }
-                    .g-title { font-size: 16px !important; font-weight: 800; color: rgba(0,0,0,0.6); margin: 0; }
-                    .g-value { font-size: 42px !important; font-weight: 900; color: #333; margin: 5px 0; text-shadow: 1px 1px 0px rgba(255,255,255,0.5); }
-                    .g-sub { font-size: 14px !important; color: rgba(0,0,0,0.7); font-weight: 700; }
-                </style>
-                """, unsafe_allow_html=True)
-
-                c1, c2, c3 = st.columns(3)
-                
-                with c1:
-                    st.markdown(f"""
+        with c1:
+            st.markdown(f"""
                     <div class="gradient-card" style="background: linear-gradient(135deg, #e3f2fd 0%, #90caf9 100%);">
                         <div class="watermark-icon">👥</div>
                         <div class="card-content">
@@ -1083,9 +538,9 @@ def show_hr_content():
                     </div>
                     """, unsafe_allow_html=True)
 
-                with c2:
-                    bg_color = "linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%)" if churn_rate > 5 else "linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%)"
-                    st.markdown(f"""
+        with c2:
+            bg_color = "linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%)" if churn_rate > 5 else "linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%)"
+            st.markdown(f"""
                     <div class="gradient-card" style="background: {bg_color};">
                         <div class="watermark-icon">📉</div>
                         <div class="card-content">
@@ -1096,8 +551,8 @@ def show_hr_content():
                     </div>
                     """, unsafe_allow_html=True)
 
-                with c3:
-                    st.markdown(f"""
+        with c3:
+            st.markdown(f"""
                     <div class="gradient-card" style="background: linear-gradient(135deg, #e8f5e9 0%, #a5d6a7 100%);">
                         <div class="watermark-icon">🚀</div>
                         <div class="card-content">
@@ -1107,97 +562,90 @@ def show_hr_content():
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
-                
-                st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
-                
-            else:
-                st.warning("⚠️ داده‌های گزارش ماهانه یا پرسنلی بارگذاری نشده‌اند.")
-        with sub_tab2:
 
-                        st.markdown("### 📊 سامانه هوشمند تحلیل جذب")
-                        
-                        if st.session_state.employee_data is not None:
-                            df_emp = st.session_state.employee_data.copy()
-                            
-                            # فیلتر جنسیت
-                            filter_col1, filter_col2 = st.columns([3, 1])
-                            with filter_col1:
-                                if 'جنسیت' in df_emp.columns:
-                                    selected_gender = st.radio(
-                                        "نمایش بر اساس:",
-                                        ["👥 همه", "👨 آقایان", "👩 خانم‌ها"],
-                                        horizontal=True,
-                                        label_visibility="collapsed",
-                                        key="gender_filter_radio"
-                                    )
-                                    if selected_gender == "👨 آقایان":
-                                        df_emp = df_emp[df_emp['جنسیت'] == 'مرد']
-                                    elif selected_gender == "👩 خانم‌ها":
-                                        df_emp = df_emp[df_emp['جنسیت'] == 'زن']
-
-                            # =========================================================
-                            # 1. محاسبات (بدون تغییر)
-                            # =========================================================
-                            total_candidates = len(df_emp)
-                            if 'وضعیت نهایی' in df_emp.columns:
-                                total_hired = len(df_emp[df_emp['وضعیت نهایی'] == 'استخدام شد'])
-                                total_rejected = len(df_emp[df_emp['وضعیت نهایی'] == 'رد شد'])
-                                total_withdrawal = len(df_emp[df_emp['وضعیت نهایی'] == 'انصراف داد'])
-                                known_statuses = ['استخدام شد', 'رد شد', 'انصراف داد']
-                                total_unknown = len(df_emp[~df_emp['وضعیت نهایی'].isin(known_statuses)])
-                            else:
-                                total_hired = 0; total_rejected = 0; total_withdrawal = 0; total_unknown = 0
-                            
-                            conversion_rate = (total_hired / total_candidates * 100) if total_candidates > 0 else 0
-                            rejection_rate = (total_rejected / total_candidates * 100) if total_candidates > 0 else 0
-                            withdrawal_rate = (total_withdrawal / total_candidates * 100) if total_candidates > 0 else 0
-                            selection_ratio = f"1:{int(total_candidates/total_hired)}" if total_hired > 0 else "0"
-                            
-                            health_score = 100
-                            if withdrawal_rate > 20: health_score -= 30
-                            if conversion_rate < 5: health_score -= 20
-                            if conversion_rate > 50: health_score -= 10
-
-                            if 'واحد' in df_emp.columns and not df_emp.empty:
-                                top_interview_unit = df_emp['واحد'].value_counts().idxmax()
-                                top_interview_count = df_emp['واحد'].value_counts().max()
-                            else:
-                                top_interview_unit = "---"; top_interview_count = 0
-
-                            hired_df_only = df_emp[df_emp['وضعیت نهایی'] == 'استخدام شد']
-                            if 'واحد' in hired_df_only.columns and not hired_df_only.empty:
-                                top_hired_unit = hired_df_only['واحد'].value_counts().idxmax()
-                                top_hired_count = hired_df_only['واحد'].value_counts().max()
-                                
-                                unit_specific = hired_df_only[hired_df_only['واحد'] == top_hired_unit]
-                                if 'جنسیت' in unit_specific.columns:
-                                    m_c = len(unit_specific[unit_specific['جنسیت'] == 'مرد'])
-                                    f_c = len(unit_specific[unit_specific['جنسیت'] == 'زن'])
-                                    tot = len(unit_specific)
-                                    m_p = int((m_c/tot)*100) if tot>0 else 0
-                                    f_p = int((f_c/tot)*100) if tot>0 else 0
-                                    # 👇 این خط قدیمی را پاک کنید 👇
-                                    # 👇👇👇 کد کاملاً اصلاح شده (دقیقاً مشابه کارت‌های دیگر) 👇👇👇
-                                    gender_html_top_unit = f"""<div style="background: rgba(255, 255, 255, 0.6); border-radius: 8px; padding: 6px 10px; display: flex; justify-content: space-between; align-items: center; margin-top: auto; font-size: 14px; color: #444; font-weight: 600; font-family: 'B Nazanin', Tahoma, sans-serif !important;"><div style="display:flex; align-items:center;">👨 {m_c} <span style="font-size:11px; opacity:0.7; margin-right:2px;">({m_p}%)</span></div><div style="width:1px; height:12px; background:#ccc; margin:0 5px;"></div><div style="display:flex; align-items:center;">👩 {f_c} <span style="font-size:11px; opacity:0.7; margin-right:2px;">({f_p}%)</span></div></div>"""
-                                else: gender_html_top_unit = ""
-                            else:
-                                top_hired_unit = "---"; top_hired_count = 0; gender_html_top_unit = ""
-
-                            if total_hired > 0:
-                                effort_text = f"1 : {round(total_candidates / total_hired, 1)}"
-                            else:
-                                effort_text = "---"
-
-                            # توابع کمکی HTML برای کارت‌ها
-                            def get_gender_glass_html(df_subset, color_code):
-                                if df_subset.empty or 'جنسیت' not in df_subset.columns:
-                                    return '<div style="height: 25px;"></div>'
-                                total = len(df_subset)
-                                m_count = len(df_subset[df_subset['جنسیت'] == 'مرد'])
-                                f_count = len(df_subset[df_subset['جنسیت'] == 'زن'])
-                                m_pct = int((m_count / total) * 100) if total > 0 else 0
-                                f_pct = int((f_count / total) * 100) if total > 0 else 0
-                                return f"""
+        st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
+
+    else:
+        st.warning("⚠️ داده‌های گزارش ماهانه یا پرسنلی بارگذاری نشده‌اند.")
+
+
+@st.fragment
+def show_recruitment_dashboard():
+    """
+    تب «تحلیل جذب و استخدام» داشبورد تحلیلی (fragment): تغییر فیلتر جنسیت فقط
+    کارت‌ها و نمودارهای جذب را دوباره اجرا می‌کند.
+    """
+    st.markdown("### 📊 سامانه هوشمند تحلیل جذب")
+
+    emp_entry = get_hr_entry("employee")
+    if emp_entry is not None:
+        emp_version = emp_entry.cache_key
+
+        # فیلتر جنسیت
+        filter_col1, filter_col2 = st.columns([3, 1])
+        with filter_col1:
+            selected_gender = st.radio(
+                "نمایش بر اساس:",
+                ["👥 همه", "👨 آقایان", "👩 خانم‌ها"],
+                horizontal=True,
+                label_visibility="collapsed",
+                key="gender_filter_radio"
+            )
+
+        # =========================================================
+        # 1. محاسبات (از جدول شمارش قیف جذب؛ یک groupby برای هر نسخه داده)
+        # =========================================================
+        gender_key = {"👨 آقایان": GENDER_MALE, "👩 خانم‌ها": GENDER_FEMALE}.get(selected_gender, ALL)
+        funnel = get_recruitment_funnel(emp_entry.data, emp_version).for_gender(gender_key)
+
+        total_candidates = funnel.total
+        total_hired = funnel.count(status=HIRED_STATUS)
+        total_rejected = funnel.count(status=REJECTED_STATUS)
+        total_withdrawal = funnel.count(status=WITHDRAWN_STATUS)
+        total_unknown = funnel.unknown
+        conversion_rate = (total_hired / total_candidates * 100) if total_candidates > 0 else 0
+        rejection_rate = (total_rejected / total_candidates * 100) if total_candidates > 0 else 0
+        withdrawal_rate = (total_withdrawal / total_candidates * 100) if total_candidates > 0 else 0
+        selection_ratio = f"1:{int(total_candidates/total_hired)}" if total_hired > 0 else "0"
+
+        health_score = 100
+        if withdrawal_rate > 20: health_score -= 30
+        if conversion_rate < 5: health_score -= 20
+        if conversion_rate > 50: health_score -= 10
+
+        top_interview = funnel.top('unit')
+        if top_interview is not None:
+            top_interview_unit, top_interview_count = top_interview
+        else:
+            top_interview_unit = "---"; top_interview_count = 0
+
+        top_hired = funnel.top('unit', status=HIRED_STATUS)
+        if top_hired is not None:
+            top_hired_unit, top_hired_count = top_hired
+
+            unit_split = funnel.gender_split(status=HIRED_STATUS, unit=top_hired_unit)
+            m_c, f_c = unit_split.male, unit_split.female
+            m_p, f_p = unit_split.male_pct, unit_split.female_pct
+            # 👇 این خط قدیمی را پاک کنید 👇
+            # 👇👇👇 کد کاملاً اصلاح شده (دقیقاً مشابه کارت‌های دیگر) 👇👇👇
+            gender_html_top_unit = f"""<div style="background: rgba(255, 255, 255, 0.6); border-radius: 8px; padding: 6px 10px; display: flex; justify-content: space-between; align-items: center; margin-top: auto; font-size: 14px; color: #444; font-weight: 600; font-family: 'B Nazanin', Tahoma, sans-serif !important;"><div style="display:flex; align-items:center;">👨 {m_c} <span style="font-size:11px; opacity:0.7; margin-right:2px;">({m_p}%)</span></div><div style="width:1px; height:12px; background:#ccc; margin:0 5px;"></div><div style="display:flex; align-items:center;">👩 {f_c} <span style="font-size:11px; opacity:0.7; margin-right:2px;">({f_p}%)</span></div></div>"""
+        else:
+            top_hired_unit = "---"; top_hired_count = 0; gender_html_top_unit = ""
+
+        if total_hired > 0:
+            effort_text = f"1 : {round(total_candidates / total_hired, 1)}"
+        else:
+            effort_text = "---"
+
+        # توابع کمکی HTML برای کارت‌ها (split: تفکیک جنسیتی از قیف جذب)
+        def get_gender_glass_html(split, color_code):
+            if split.total == 0:
+                return '<div style="height: 25px;"></div>'
+            m_count = split.male
+            f_count = split.female
+            m_pct = split.male_pct
+            f_pct = split.female_pct
+            return f"""
                                 <div style="background: rgba(255, 255, 255, 0.6); border-radius: 8px; padding: 6px 10px; display: flex; justify-content: space-between; align-items: center; margin-top: auto; font-size: 14px; color: #444; font-weight: 600; backdrop-filter: blur(4px); border: 1px solid rgba(255,255,255,0.4);">
                                     <div style="display:flex; align-items:center;">👨 {m_count} <span style="font-size:11px; opacity:0.7; margin-right:2px;">({m_pct}%)</span></div>
                                     <div style="width:1px; height:12px; background:#ccc; margin:0 5px;"></div>
@@ -1205,157 +653,88 @@ def show_hr_content():
                                 </div>
                                 """
 
-                            gender_html_total = get_gender_glass_html(df_emp, "#3498db")
-                            unknown_df = df_emp[~df_emp['وضعیت نهایی'].isin(known_statuses)]
-                            gender_html_unknown = get_gender_glass_html(unknown_df, "#7f8c8d")
-                            
-                            if 'واحد' in df_emp.columns and not df_emp.empty:
-                                interview_unit_df = df_emp[df_emp['واحد'] == top_interview_unit]
-                                gender_html_interview = get_gender_glass_html(interview_unit_df, "#9b59b6")
-                            else: gender_html_interview = ""
-
-                            rejected_df = df_emp[df_emp['وضعیت نهایی'] == 'رد شد']
-                            gender_html_rejected = get_gender_glass_html(rejected_df, "#c0392b")
-                            
-                            withdrawal_df = df_emp[df_emp['وضعیت نهایی'] == 'انصراف داد']
-                            gender_html_withdrawal = get_gender_glass_html(withdrawal_df, "#e67e22")
-
-                            hired_df_only = df_emp[df_emp['وضعیت نهایی'] == 'استخدام شد']
-                            gender_html_hired = get_gender_glass_html(hired_df_only, "#2ecc71")
-
-                            # =========================================================
-                            # 2. نمایش کارت‌های رنگی (۸ کارت کامل)
-                            # =========================================================
-                            st.markdown("""
-                            <style>
-                                .gradient-card {
-                                    border-radius: 16px;
-                                    padding: 10px 14px !important; 
-                                    height: 170px !important;      
-                                    display: flex;
-                                    flex-direction: column;
-                                    justify-content: space-between;
-                                    position: relative;
-                                    overflow: hidden;
-                                    border: 1px solid rgba(255,255,255,0.5);
-                                    font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                                }
-                                .gradient-card:hover {
-                                    transform: translateY(-5px);
-                                    box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-                                }
-                                .watermark-icon {
-                                    position: absolute;
-                                    top: -15px;
-                                    left: -15px;
-                                    font-size: 80px;
-                                    opacity: 0.08;
-                                    pointer-events: none;
-                                    transform: rotate(15deg);
-                                }
-                                .card-content {
-                                    position: relative;
-                                    z-index: 2;
-                                    display: flex;
-                                    flex-direction: column;
-                                    height: 100%;
-                                    font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                                }
-                                .g-title {
-                                    font-size: 15px !important;
-                                    font-weight: 800;
-                                    color: rgba(0,0,0,0.6);
-                                    margin: 0 !important;
-                                    font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                                }
-                                .g-value {
-                                    font-size: 36px !important;
-                                    font-weight: 900;
-                                    color: #333;
-                                    margin: 0 !important;
-                                    line-height: 1.2 !important;
-                                    text-shadow: 1px 1px 0px rgba(255,255,255,0.5);
-                                    font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                                }
-                                .g-sub {
-                                    font-size: 13px !important;
-                                    color: rgba(0,0,0,0.6);
-                                    font-weight: 700;
-                                    margin-bottom: auto !important;
-                                    font-family: 'B Nazanin', Tahoma, sans-serif !important;
-                                }
-                            </style>
-                            """, unsafe_allow_html=True)
-
-                            r1_c1, r1_c2, r1_c3, r1_c4 = st.columns(4)
-                            with r1_c1: 
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);"><div class="watermark-icon">📂</div><div class="card-content"><div class="g-title">کل متقاضیان</div><div class="g-value">{total_candidates}</div><div class="g-sub">رزومه‌های دریافتی</div>{gender_html_total}</div></div>""", unsafe_allow_html=True)
-                            with r1_c2:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #f5f5f5 0%, #e0e0e0 100%);"><div class="watermark-icon">❓</div><div class="card-content"><div class="g-title">وضعیت نامشخص</div><div class="g-value">{total_unknown}</div><div class="g-sub">در انتظار بررسی</div>{gender_html_unknown}</div></div>""", unsafe_allow_html=True)
-                            with r1_c3:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%);"><div class="watermark-icon">📥</div><div class="card-content"><div class="g-title">واحد با بیشترین حجم مصاحبه</div><div class="g-value">{top_interview_count}</div><div class="g-sub">{top_interview_unit}</div>{gender_html_interview}</div></div>""", unsafe_allow_html=True)
-                            with r1_c4:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%);"><div class="watermark-icon">🛡️</div><div class="card-content"><div class="g-title">غربالگری اولیه</div><div class="g-value">{total_rejected}</div><div class="g-sub">در مرحله غربالگری</div>{gender_html_rejected}</div></div>""", unsafe_allow_html=True)
-                            
-                            st.markdown("<div style='margin-bottom: 15px;'></div>", unsafe_allow_html=True)
-                            
-                            r2_c1, r2_c2, r2_c3, r2_c4 = st.columns(4)
-                            with r2_c1:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%);"><div class="watermark-icon">🏃</div><div class="card-content"><div class="g-title">انصراف داوطلب</div><div class="g-value">{total_withdrawal}</div><div class="g-sub">خروج از فرآیند</div>{gender_html_withdrawal}</div></div>""", unsafe_allow_html=True)
-                            with r2_c2:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%);"><div class="watermark-icon">🤝</div><div class="card-content"><div class="g-title">جذب موفق</div><div class="g-value">{total_hired}</div><div class="g-sub">جذب موفق</div>{gender_html_hired}</div></div>""", unsafe_allow_html=True)
-                            with r2_c3:
-                                st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e0f2f1 0%, #b2dfdb 100%);"><div class="watermark-icon">🏆</div><div class="card-content"><div class="g-title">بیشترین تعداد استخدام موفق</div><div class="g-value">{top_hired_count}</div><div class="g-sub">{top_hired_unit}</div>{gender_html_top_unit}</div></div>""", unsafe_allow_html=True)
-                            with r2_c4:
-
-                                # 1. تابع محلی تبدیل اعداد به فارسی
-                                def to_persian_num(num_str):
-                                    eng = "0123456789"
-                                    per = "۰۱۲۳۴۵۶۷۸۹"
-                                    tr = str.maketrans(eng, per)
-                                    return str(num_str).translate(tr)
-
-                                # 2. محاسبه مجدد متغیرها (برای جلوگیری از خطای NameError)
-                                # استفاده از متغیرهای محلی برای اطمینان از وجود داده
-                                candidates_local = len(df_emp)
-                                hired_df_local = df_emp[df_emp['وضعیت نهایی'] == 'استخدام شد']
-                                hired_count_local = len(hired_df_local)
-
-                                # 3. محاسبه عدد اصلی کارت (شاخص کل) به فارسی
-                                if hired_count_local > 0:
-                                    raw_main = round(candidates_local / hired_count_local, 1)
-                                    effort_text_persian = f"۱ : {to_persian_num(raw_main)}"
-                                else:
-                                    effort_text_persian = "---"
-
-                                # 4. محاسبه تفکیک جنسیتی (مرد و زن)
-                                m_cand = len(df_emp[df_emp['جنسیت'] == 'مرد'])
-                                f_cand = len(df_emp[df_emp['جنسیت'] == 'زن'])
-                                
-                                m_hired_c = len(hired_df_local[hired_df_local['جنسیت'] == 'مرد'])
-                                f_hired_c = len(hired_df_local[hired_df_local['جنسیت'] == 'زن'])
-
-                                if m_hired_c > 0:
-                                    raw_m = int(m_cand/m_hired_c)
-                                    m_eff_text = f"۱:{to_persian_num(raw_m)}" 
-                                else: m_eff_text = "-"
-                                    
-                                if f_hired_c > 0:
-                                    raw_f = int(f_cand/f_hired_c)
-                                    f_eff_text = f"۱:{to_persian_num(raw_f)}"
-                                else: f_eff_text = "-"
-
-                                # 5. ساخت استایل شیشه‌ای (دقیقاً مشابه بقیه کارت‌ها)
-                                gender_html_efficiency = f"""
+        gender_html_total = get_gender_glass_html(funnel.gender_split(), "#3498db")
+        gender_html_unknown = get_gender_glass_html(funnel.gender_split(unknown_status=True), "#7f8c8d")
+
+        if top_interview is not None:
+            gender_html_interview = get_gender_glass_html(funnel.gender_split(unit=top_interview_unit), "#9b59b6")
+        else: gender_html_interview = ""
+
+        gender_html_rejected = get_gender_glass_html(funnel.gender_split(status=REJECTED_STATUS), "#c0392b")
+        gender_html_withdrawal = get_gender_glass_html(funnel.gender_split(status=WITHDRAWN_STATUS), "#e67e22")
+        gender_html_hired = get_gender_glass_html(funnel.gender_split(status=HIRED_STATUS), "#2ecc71")
+
+        # =========================================================
+        # 2. نمایش کارت‌های رنگی (۸ کارت کامل)
+        # =========================================================
+        css_scope("hr-recruitment")
+
+        r1_c1, r1_c2, r1_c3, r1_c4 = st.columns(4)
+        with r1_c1: 
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);"><div class="watermark-icon">📂</div><div class="card-content"><div class="g-title">کل متقاضیان</div><div class="g-value">{total_candidates}</div><div class="g-sub">رزومه‌های دریافتی</div>{gender_html_total}</div></div>""", unsafe_allow_html=True)
+        with r1_c2:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #f5f5f5 0%, #e0e0e0 100%);"><div class="watermark-icon">❓</div><div class="card-content"><div class="g-title">وضعیت نامشخص</div><div class="g-value">{total_unknown}</div><div class="g-sub">در انتظار بررسی</div>{gender_html_unknown}</div></div>""", unsafe_allow_html=True)
+        with r1_c3:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%);"><div class="watermark-icon">📥</div><div class="card-content"><div class="g-title">واحد با بیشترین حجم مصاحبه</div><div class="g-value">{top_interview_count}</div><div class="g-sub">{top_interview_unit}</div>{gender_html_interview}</div></div>""", unsafe_allow_html=True)
+        with r1_c4:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%);"><div class="watermark-icon">🛡️</div><div class="card-content"><div class="g-title">غربالگری اولیه</div><div class="g-value">{total_rejected}</div><div class="g-sub">در مرحله غربالگری</div>{gender_html_rejected}</div></div>""", unsafe_allow_html=True)
+
+        st.markdown("<div style='margin-bottom: 15px;'></div>", unsafe_allow_html=True)
+
+        r2_c1, r2_c2, r2_c3, r2_c4 = st.columns(4)
+        with r2_c1:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%);"><div class="watermark-icon">🏃</div><div class="card-content"><div class="g-title">انصراف داوطلب</div><div class="g-value">{total_withdrawal}</div><div class="g-sub">خروج از فرآیند</div>{gender_html_withdrawal}</div></div>""", unsafe_allow_html=True)
+        with r2_c2:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%);"><div class="watermark-icon">🤝</div><div class="card-content"><div class="g-title">جذب موفق</div><div class="g-value">{total_hired}</div><div class="g-sub">جذب موفق</div>{gender_html_hired}</div></div>""", unsafe_allow_html=True)
+        with r2_c3:
+            st.markdown(f"""<div class="gradient-card" style="background: linear-gradient(135deg, #e0f2f1 0%, #b2dfdb 100%);"><div class="watermark-icon">🏆</div><div class="card-content"><div class="g-title">بیشترین تعداد استخدام موفق</div><div class="g-value">{top_hired_count}</div><div class="g-sub">{top_hired_unit}</div>{gender_html_top_unit}</div></div>""", unsafe_allow_html=True)
+        with r2_c4:
+
+            # 1. تابع محلی تبدیل اعداد به فارسی
+            def to_persian_num(num_str):
+                eng = "0123456789"
+                per = "۰۱۲۳۴۵۶۷۸۹"
+                tr = str.maketrans(eng, per)
+                return str(num_str).translate(tr)
+
+            # 2. شمارش‌ها از همان قیف جذب
+            candidates_local = total_candidates
+            hired_count_local = total_hired
+
+            # 3. محاسبه عدد اصلی کارت (شاخص کل) به فارسی
+            if hired_count_local > 0:
+                raw_main = round(candidates_local / hired_count_local, 1)
+                effort_text_persian = f"۱ : {to_persian_num(raw_main)}"
+            else:
+                effort_text_persian = "---"
+
+            # 4. محاسبه تفکیک جنسیتی (مرد و زن)
+            candidates_split = funnel.gender_split()
+            hired_split = funnel.gender_split(status=HIRED_STATUS)
+            m_cand, f_cand = candidates_split.male, candidates_split.female
+            m_hired_c, f_hired_c = hired_split.male, hired_split.female
+
+            if m_hired_c > 0:
+                raw_m = int(m_cand/m_hired_c)
+                m_eff_text = f"۱:{to_persian_num(raw_m)}" 
+            else: m_eff_text = "-"
+
+            if f_hired_c > 0:
+                raw_f = int(f_cand/f_hired_c)
+                f_eff_text = f"۱:{to_persian_num(raw_f)}"
+            else: f_eff_text = "-"
+
+            # 5. ساخت استایل شیشه‌ای (دقیقاً مشابه بقیه کارت‌ها)
+            gender_html_efficiency = f"""
                                 <div style="background: rgba(255, 255, 255, 0.6); border-radius: 8px; padding: 6px 10px; display: flex; justify-content: space-between; align-items: center; margin-top: auto; font-size: 14px; color: #444; font-weight: 600; backdrop-filter: blur(4px); border: 1px solid rgba(255,255,255,0.4); font-family: 'B Nazanin', Tahoma, sans-serif !important;">
                                     <div style="display:flex; align-items:center;">👨 {m_eff_text}</div>
                                     <div style="width:1px; height:12px; background:#ccc; margin:0 5px;"></div>
                                     <div style="display:flex; align-items:center;">👩 {f_eff_text}</div>
                                 </div>
                                 """
-                                
-                                # 6. نمایش نهایی کارت
-                                st.markdown(f"""
+
+            # 6. نمایش نهایی کارت
+            st.markdown(f"""
                                 <div class="gradient-card" style="background: linear-gradient(135deg, #eceff1 0%, #cfd8dc 100%);">
                                     <div class="watermark-icon">⚖️</div>
                                     <div class="card-content">
@@ -1366,63 +745,30 @@ def show_hr_content():
                                     </div>
                                 </div>
                                 """, unsafe_allow_html=True)
-                            st.markdown("<div style='margin-bottom: 25px;'></div>", unsafe_allow_html=True)
-
-                            # =========================================================
-                            # 🧠 بخش اتاق فکر (استایل آبی، همیشه باز، متن درشت)
-                            # =========================================================
-                            if withdrawal_rate > rejection_rate:
-                                main_insight = "⚠️ **چالش برند کارفرمایی:** نرخ انصراف بیشتر از نرخ رد شدن است. سازمان در «جذب» مشکل ندارد اما در «متقاعدسازی و نگهداشت» کاندیداها چالش دارد."
-                                action_item = "بررسی رقابتی بودن حقوق و مزایا."
-                                sentiment_color = "#fff3cd"
-                            elif rejection_rate > 70:
-                                main_insight = "⚠️ **چالش کانال‌های ورودی:** نرخ رد شدن بسیار بالاست (بیش از ۷۰٪). زمان زیادی صرف مصاحبه با افراد نامرتبط می‌شود."
-                                action_item = "اصلاح شرح شغل در آگهی‌ها + استفاده از فیلترهای اولیه دقیق‌تر."
-                                sentiment_color = "#f8d7da"
-                            else:
-                                main_insight = "✅ **تعادل پایدار:** نسبت‌های جذب، رد و انصراف در وضعیت نرمال و سالمی قرار دارند."
-                                action_item = "حفظ رویه فعلی و تمرکز بر کاهش زمان استخدام."
-                                sentiment_color = "#d4edda"
-
-                            st.markdown("""
-                            <style>
-                                div[data-testid="stExpander"] details > summary {
-                                    background-color: #033270 !important;
-                                    color: white !important;
-                                    border-radius: 10px !important;
-                                    padding: 12px 15px !important;
-                                    border: 1px solid #033270 !important;
-                                    margin-bottom: 0px !important;
-                                }
-                                div[data-testid="stExpander"] details > summary span, 
-                                div[data-testid="stExpander"] details > summary p, 
-                                div[data-testid="stExpander"] details > summary svg {
-                                    color: white !important;
-                                    fill: white !important;
-                                    font-weight: 900 !important;
-                                    font-size: 16px !important;
-                                }
-                                div[data-testid="stExpander"] details > div {
-                                    background-color: #ffffff !important;
-                                    border: 2px solid #033270 !important;
-                                    border-radius: 0 0 10px 10px !important;
-                                    border-top: none !important;
-                                    margin-top: -5px !important;
-                                    padding-top: 15px !important;
-                                }
-                                div[data-testid="stExpander"] details[open] > summary {
-                                    border-bottom-left-radius: 0 !important;
-                                    border-bottom-right-radius: 0 !important;
-                                    border-bottom: 1px solid #033270 !important;
-                                }
-                            </style>
-                            """, unsafe_allow_html=True)
-
-                            with st.expander("🧠اتاق فکر و بینش", expanded=True):
-                                ac1, ac2, ac3 = st.columns([1.5, 1.5, 1])
-                                
-                                with ac1:
-                                    st.markdown(f"""
+        st.markdown("<div style='margin-bottom: 25px;'></div>", unsafe_allow_html=True)
+
+        # =========================================================
+        # 🧠 بخش اتاق فکر (استایل آبی، همیشه باز، متن درشت)
+        # =========================================================
+        if withdrawal_rate > rejection_rate:
+            main_insight = "⚠️ **چالش برند کارفرمایی:** نرخ انصراف بیشتر از نرخ رد شدن است. سازمان در «جذب» مشکل ندارد اما در «متقاعدسازی و نگهداشت» کاندیداها چالش دارد."
+            action_item = "بررسی رقابتی بودن حقوق و مزایا."
+            sentiment_color = "#fff3cd"
+        elif rejection_rate > 70:
+            main_insight = "⚠️ **چالش کانال‌های ورودی:** نرخ رد شدن بسیار بالاست (بیش از ۷۰٪). زمان زیادی صرف مصاحبه با افراد نامرتبط می‌شود."
+            action_item = "اصلاح شرح شغل در آگهی‌ها + استفاده از فیلترهای اولیه دقیق‌تر."
+            sentiment_color = "#f8d7da"
+        else:
+            main_insight = "✅ **تعادل پایدار:** نسبت‌های جذب، رد و انصراف در وضعیت نرمال و سالمی قرار دارند."
+            action_item = "حفظ رویه فعلی و تمرکز بر کاهش زمان استخدام."
+            sentiment_color = "#d4edda"
+
+
+        with st.expander("🧠اتاق فکر و بینش", expanded=True):
+            ac1, ac2, ac3 = st.columns([1.5, 1.5, 1])
+
+            with ac1:
+                st.markdown(f"""
                                     <div style="direction: rtl; text-align: right; height: 100%;">
                                         <h5 style="color: #033270; border-bottom: 2px solid #eee; padding-bottom: 8px; font-weight: 900; font-size: 16px;">📊 تفسیر قیف جذب</h5>
                                         <ul style="font-size: 14px; line-height: 2.4; color: #222; font-weight: bold; margin-top: 10px;">
@@ -1431,9 +777,9 @@ def show_hr_content():
                                             <li>جذابیت سازمان: <b style="color:#f39c12; font-size: 15px;">{withdrawal_rate:.1f}٪</b> از افراد تایید شده، انصراف دادند.</li>
                                         </ul>
                                     </div>""", unsafe_allow_html=True)
-                                
-                                with ac2:
-                                    st.markdown(f"""
+
+            with ac2:
+                st.markdown(f"""
                                     <div style="direction: rtl; text-align: right; height: 100%;">
                                         <h5 style="color: #033270; border-bottom: 2px solid #eee; padding-bottom: 8px; font-weight: 900; font-size: 16px;">💡 تجویز مدیریتی</h5>
                                         <div style="background-color: {sentiment_color}; padding: 12px; border-radius: 8px; font-size: 14px; line-height: 1.8; color: #000; font-weight: bold;">
@@ -1444,9 +790,9 @@ def show_hr_content():
                                             <span style="font-weight: bold; color: #333; font-size: 14px;">{action_item}</span>
                                         </div>
                                     </div>""", unsafe_allow_html=True)
-                                
-                                with ac3:
-                                    st.markdown(f"""
+
+            with ac3:
+                st.markdown(f"""
                                     <div style="text-align: center; display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100%; padding-top: 5px;">
                                         <div style="font-size: 14px; color: #222; margin-bottom: 8px; font-weight: 900;">شاخص کیفیت جذب</div>
                                         <div style="width: 85px; height: 85px; border-radius: 50%; background: conic-gradient(#2ecc71 {health_score}%, #eee 0); display: flex; align-items: center; justify-content: center; box-shadow: 0 4px 10px rgba(0,0,0,0.1);">
@@ -1455,112 +801,71 @@ def show_hr_content():
                                         <div style="font-size: 13px; color: #555; margin-top: 8px; font-weight: bold;">از 100</div>
                                     </div>""", unsafe_allow_html=True)
 
-                            st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
-
-                            # =========================================================
-                            # 4. نمودارها (با استایل باکس کارتی سایه‌دار)
-                            # =========================================================
-
-                            # ✅ استایل باکس‌ها بازگشت به حالت کارتی سایه‌دار و خط جداکننده
-                            st.markdown("""
-                            <style>
-                                .analysis-box {
-                                    background-color: #ffffff;
-                                    border: 1px solid #cfd8dc;
-                                    border-radius: 16px;
-                                    padding: 20px 20px;
-                                    height: 480px !important;
-                                    overflow-y: auto;
-                                    direction: rtl;
-                                    text-align: right;
-                                    /* 👇 سایه و استایل کارتی */
-                                    box-shadow: 0 10px 25px rgba(0,0,0,0.08); 
-                                    border-right: 6px solid #033270;
-                                }
-                                .analysis-title {
-                                    color: #033270;
-                                    font-weight: 900;
-                                    font-size: 1.25rem;
-                                    margin-bottom: 15px;
-                                    /* 👇 خط جداکننده زیر تیتر */
-                                    border-bottom: 2px solid #e0e0e0;
-                                    padding-bottom: 10px;
-                                    font-family: 'B Nazanin';
-                                }
-                                .analysis-content {
-                                    font-size: 16px !important;
-                                    line-height: 1.8 !important;
-                                    color: #333; /* رنگ متن */
-                                    font-family: 'B Nazanin';
-                                    text-align: justify;
-                                }
-                                .analysis-content ul {
-                                    margin-top: 5px; margin-bottom: 5px; padding-right: 20px;
-                                }
-                            </style>
-                            """, unsafe_allow_html=True)
-
-                            # --- ردیف ۱: قیف جذب ---
-                            df_chart_all = pd.DataFrame()
-                            avg_conversion = 0; iph = 0; best_unit = None; worst_unit = None
-                            
-                            if 'واحد' in df_emp.columns:
-                                interview_counts = df_emp['واحد'].value_counts()
-                                if 'تاریخ شروع بکار' in df_emp.columns:
-                                    hired_mask = (df_emp['تاریخ شروع بکار'].notna()) & \
-                                                (~df_emp['تاریخ شروع بکار'].astype(str).str.contains('عدم استخدام|نامشخص', case=False, na=False))
-                                    hired_counts = df_emp.loc[hired_mask, 'واحد'].value_counts()
-                                else: hired_counts = pd.Series()
-                                df_chart_all = pd.DataFrame({'Interview': interview_counts, 'Hired': hired_counts}).fillna(0)
-                                df_chart_all['Hired'] = df_chart_all['Hired'].astype(int)
-                                df_chart_all['Rate'] = (df_chart_all['Hired'] / df_chart_all['Interview'] * 100).fillna(0).round(1)
-                                total_int = df_chart_all['Interview'].sum(); total_h = df_chart_all['Hired'].sum()
-                                avg_conversion = (total_h / total_int * 100) if total_int > 0 else 0
-                                iph = (total_int / total_h) if total_h > 0 else total_int
-                                if not df_chart_all.empty:
-                                    q_df = df_chart_all[df_chart_all['Interview'] >= 3]
-                                    if not q_df.empty:
-                                        best_unit = q_df.sort_values('Rate', ascending=False).iloc[0]
-                                        worst_unit = q_df.sort_values('Rate', ascending=True).iloc[0]
-
-                            c1_right, c1_left = st.columns([2.2, 1])
-                            
-                            with c1_right:
-                                if not df_chart_all.empty:
-                                    df_plot = df_chart_all.sort_values('Interview', ascending=False)
-                                    fig_ov = go.Figure()
-                                    fig_ov.add_trace(go.Bar(
-                                        x=df_plot.index, y=df_plot['Interview'], name='کل متقاضیان',
-                                        marker_color='rgba(189, 195, 199, 0.5)', width=0.75, marker_line_width=0,
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کل متقاضیان</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>واحد</b>: %{x}</span><extra></extra>'
-                                    ))
-                                    fig_ov.add_trace(go.Bar(
-                                        x=df_plot.index, y=df_plot['Hired'], name='جذب موفق',
-                                        marker_color='#033270', width=0.35, text=df_plot['Hired'], textposition='outside',
-                                        textfont=dict(color='black', size=14, weight='bold'), marker_line_width=0,
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>جذب موفق</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>نرخ تبدیل</b>: %{customdata}%</span><extra></extra>',
-                                        customdata=df_plot['Rate']
-                                    ))
-                                    fig_ov.update_layout(
-                                        title={'text': '📊 کارنامه جذب واحدها', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
-                                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
-                                        font=dict(family="B Nazanin", color="black"),
-                                        plot_bgcolor='white', paper_bgcolor='white',
-                                        height=480, barmode='overlay',
-                                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
-                                        xaxis=dict(tickangle=-45, showline=False, showgrid=False, tickfont=dict(color='black', size=14)),
-                                        yaxis=dict(showline=False, showgrid=True, gridcolor='#eee', tickfont=dict(color='black', size=14)),
-                                        legend=dict(orientation="h", y=1.1, x=0, font=dict(color='black', size=14)),
-                                        margin=dict(t=60, b=80, l=40, r=20)
-                                    )
-                                    st.plotly_chart(fig_ov, use_container_width=True)
-                                else: st.info("داده موجود نیست")
-
-                            with c1_left:
-                                if best_unit is not None:
-                                    gap = best_unit['Rate'] - avg_conversion
-                                    eff_status = "مطلوب" if iph < 6 else ("نیازمند بهبود" if iph < 12 else "بحرانی")
-                                    html_1 = f"""
+        st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
+
+        # =========================================================
+        # 4. نمودارها (با استایل باکس کارتی سایه‌دار)
+        # =========================================================
+
+        # --- ردیف ۱: قیف جذب ---
+        df_chart_all = pd.DataFrame()
+        avg_conversion = 0; iph = 0; best_unit = None; worst_unit = None
+
+        # مصاحبه و جذب (بر اساس تاریخ شروع بکار) به تفکیک واحد از قیف جذب
+        interview_counts = funnel.counts_by('unit')
+        hired_counts = funnel.counts_by('unit', started=True)
+        df_chart_all = pd.DataFrame({'Interview': interview_counts, 'Hired': hired_counts}).fillna(0)
+        df_chart_all['Hired'] = df_chart_all['Hired'].astype(int)
+        df_chart_all['Rate'] = (df_chart_all['Hired'] / df_chart_all['Interview'] * 100).fillna(0).round(1)
+        total_int = df_chart_all['Interview'].sum(); total_h = df_chart_all['Hired'].sum()
+        avg_conversion = (total_h / total_int * 100) if total_int > 0 else 0
+        iph = (total_int / total_h) if total_h > 0 else total_int
+        if not df_chart_all.empty:
+            q_df = df_chart_all[df_chart_all['Interview'] >= 3]
+            if not q_df.empty:
+                best_unit = q_df.sort_values('Rate', ascending=False).iloc[0]
+                worst_unit = q_df.sort_values('Rate', ascending=True).iloc[0]
+
+        c1_right, c1_left = st.columns([2.2, 1])
+
+        with c1_right:
+            if not df_chart_all.empty:
+                df_plot = df_chart_all.sort_values('Interview', ascending=False)
+                def build_fig_ov():
+                    fig_ov = go.Figure()
+                    fig_ov.add_trace(go.Bar(
+                        x=df_plot.index, y=df_plot['Interview'], name='کل متقاضیان',
+                        marker_color='rgba(189, 195, 199, 0.5)', width=0.75, marker_line_width=0,
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کل متقاضیان</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>واحد</b>: %{x}</span><extra></extra>'
+                    ))
+                    fig_ov.add_trace(go.Bar(
+                        x=df_plot.index, y=df_plot['Hired'], name='جذب موفق',
+                        marker_color='#033270', width=0.35, text=df_plot['Hired'], textposition='outside',
+                        textfont=dict(color='black', size=14, weight='bold'), marker_line_width=0,
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>جذب موفق</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>نرخ تبدیل</b>: %{customdata}%</span><extra></extra>',
+                        customdata=df_plot['Rate']
+                    ))
+                    fig_ov.update_layout(
+                        title={'text': '📊 کارنامه جذب واحدها', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
+                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
+                        font=dict(family="B Nazanin", color="black"),
+                        plot_bgcolor='white', paper_bgcolor='white',
+                        height=480, barmode='overlay',
+                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
+                        xaxis=dict(tickangle=-45, showline=False, showgrid=False, tickfont=dict(color='black', size=14)),
+                        yaxis=dict(showline=False, showgrid=True, gridcolor='#eee', tickfont=dict(color='black', size=14)),
+                        legend=dict(orientation="h", y=1.1, x=0, font=dict(color='black', size=14)),
+                        margin=dict(t=60, b=80, l=40, r=20)
+                    )
+                    return fig_ov
+                st.plotly_chart(get_cached_figure("recruit_overview", emp_version, (gender_key,), build_fig_ov), use_container_width=True)
+            else: st.info("داده موجود نیست")
+
+        with c1_left:
+            if best_unit is not None:
+                gap = best_unit['Rate'] - avg_conversion
+                eff_status = "مطلوب" if iph < 6 else ("نیازمند بهبود" if iph < 12 else "بحرانی")
+                html_1 = f"""
                                     <div class="analysis-title">🎯 تحلیل نرخ تبدیل مصاحبه به استخدام</div>
                                     <div class="analysis-content">
                                         <ul style="list-style-type:none; padding:0; margin:0 0 10px 0;">
@@ -1576,72 +881,62 @@ def show_hr_content():
                                         </div>
                                     </div>
                                     """
-                                    st.markdown(f'<div class="analysis-box">{html_1}</div>', unsafe_allow_html=True)
-                                else: st.markdown(f'<div class="analysis-box">داده کافی نیست.</div>', unsafe_allow_html=True)
-
-                            st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
-
-                            # --- ردیف ۲: کانال‌های جذب ---
-                            ref_df = pd.DataFrame()
-                            if 'معرف' in df_emp.columns:
-                                df_emp['معرف'] = df_emp['معرف'].fillna('نامشخص').astype(str)
-                                referrer_total = df_emp['معرف'].value_counts()
-                                if 'تاریخ شروع بکار' in df_emp.columns:
-                                    hired_ref = df_emp[
-                                        (df_emp['تاریخ شروع بکار'].notna()) & 
-                                        (~df_emp['تاریخ شروع بکار'].astype(str).str.contains('عدم استخدام|نامشخص', case=False, na=False))
-                                    ]['معرف'].value_counts()
-                                else: hired_ref = pd.Series()
-                                ref_df = pd.DataFrame({'کل معرفی': referrer_total}).reset_index()
-                                ref_df.columns = ['معرف', 'کل معرفی']
-                                ref_df['جذب شده'] = ref_df['معرف'].map(hired_ref).fillna(0)
-                                ref_df['نرخ تبدیل'] = (ref_df['جذب شده'] / ref_df['کل معرفی'] * 100).fillna(0)
-
-                            c2_right, c2_left = st.columns([2.2, 1])
-
-                            with c2_right:
-                                if not ref_df.empty:
-                                    plot_df = ref_df[ref_df['کل معرفی'] > 0].sort_values('جذب شده', ascending=False).head(8)
-                                    fig_ref = go.Figure()
-                                    fig_ref.add_trace(go.Bar(
-                                        x=plot_df['معرف'], y=plot_df['کل معرفی'], name='تعداد ورودی', 
-                                        marker_color='#4FC3F7', text=plot_df['کل معرفی'], textposition='outside',
-                                        textfont=dict(color='black', size=14, weight='bold'), marker_line_width=0,
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد ورودی</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کانال</b>: %{x}</span><extra></extra>'
-                                    ))
-                                    fig_ref.add_trace(go.Scatter(
-                                        x=plot_df['معرف'], y=plot_df['جذب شده'], name='استخدام موفق', 
-                                        mode='lines+markers+text', text=plot_df['جذب شده'], textposition='top center',
-                                        line=dict(color='#0D47A1', width=3), textfont=dict(color='black', size=14, weight='bold'),
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>استخدام موفق</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کانال</b>: %{x}</span><extra></extra>'
-                                    ))
-                                    fig_ref.update_layout(
-                                        title={'text': '💎 عملکرد کانال‌های جذب نیرو', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
-                                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
-                                        font=dict(family="B Nazanin", color="black"),
-                                        plot_bgcolor='white', paper_bgcolor='white',
-                                        height=480,
-                                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
-                                        xaxis=dict(showline=False, showgrid=False, tickfont=dict(color='black', size=14)),
-                                        yaxis=dict(showline=False, showgrid=True, gridcolor='#eee', tickfont=dict(color='black', size=14)),
-                                        legend=dict(orientation="h", y=1.1, x=0, font=dict(color='black', size=14)),
-                                        margin=dict(t=60, b=50, l=40, r=40)
-                                    )
-                                    st.plotly_chart(fig_ref, use_container_width=True)
-                                else: st.info("داده کانال موجود نیست")
-
-                            with c2_left:
-                                if not ref_df.empty:
-                                    top_vol = ref_df.sort_values('کل معرفی', ascending=False).iloc[0]
-                                    top_qual = ref_df[ref_df['کل معرفی'] >= 3].sort_values('نرخ تبدیل', ascending=False).iloc[0] if len(ref_df[ref_df['کل معرفی'] >= 3])>0 else top_vol
-                                    top5 = ref_df[['معرف', 'نرخ تبدیل']].sort_values('نرخ تبدیل', ascending=False).head(5)
-                                    top5_html = "".join([f"<li style='display:flex; justify-content:space-between; border-bottom:1px solid #eee; padding:2px 0;'><span>{r['معرف']}</span><b>{r['نرخ تبدیل']:.0f}%</b></li>" for _,r in top5.iterrows()])
-                                    html_2 = f"""
+                st.markdown(f'<div class="analysis-box">{html_1}</div>', unsafe_allow_html=True)
+            else: st.markdown(f'<div class="analysis-box">داده کافی نیست.</div>', unsafe_allow_html=True)
+
+        st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
+
+        # --- ردیف ۲: کانال‌های جذب ---
+        # آمار هر کانال (افزایشی با دریافت تغییرات) و رتبه‌بندی‌های مرتب‌شده از قبل
+        referrers = get_referrer_stats(emp_entry, gender_key)
+
+        c2_right, c2_left = st.columns([2.2, 1])
+
+        with c2_right:
+            if len(referrers):
+                plot_df = stats_frame(referrers.top_by_hired(8))
+                def build_fig_ref():
+                    fig_ref = go.Figure()
+                    fig_ref.add_trace(go.Bar(
+                        x=plot_df['معرف'], y=plot_df['کل معرفی'], name='تعداد ورودی', 
+                        marker_color='#4FC3F7', text=plot_df['کل معرفی'], textposition='outside',
+                        textfont=dict(color='black', size=14, weight='bold'), marker_line_width=0,
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد ورودی</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کانال</b>: %{x}</span><extra></extra>'
+                    ))
+                    fig_ref.add_trace(go.Scatter(
+                        x=plot_df['معرف'], y=plot_df['جذب شده'], name='استخدام موفق', 
+                        mode='lines+markers+text', text=plot_df['جذب شده'], textposition='top center',
+                        line=dict(color='#0D47A1', width=3), textfont=dict(color='black', size=14, weight='bold'),
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>استخدام موفق</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>کانال</b>: %{x}</span><extra></extra>'
+                    ))
+                    fig_ref.update_layout(
+                        title={'text': '💎 عملکرد کانال‌های جذب نیرو', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
+                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
+                        font=dict(family="B Nazanin", color="black"),
+                        plot_bgcolor='white', paper_bgcolor='white',
+                        height=480,
+                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
+                        xaxis=dict(showline=False, showgrid=False, tickfont=dict(color='black', size=14)),
+                        yaxis=dict(showline=False, showgrid=True, gridcolor='#eee', tickfont=dict(color='black', size=14)),
+                        legend=dict(orientation="h", y=1.1, x=0, font=dict(color='black', size=14)),
+                        margin=dict(t=60, b=50, l=40, r=40)
+                    )
+                    return fig_ref
+                st.plotly_chart(get_cached_figure("recruit_referrers", emp_version, (gender_key,), build_fig_ref), use_container_width=True)
+            else: st.info("داده کانال موجود نیست")
+
+        with c2_left:
+            if len(referrers):
+                top_vol = referrers.top_by_volume(1)[0]
+                top_qual = next(iter(referrers.top_by_conversion(1)), top_vol)
+                top5 = referrers.top_by_conversion(5, min_sample=1)
+                top5_html = "".join([f"<li style='display:flex; justify-content:space-between; border-bottom:1px solid #eee; padding:2px 0;'><span>{r.referrer}</span><b>{r.conversion:.0f}%</b></li>" for r in top5])
+                html_2 = f"""
                                     <div class="analysis-title">📊 تحلیل کانال‌های ورودی</div>
                                     <div class="analysis-content">
                                         <ul style="list-style-type:none; padding:0; margin:0;">
-                                            <li>🔹 <b>منبع حجمی:</b> کانال <b>«{top_vol['معرف']}»</b> با {int(top_vol['کل معرفی'])} رزومه.</li>
-                                            <li>🔸 <b>منبع کیفی:</b> کانال <b>«{top_qual['معرف']}»</b> با نرخ <b>{top_qual['نرخ تبدیل']:.1f}%</b>.</li>
+                                            <li>🔹 <b>منبع حجمی:</b> کانال <b>«{top_vol.referrer}»</b> با {top_vol.total} رزومه.</li>
+                                            <li>🔸 <b>منبع کیفی:</b> کانال <b>«{top_qual.referrer}»</b> با نرخ <b>{top_qual.conversion:.1f}%</b>.</li>
                                         </ul>
                                         <div style="background:#f8f9fa; padding:10px; border-radius:8px; margin-top:10px; color:black;">
                                             <b>🏆 رده‌بندی کیفیت:</b>
@@ -1649,102 +944,97 @@ def show_hr_content():
                                         </div>
                                     </div>
                                     """
-                                    st.markdown(f'<div class="analysis-box">{html_2}</div>', unsafe_allow_html=True)
-                                else: st.markdown(f'<div class="analysis-box">داده کافی نیست.</div>', unsafe_allow_html=True)
-
-                            st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
-
-                            # =========================================================
-                            # داده‌های ریزش (مشترک ردیف ۳ و ۴)
-                            # =========================================================
-                            status_col = df_emp['وضعیت نهایی'] if 'وضعیت نهایی' in df_emp.columns else pd.Series()
-                            churn_mask = status_col.astype(str).str.strip().isin(['رد شد', 'انصراف داد'])
-                            churn_df = df_emp[churn_mask].copy()
-
-                            if len(churn_df) > 0:
-                                if 'علت نپذیرفتن' in churn_df.columns:
-                                    churn_df['علت نپذیرفتن'] = churn_df['علت نپذیرفتن'].fillna('نامشخص')
-                                    churn_df['علت_دسته_بندی_شده'] = churn_df['علت نپذیرفتن'].apply(categorize_rejection_reason)
-                                else: churn_df['علت_دسته_بندی_شده'] = 'نامشخص'
-
-                                # ---------------------------------------------------------
-                                # ردیف ۳: نقشه حرارتی (Heatmap)
-                                # ---------------------------------------------------------
-                                c3_right, c3_left = st.columns([2.2, 1])
-
-                                with c3_right:
-                                    f_col, t_col = st.columns([1, 2])
-                                    with t_col: 
-                                        st.markdown("<h5 style='color:#033270; margin:0;'>توزیع دلایل رد و انصراف در واحدها 🗺️</h5>", unsafe_allow_html=True)
-                                    
-                                    with f_col: 
-                                        selected_view = st.selectbox(
-                                            "سطح نمایش:", 
-                                            ["👁️ نمای کلان (وضعیت)", "📂 علل دسته‌بندی شده", "📝 علل دقیق (با جزئیات)"], 
-                                            key="lvl_select", 
-                                            label_visibility="collapsed"
-                                        )
-                                    
-                                    import textwrap
-                                    if "نمای کلان" in selected_view:
-                                        # رنگ‌ها از گرادینت‌های کارت‌ها گرفته شده‌اند (صورتی/قرمز برای رد، نارنجی/زرد برای انصراف)
-                                        plot_df = churn_df.copy(); y_col = 'وضعیت نهایی'; color_col = 'وضعیت نهایی'; color_scale = None; 
-                                        color_map = {'رد شد': '#f5576c', 'انصراف داد': '#fb8c00'} 
-                                    elif "دسته‌بندی" in selected_view:
-                                        # تغییر رنگ قرمز به بنفش (هماهنگ با کارت‌های بنفش)
-                                        plot_df = churn_df.copy(); y_col = 'علت_دسته_بندی_شده'; color_col = 'تعداد'; color_scale = 'Blues'; color_map = None
-                                    else:
-                                        # تغییر رنگ نارنجی به آبی (هماهنگ با تم اصلی)
-                                        plot_df = churn_df.copy(); y_col = 'علت نپذیرفتن'; color_col = 'تعداد'; color_scale = 'Blues'; color_map = None 
-
-                                    if y_col not in plot_df.columns: plot_df[y_col] = "نامشخص"
-                                    
-                                    chart_data = plot_df.groupby([y_col, 'واحد']).size().reset_index(name='تعداد')
-                                    chart_data['نمایش_محور'] = chart_data[y_col].apply(lambda x: '<br>'.join(textwrap.wrap(str(x), width=35)))
-                                    
-                                    fig_heat = px.scatter(
-                                        chart_data, x='واحد', y='نمایش_محور', size='تعداد', 
-                                        color=color_col, color_continuous_scale=color_scale, color_discrete_map=color_map,
-                                        size_max=45, text='تعداد',
-                                        custom_data=[chart_data[y_col]]
-                                    )
-                                    
-                                    fig_heat.update_traces(
-                                        textposition='top center', cliponaxis=False,
-                                        textfont=dict(family="B Nazanin", size=14, weight="bold", color="black"),
-                                        marker=dict(line=dict(width=0)),
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد</b>: %{text} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>واحد</b>: %{x}</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>علت</b>: %{customdata[0]}</span><extra></extra>'
-                                    )
-                                    
-                                    fig_heat.update_layout(
-                                        font=dict(family="B Nazanin", color="black"),
-                                        plot_bgcolor='white', paper_bgcolor='white',
-                                        height=480,
-                                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
-                                        xaxis=dict(tickangle=-45, showline=False, showgrid=True, gridcolor='#f0f0f0', tickfont=dict(color='black', size=14)),
-                                        yaxis=dict(showline=False, showgrid=True, gridcolor='#f0f0f0', tickfont=dict(color='black', size=16, weight="bold")),
-                                        legend=dict(orientation="h", y=1.1, font=dict(color='black', size=14)),
-                                        margin=dict(t=50, b=80, l=150, r=20)
-                                    )
-                                    st.plotly_chart(fig_heat, use_container_width=True)
-
-                                with c3_left:
-                                    status_str = churn_df['وضعیت نهایی'].astype(str)
-                                    rej_c = len(churn_df[status_str.str.contains('رد', case=False)])
-                                    wdr_c = len(churn_df[status_str.str.contains('انصراف', case=False)])
-                                    tot_c = len(churn_df)
-                                    rr = int((rej_c/tot_c)*100) if tot_c>0 else 0
-                                    wr = int((wdr_c/tot_c)*100) if tot_c>0 else 0
-                                    top_churn_unit = churn_df['واحد'].value_counts().idxmax() if not churn_df.empty else "-"
-
-                                    if wr > rr:
-                                        state_t = "چالش جذابیت"; icon = "⚠️"; color = "#ef6c00"; msg = "انصراف بالاست. شرایط کاری جذاب نیست."
-                                    elif rr > wr:
-                                        state_t = "ورودی نامناسب"; icon = "🚫"; color = "#c62828"; msg = "رد شدن بالاست. فیلتر ورودی دقیق نیست."
-                                    else:
-                                        state_t = "وضعیت متعادل"; icon = "⚖️"; color = "#2e7d32"; msg = "توزیع نرمال است."
-
-                                    html_3 = f"""
+                st.markdown(f'<div class="analysis-box">{html_2}</div>', unsafe_allow_html=True)
+            else: st.markdown(f'<div class="analysis-box">داده کافی نیست.</div>', unsafe_allow_html=True)
+
+        st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
+
+        # =========================================================
+        # داده‌های ریزش (مشترک ردیف ۳ و ۴)
+        # =========================================================
+        # ماتریس‌های ریزش (هر سه سطح نمایش × واحد) برای هر نسخه داده یک بار ساخته شده‌اند
+        churn = get_churn_matrix(emp_entry.data, emp_version)
+        tot_c = churn.total(gender_key)
+
+        if tot_c > 0:
+            # دسته‌بندی علت‌ها یک بار در ETL انجام شده است (ستون علت_دسته_بندی_شده)
+
+            # ---------------------------------------------------------
+            # ردیف ۳: نقشه حرارتی (Heatmap)
+            # ---------------------------------------------------------
+            c3_right, c3_left = st.columns([2.2, 1])
+
+            with c3_right:
+                f_col, t_col = st.columns([1, 2])
+                with t_col: 
+                    st.markdown("<h5 style='color:#033270; margin:0;'>توزیع دلایل رد و انصراف در واحدها 🗺️</h5>", unsafe_allow_html=True)
+
+                with f_col: 
+                    selected_view = st.selectbox(
+                        "سطح نمایش:", 
+                        ["👁️ نمای کلان (وضعیت)", "📂 علل دسته‌بندی شده", "📝 علل دقیق (با جزئیات)"], 
+                        key="lvl_select", 
+                        label_visibility="collapsed"
+                    )
+
+                if "نمای کلان" in selected_view:
+                    # رنگ‌ها از گرادینت‌های کارت‌ها گرفته شده‌اند (صورتی/قرمز برای رد، نارنجی/زرد برای انصراف)
+                    y_col = 'وضعیت نهایی'; color_col = 'وضعیت نهایی'; color_scale = None; 
+                    color_map = {REJECTED_STATUS: '#f5576c', WITHDRAWN_STATUS: '#fb8c00'} 
+                elif "دسته‌بندی" in selected_view:
+                    # تغییر رنگ قرمز به بنفش (هماهنگ با کارت‌های بنفش)
+                    y_col = 'علت_دسته_بندی_شده'; color_col = 'تعداد'; color_scale = 'Blues'; color_map = None
+                else:
+                    # تغییر رنگ نارنجی به آبی (هماهنگ با تم اصلی)
+                    y_col = 'علت نپذیرفتن'; color_col = 'تعداد'; color_scale = 'Blues'; color_map = None 
+
+                def build_fig_heat():
+                    # شمارش‌ها و برچسب‌های شکسته‌شده از قبل در ماتریس ریزش آماده‌اند
+                    chart_data = churn.chart_data(y_col, gender_key)
+
+                    fig_heat = px.scatter(
+                        chart_data, x='واحد', y='نمایش_محور', size='تعداد', 
+                        color=color_col, color_continuous_scale=color_scale, color_discrete_map=color_map,
+                        size_max=45, text='تعداد',
+                        custom_data=[chart_data[y_col]]
+                    )
+
+                    fig_heat.update_traces(
+                        textposition='top center', cliponaxis=False,
+                        textfont=dict(family="B Nazanin", size=14, weight="bold", color="black"),
+                        marker=dict(line=dict(width=0)),
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد</b>: %{text} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>واحد</b>: %{x}</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>علت</b>: %{customdata[0]}</span><extra></extra>'
+                    )
+
+                    fig_heat.update_layout(
+                        font=dict(family="B Nazanin", color="black"),
+                        plot_bgcolor='white', paper_bgcolor='white',
+                        height=480,
+                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
+                        xaxis=dict(tickangle=-45, showline=False, showgrid=True, gridcolor='#f0f0f0', tickfont=dict(color='black', size=14)),
+                        yaxis=dict(showline=False, showgrid=True, gridcolor='#f0f0f0', tickfont=dict(color='black', size=16, weight="bold")),
+                        legend=dict(orientation="h", y=1.1, font=dict(color='black', size=14)),
+                        margin=dict(t=50, b=80, l=150, r=20)
+                    )
+                    return fig_heat
+                st.plotly_chart(get_cached_figure("recruit_churn_heat", emp_version, (gender_key, selected_view), build_fig_heat), use_container_width=True)
+
+            with c3_left:
+                rej_c = churn.count(REJECTED_STATUS, gender_key)
+                wdr_c = churn.count(WITHDRAWN_STATUS, gender_key)
+                rr = int((rej_c/tot_c)*100) if tot_c>0 else 0
+                wr = int((wdr_c/tot_c)*100) if tot_c>0 else 0
+                churn_units = churn.counts_by('واحد', gender_key)
+                top_churn_unit = churn_units.index[0] if len(churn_units) else "-"
+
+                if wr > rr:
+                    state_t = "چالش جذابیت"; icon = "⚠️"; color = "#ef6c00"; msg = "انصراف بالاست. شرایط کاری جذاب نیست."
+                elif rr > wr:
+                    state_t = "ورودی نامناسب"; icon = "🚫"; color = "#c62828"; msg = "رد شدن بالاست. فیلتر ورودی دقیق نیست."
+                else:
+                    state_t = "وضعیت متعادل"; icon = "⚖️"; color = "#2e7d32"; msg = "توزیع نرمال است."
+
+                html_3 = f"""
                                     <div class="analysis-title">⚖️ مقایسه سهم رد صلاحیت و انصراف داوطلب</div>
                                     <div class="analysis-content">
                                         <div style="display:flex; justify-content:space-between; margin-bottom:10px; text-align:center;">
@@ -1763,66 +1053,69 @@ def show_hr_content():
                                         </div>
                                     </div>
                                     """
-                                    st.markdown(f'<div class="analysis-box">{html_3}</div>', unsafe_allow_html=True)
-
-                                st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
-
-                                # ---------------------------------------------------------
-                                # ردیف ۴: پارتو (Pareto)
-                                # ---------------------------------------------------------
-                                c4_right, c4_left = st.columns([2.2, 1])
-
-                                with c4_right:
-                                    pareto_df = churn_df['علت_دسته_بندی_شده'].value_counts().head(5).reset_index()
-                                    pareto_df.columns = ['علت', 'تعداد']
-                                    pareto_df['درصد'] = ((pareto_df['تعداد'] / tot_c) * 100).round(1)
-                                    max_val = pareto_df['تعداد'].max() if not pareto_df.empty else 10
-
-                                    # تعریف طیف رنگی سفارشی: از آبی آسمانی (#90caf9) تا سرمه‌ای سازمانی (#033270)
-                                    fig_par = px.bar(
-                                        pareto_df, 
-                                        x='علت', 
-                                        y='تعداد', 
-                                        text='تعداد', 
-                                        color='تعداد', 
-                                        color_continuous_scale=[(0, "#90caf9"), (1, "#033270")]
-                                    )
-                                    fig_par.update_traces(
-                                        textposition='outside', marker_cornerradius=6, cliponaxis=False,
-                                        textfont=dict(color='black', size=14, weight='bold'),
-                                        marker_line_width=0,
-                                        customdata=pareto_df['درصد'],
-                                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>علت</b>: %{x}</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>سهم</b>: %{customdata}%</span><extra></extra>'
-                                    )
-                                    # افزایش رنج محور عمودی برای جلوگیری از بریدن اعداد بالا
-                                    fig_par.update_layout(
-                                        title={'text': '🛑 فراوانی دلایل شکست در استخدام', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
-                                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
-                                        font=dict(family="B Nazanin", color="black"),
-                                        plot_bgcolor='white', paper_bgcolor='white',
-                                        height=480,
-                                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
-                                        xaxis=dict(tickangle=-45, showline=False, tickfont=dict(color='black', size=14)),
-                                        yaxis=dict(showline=False, showgrid=False, range=[0, max_val * 1.35], tickfont=dict(color='black', size=14)),
-                                        coloraxis_showscale=False,
-                                        margin=dict(t=60, b=100, l=50, r=20)
-                                    )
-                                    st.plotly_chart(fig_par, use_container_width=True)
-
-                                with c4_left:
-                                    if not pareto_df.empty:
-                                        top_cause = pareto_df.iloc[0]
-                                        cause_n = top_cause['علت']; cause_p = top_cause['درصد']
-                                        s_map = {
-                                            'حقوق': "بازنگری پکیج جبران خدمات", 'مسیر': "راه‌اندازی سرویس", 
-                                            'فنی': "سخت‌گیری در غربالگری اولیه", 'ساعت': "شفاف‌سازی شیفت کاری", 
-                                            'محیط': "بهبود برند کارفرمایی", 'عدم تایید': "دقت در انطباق رزومه با JD"
-                                        }
-                                        sol = "مصاحبه خروج دقیق"
-                                        for k,v in s_map.items(): 
-                                            if k in str(cause_n): sol=v; break
-                                        
-                                        html_4 = f"""
+                st.markdown(f'<div class="analysis-box">{html_3}</div>', unsafe_allow_html=True)
+
+            st.markdown("<hr style='margin: 30px 0; opacity: 0.2;'>", unsafe_allow_html=True)
+
+            # ---------------------------------------------------------
+            # ردیف ۴: پارتو (Pareto)
+            # ---------------------------------------------------------
+            c4_right, c4_left = st.columns([2.2, 1])
+
+            with c4_right:
+                reason_counts = churn.counts_by('علت_دسته_بندی_شده', gender_key, view='علت_دسته_بندی_شده')
+                pareto_df = reason_counts.head(5).reset_index()
+                pareto_df.columns = ['علت', 'تعداد']
+                pareto_df['درصد'] = ((pareto_df['تعداد'] / tot_c) * 100).round(1)
+                max_val = pareto_df['تعداد'].max() if not pareto_df.empty else 10
+
+                # تعریف طیف رنگی سفارشی: از آبی آسمانی (#90caf9) تا سرمه‌ای سازمانی (#033270)
+                def build_fig_par():
+                    fig_par = px.bar(
+                        pareto_df, 
+                        x='علت', 
+                        y='تعداد', 
+                        text='تعداد', 
+                        color='تعداد', 
+                        color_continuous_scale=[(0, "#90caf9"), (1, "#033270")]
+                    )
+                    fig_par.update_traces(
+                        textposition='outside', marker_cornerradius=6, cliponaxis=False,
+                        textfont=dict(color='black', size=14, weight='bold'),
+                        marker_line_width=0,
+                        customdata=pareto_df['درصد'],
+                        hovertemplate='<span style="color:black; font-family:B Nazanin; font-size:14px;"><b>تعداد</b>: %{y} نفر</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>علت</b>: %{x}</span><br><span style="color:black; font-family:B Nazanin; font-size:14px;"><b>سهم</b>: %{customdata}%</span><extra></extra>'
+                    )
+                    # افزایش رنج محور عمودی برای جلوگیری از بریدن اعداد بالا
+                    fig_par.update_layout(
+                        title={'text': '🛑 فراوانی دلایل شکست در استخدام', 'y': 0.95, 'x': 1, 'xanchor': 'right', 'xref': 'paper'},
+                        title_font=dict(size=22, family="B Nazanin", color="black", weight="bold"),
+                        font=dict(family="B Nazanin", color="black"),
+                        plot_bgcolor='white', paper_bgcolor='white',
+                        height=480,
+                        hoverlabel=dict(bgcolor="#E3F2FD", bordercolor="#2E86C1", font=dict(color="black", family="B Nazanin", size=14)),
+                        xaxis=dict(tickangle=-45, showline=False, tickfont=dict(color='black', size=14)),
+                        yaxis=dict(showline=False, showgrid=False, range=[0, max_val * 1.35], tickfont=dict(color='black', size=14)),
+                        coloraxis_showscale=False,
+                        margin=dict(t=60, b=100, l=50, r=20)
+                    )
+                    return fig_par
+                st.plotly_chart(get_cached_figure("recruit_pareto", emp_version, (gender_key,), build_fig_par), use_container_width=True)
+
+            with c4_left:
+                if not pareto_df.empty:
+                    top_cause = pareto_df.iloc[0]
+                    cause_n = top_cause['علت']; cause_p = top_cause['درصد']
+                    s_map = {
+                        'حقوق': "بازنگری پکیج جبران خدمات", 'مسیر': "راه‌اندازی سرویس", 
+                        'فنی': "سخت‌گیری در غربالگری اولیه", 'ساعت': "شفاف‌سازی شیفت کاری", 
+                        'محیط': "بهبود برند کارفرمایی", 'عدم تایید': "دقت در انطباق رزومه با JD"
+                    }
+                    sol = "مصاحبه خروج دقیق"
+                    for k,v in s_map.items(): 
+                        if k in str(cause_n): sol=v; break
+
+                    html_4 = f"""
                                         <div class="analysis-title">🩺 عارضه‌یابی ریشه‌ای</div>
                                         <div class="analysis-content">
                                             <div style="background:#fff5f5; border:1px solid #ffcccc; color:#990000; padding:10px; border-radius:8px; margin-bottom:10px;">
@@ -1838,12 +1131,154 @@ def show_hr_content():
                                             </p>
                                         </div>
                                         """
-                                        st.markdown(f'<div class="analysis-box">{html_4}</div>', unsafe_allow_html=True)
-                                    else: st.markdown(f'<div class="analysis-box">داده موجود نیست.</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="analysis-box">{html_4}</div>', unsafe_allow_html=True)
+                else: st.markdown(f'<div class="analysis-box">داده موجود نیست.</div>', unsafe_allow_html=True)
+
+        else: st.success("✨ داده‌ای برای تحلیل ریزش موجود نیست.")
+    else:
+        st.warning("هنوز داده‌ای بارگذاری نشده است. لطفاً دکمه بارگذاری را بزنید.")
+
+
+def show_hr_content():
+   # محاسبه تاریخ و زمان فعلی
+    now = datetime.now()
+    shamsi_now = jdatetime.datetime.fromgregorian(datetime=now)
+    today_date = shamsi_now.strftime('%Y/%m/%d')
+    now_time = shamsi_now.strftime('%H:%M')
+    
+    # ==========================================
+    # 🎨 استایل CSS مدرن برای هدر و دکمه آپدیت (assets/css/hr.css در باندل CSS)
+    # ==========================================
+    css_scope("hr")
+    
+    # محاسبه تاریخ آخرین آپدیت
+    last_update_hr_global = get_sheet_store().last_loaded_at()
+    if last_update_hr_global:
+        shamsi_update = jdatetime.datetime.fromgregorian(datetime=last_update_hr_global)
+        last_update_text = shamsi_update.strftime('%Y/%m/%d - %H:%M')
+    else:
+        last_update_text = "هنوز بروزرسانی نشده"
 
-                            else: st.success("✨ داده‌ای برای تحلیل ریزش موجود نیست.")
-                        else:
-                            st.warning("هنوز داده‌ای بارگذاری نشده است. لطفاً دکمه بارگذاری را بزنید.")
+    # سن نسخه دیسکی (تا وقتی بروزرسانی پس‌زمینه تمام نشده)
+    snapshot_at = get_sheet_store().oldest_snapshot_at()
+    snapshot_text = f"<br>💾 نسخه ذخیره‌شده: {format_age(datetime.now() - snapshot_at)}" if snapshot_at else ""
+    if get_sheet_store().is_refreshing():
+        snapshot_text += "<br>🔄 در حال بروزرسانی..."
+    
+    # 1. رسم باکس پس‌زمینه (لایه زیرین)
+    # ارتفاع 90 پیکسل برای فضای کافی جهت وسط‌چین کردن
+    st.markdown(f"""
+    <div class="header-box" style="margin-bottom: -85px; height: 90px; z-index: 0;">
+        <div class="header-watermark"><i class="fas fa-users"></i></div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 2. ایجاد ستون‌ها روی باکس (لایه رویی)
+    # ساختار ستون‌ها در حالت فارسی (RTL):
+    # [متن (راست)] --- [دکمه (چپ)] --- [فاصله خالی (لبه چپ)]
+    # نسبت‌ها: 6 واحد متن | 1.3 واحد دکمه | 0.3 واحد فاصله خالی (برای هل دادن دکمه به داخل)
+    c_text, c_btn, c_spacer = st.columns([6, 1.3, 0.3])
+    
+    with c_text:
+        # متن تیتر (سمت راست)
+        # padding-top: 25px باعث می‌شود متن دقیقاً وسط باکس 90 پیکسلی قرار گیرد
+        st.markdown("""
+        <div style="padding-right: 20px; padding-top: 10px;">
+            <div class="header-title">👥 مدیریت منابع انسانی</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+    with c_btn:
+        # دکمه (سمت چپ)
+        # فاصله از بالا برای تراز عمودی با باکس
+        st.markdown("<div style='height: 12px;'></div>", unsafe_allow_html=True) 
+        
+        if st.button("🔄 بروزرسانی", use_container_width=True, key="header_update_btn"):
+            # بروزرسانی دلتا در پس‌زمینه؛ تا آماده شدن، همان نسخه فعلی نمایش داده می‌شود
+            # فقط شیت‌هایی که بارگذاری شده‌اند بروز می‌شوند، هر کدام مستقل از بقیه
+            for sheet_name in get_sheet_store().names():
+                refresh_sheet(sheet_name)
+            st.rerun()
+            
+        # نمایش تاریخ زیر دکمه (بزرگتر و خواناتر)
+        st.markdown(f"""
+        <div style='text-align:center; font-size:13px; font-weight:bold; color:#555; margin-top: -9px; text-shadow: 0 1px 0 rgba(255,255,255,0.8);'>
+            {last_update_text} 📅{snapshot_text}
+        </div>
+        """, unsafe_allow_html=True)
+
+    # ستون سوم (c_spacer) خالی می‌ماند تا دکمه به سمت راست (داخل باکس) متمایل شود
+
+    # یک فاصله خالی پایین باکس برای جلوگیری از تداخل
+    st.markdown("<div style='margin-bottom: 50px;'></div>", unsafe_allow_html=True)
+
+
+
+    # 3. مدیریت وضعیت تب فعال
+    if 'hr_active_tab' not in st.session_state:
+        st.session_state.hr_active_tab = "رویدادها"
+    
+    # 3. مدیریت وضعیت تب فعال
+    if 'hr_active_tab' not in st.session_state:
+        st.session_state.hr_active_tab = "رویدادها" # پیش‌فرض
+    # نوار دکمه‌ها
+    b1, b2, b3, b4, b5 = st.columns(5)
+    
+    with b1:
+        type_ = "primary" if st.session_state.hr_active_tab == "رویدادها" else "secondary"
+        if st.button("رویدادها 📅", use_container_width=True, type=type_):
+            st.session_state.hr_active_tab = "رویدادها"
+            st.rerun()
+            
+    with b2:
+        type_ = "primary" if st.session_state.hr_active_tab == "بانک اطلاعات سرمایه انسانی" else "secondary"
+        if st.button(" بانک اطلاعات سرمایه انسانی🗂️", use_container_width=True, type=type_):
+            st.session_state.hr_active_tab = "بانک اطلاعات سرمایه انسانی"
+            st.rerun()
+    with b3:
+        type_ = "primary" if st.session_state.hr_active_tab == "گزارش ماهانه" else "secondary"
+        if st.button("گزارش ماهانه 📊", use_container_width=True, type=type_):
+            st.session_state.hr_active_tab = "گزارش ماهانه"
+            st.rerun()
+            
+    with b4:
+        type_ = "primary" if st.session_state.hr_active_tab == "جذب و استخدام" else "secondary"
+        if st.button("جذب و استخدام 📝", use_container_width=True, type=type_):
+            st.session_state.hr_active_tab = "جذب و استخدام"
+            st.rerun()
+
+    with b5:
+        type_ = "primary" if st.session_state.hr_active_tab == "داشبورد تحلیلی" else "secondary"
+        if st.button("داشبورد تحلیلی 📈", use_container_width=True, type=type_):
+            st.session_state.hr_active_tab = "داشبورد تحلیلی"
+            st.rerun()
+
+    st.markdown("---") 
+
+    # =========================================================
+    # محتوای صفحات (کپی دقیق از کد اصلی شما)
+    # =========================================================
+
+    # بخش ۵: داشبورد تحلیل (شامل تمام نمودارها و تحلیل‌ها)
+    # ---------------------------------------------------------
+    # ---------------------------------------------------------
+    # بخش ۵: داشبورد تحلیل (شامل تمام نمودارها و تحلیل‌ها)
+    # ---------------------------------------------------------
+    if st.session_state.hr_active_tab == "داشبورد تحلیلی":
+        # دریافت همزمان هر سه شیت مورد نیاز داشبورد
+        ensure_data_loaded("monthly", "employee", "personnel")
+        
+        # تب‌های فرعی: فقط تب انتخاب‌شده اجرا می‌شود (on_change="rerun" و بررسی open)؛
+        # تجمیع‌ها و نمودارهای تب دیگر در cache_resource می‌مانند و بازگشت به آن فقط رندر است
+        sub_tab1, sub_tab2 = st.tabs(["👥 تحلیل پرسنل", "📝 تحلیل جذب و استخدام"],
+                                     key="hr_dash_sub_tab", on_change="rerun")
+        
+        with sub_tab1:
+            if sub_tab1.open:
+                show_personnel_dashboard()
+        with sub_tab2:
+            if sub_tab2.open:
+                show_recruitment_dashboard()
     # ---------------------------------------------------------
     # بخش 1: رویدادها
     # ---------------------------------------------------------
@@ -1874,11 +1309,11 @@ def show_hr_content():
         """, unsafe_allow_html=True)
         
         # ✅ شرط اصلی: بررسی وجود داده
-        if st.session_state.personnel_data is not None:
-            df = st.session_state.personnel_data.copy()
+        personnel_entry = get_hr_entry("personnel")
+        if personnel_entry is not None:
+            df = personnel_entry.view()
             
-            # 1. تمیزکاری نام ستون‌ها
-            df.columns = [str(col).strip().replace('ي', 'ی').replace('ك', 'ک') for col in df.columns]
+            # نام ستون‌ها (از جمله زیرگروه/زیر گروه) در ETL طبق sheet_schema یکسان شده‌اند
 
             # 2. فیلترها (با فونت بی نازنین)
             st.markdown("""
@@ -1895,31 +1330,27 @@ def show_hr_content():
             with col_filter2: personnel_code_filter = st.text_input("شماره پرسنلی", key="personnel_code_filter")
             
             with col_filter3:
-                subgroup_col = 'زیر گروه' if 'زیر گروه' in df.columns else ('زیرگروه' if 'زیرگروه' in df.columns else None)
-                if subgroup_col:
-                    all_subgroups = ['همه'] + sorted(df[subgroup_col].dropna().unique().tolist())
-                    subgroup_filter = st.selectbox("زیر گروه", all_subgroups, key="subgroup_filter")
-                else: subgroup_filter = "همه"
+                all_subgroups = ['همه'] + sorted(df['زیر گروه'].dropna().unique().tolist())
+                subgroup_filter = st.selectbox("زیر گروه", all_subgroups, key="subgroup_filter")
             
             with col_filter4:
-                if 'واحد' in df.columns:
-                    if subgroup_filter != "همه" and subgroup_col:
-                        valid_units_df = df[df[subgroup_col] == subgroup_filter]
-                        available_units = ['همه'] + sorted(valid_units_df['واحد'].dropna().unique().tolist())
-                    else:
-                        available_units = ['همه'] + sorted(df['واحد'].dropna().unique().tolist())
-                    unit_filter = st.selectbox("واحد سازمانی", available_units, key="unit_filter")
-                else: unit_filter = "همه"
+                if subgroup_filter != "همه":
+                    valid_units_df = df[df['زیر گروه'] == subgroup_filter]
+                    available_units = ['همه'] + sorted(valid_units_df['واحد'].dropna().unique().tolist())
+                else:
+                    available_units = ['همه'] + sorted(df['واحد'].dropna().unique().tolist())
+                unit_filter = st.selectbox("واحد سازمانی", available_units, key="unit_filter")
             
             # 3. اعمال فیلتر
-            filtered_df = df.copy()
-            if family_filter and 'نام خانوادگی' in df.columns: 
-                filtered_df = filtered_df[filtered_df['نام خانوادگی'].astype(str).str.contains(family_filter, na=False, case=False)]
-            if personnel_code_filter and 'شماره پرسنلی' in df.columns: 
-                filtered_df = filtered_df[filtered_df['شماره پرسنلی'].astype(str).str.contains(personnel_code_filter, na=False)]
-            if subgroup_filter != "همه" and subgroup_col: 
-                filtered_df = filtered_df[filtered_df[subgroup_col] == subgroup_filter]
-            if unit_filter != "همه" and 'واحد' in df.columns: 
+            filtered_df = df
+            if family_filter or personnel_code_filter:
+                # جستجوی زیررشته‌ای از روی ایندکس (به جای str.contains روی کل جدول در هر بار تایپ)
+                search_index = get_personnel_search_index(personnel_entry.data, personnel_entry.cache_key)
+                positions = search_index.search({'نام خانوادگی': family_filter, 'شماره پرسنلی': personnel_code_filter})
+                filtered_df = filtered_df.iloc[positions]
+            if subgroup_filter != "همه": 
+                filtered_df = filtered_df[filtered_df['زیر گروه'] == subgroup_filter]
+            if unit_filter != "همه": 
                 filtered_df = filtered_df[filtered_df['واحد'] == unit_filter]
             
             # 4. انتخاب ستون‌ها
@@ -1936,13 +1367,8 @@ def show_hr_content():
             if final_cols:
                 filtered_df = filtered_df[final_cols]
 
-            # 5. نمایش نهایی (داخل if)
-            st.dataframe(
-                style_dataframe(filtered_df),  # ✅ اعمال استایل آبی ملیح
-                use_container_width=True,
-                height=600,
-                hide_index=True
-            )
+            # 5. نمایش نهایی (داخل if) - فقط صفحه جاری استایل و ارسال می‌شود
+            render_table(filtered_df, key="pb_table", height=600, theme=TABLE_THEME)
         else:
             st.warning("هنوز داده‌ای بارگذاری نشده است.")
    # ---------------------------------------------------------
@@ -1962,46 +1388,40 @@ def show_hr_content():
         """, unsafe_allow_html=True)
         
         # ✅ شرط اصلی: بررسی وجود داده
-        if st.session_state.employee_data is not None:
-            # 1. کپی داده‌ها
-            df_emp = st.session_state.employee_data.copy()
+        df_emp = get_hr_data("employee")
+        if df_emp is not None:
             
             # 2. محاسبات آماری (داخل شرط)
             total_interviewed = len(df_emp)
             
-            if 'تاریخ شروع بکار' in df_emp.columns:
-                hired_df = df_emp[(df_emp['تاریخ شروع بکار'].notna()) & (~df_emp['تاریخ شروع بکار'].astype(str).str.contains('عدم استخدام|نامشخص', case=False, na=False))]
-            else: 
-                hired_df = pd.DataFrame()
+            # پرچم‌های استخدام و نامشخص در ETL ساخته شده‌اند
+            hired_df = df_emp[df_emp[HIRED_FLAG]]
 
             hired_count = len(hired_df)
             hired_percentage = round((hired_count / total_interviewed) * 100, 1) if total_interviewed > 0 else 0
             
             most_interviewed_unit = "نامشخص"; most_interviewed_count = 0; most_interviewed_percentage = 0
-            if 'واحد' in df_emp.columns:
-                unit_counts = df_emp['واحد'].value_counts()
-                if len(unit_counts) > 0:
-                    most_interviewed_unit = unit_counts.index[0]
-                    most_interviewed_count = unit_counts.iloc[0]
-                    if total_interviewed > 0: most_interviewed_percentage = round((most_interviewed_count / total_interviewed) * 100, 1)
+            unit_counts = df_emp['واحد'].value_counts()
+            unit_counts = unit_counts[unit_counts > 0]
+            if len(unit_counts) > 0:
+                most_interviewed_unit = unit_counts.index[0]
+                most_interviewed_count = unit_counts.iloc[0]
+                if total_interviewed > 0: most_interviewed_percentage = round((most_interviewed_count / total_interviewed) * 100, 1)
             
             most_hired_unit = "نامشخص"
-            if not hired_df.empty and 'واحد' in hired_df.columns:
+            if not hired_df.empty:
                 hired_units = hired_df['واحد'].value_counts()
                 if len(hired_units) > 0: most_hired_unit = hired_units.index[0]
             
             gender_percentages = {"مرد": 0, "زن": 0}
-            if not hired_df.empty and 'جنسیت' in hired_df.columns:
+            if not hired_df.empty:
                 gender_counts = hired_df['جنسیت'].value_counts()
                 total_hired_len = len(hired_df)
                 for gender in gender_counts.index:
                     if gender in gender_percentages: gender_percentages[gender] = round((gender_counts[gender] / total_hired_len) * 100, 1)
             
-            undecided_count = 0; undecided_percentage = 0
-            if 'تاریخ شروع بکار' in df_emp.columns:
-                undecided_df = df_emp[df_emp['تاریخ شروع بکار'].astype(str).str.contains('نامشخص', case=False, na=False)]
-                undecided_count = len(undecided_df)
-                if total_interviewed > 0: undecided_percentage = round((undecided_count / total_interviewed) * 100, 1)
+            undecided_count = int(df_emp[UNDECIDED_FLAG].sum())
+            undecided_percentage = round((undecided_count / total_interviewed) * 100, 1) if total_interviewed > 0 else 0
             
             # 3. نمایش کارت‌های آمار
         
@@ -2084,12 +1504,7 @@ def show_hr_content():
                 df_show = df_emp
             
             # 5. نمایش جدول (حتما داخل if باشد تا df_show شناخته شود)
-            st.dataframe(
-                style_dataframe(df_show),  # ✅ اعمال استایل آبی
-                use_container_width=True,
-                height=500,
-                hide_index=True
-            )
+            render_table(df_show, key="emp_table", height=500, theme=TABLE_THEME)
         
         else:
             # اگر داده نبود، این پیام نمایش داده می‌شود
@@ -2109,34 +1524,23 @@ def show_hr_content():
             </div>
         """, unsafe_allow_html=True)
 
-        if st.session_state.monthlylist_data is not None:
-            df = st.session_state.monthlylist_data.copy()
+        render_started = time.perf_counter()
+        monthly_entry = get_hr_entry("monthly")
+        if monthly_entry is not None:
+            df = monthly_entry.view()
             
-            # 1. تمیزکاری نام ستون‌ها
-            df.columns = [str(col).strip().replace('ي', 'ی').replace('ك', 'ک') for col in df.columns]
-
-            # 2. تمیزکاری مقادیر سلول‌ها
-            def clean_all_values(val):
-                if pd.isna(val): return val
-                val = str(val).strip().replace('ي', 'ی').replace('ك', 'ک')
-                if val == "ابان": return "آبان"
-                if val == "اذر": return "آذر"
-                return val
-
-            for col in df.columns:
-                df[col] = df[col].apply(clean_all_values)
+            # نام ستون‌ها و مقادیر (از جمله نام ماه‌ها) در ETL یک بار تمیز شده‌اند؛
+            # جدول مستقیماً از نسخه مشترک و بدون پاس تمیزکاری دوم ساخته می‌شود
+            filter_index, search_index = get_monthly_report_index(monthly_entry.data, monthly_entry.cache_key)
 
             # --- فیلتر هوشمند ماه ---
-            persian_months_order = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور", "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
             sorted_months = []
             default_index = 0
             
-            if 'ماه' in df.columns:
-                unique_months = df['ماه'].dropna().unique().tolist()
-                valid_months = [m for m in unique_months if m in persian_months_order]
-                sorted_months = sorted(valid_months, key=lambda x: persian_months_order.index(x))
-                if sorted_months:
-                    default_index = len(sorted_months)
+            unique_months = filter_index.values['ماه']
+            sorted_months = [m for m in PERSIAN_MONTHS if m in unique_months]
+            if sorted_months:
+                default_index = len(sorted_months)
 
             # 3. فیلترها
             st.markdown("""
@@ -2161,20 +1565,18 @@ def show_hr_content():
             with c2: f_code = st.text_input("شماره پرسنلی", key="sm_cod")
             with c3: f_month = st.selectbox("انتخاب ماه", ['همه'] + sorted_months, index=default_index, key="sm_mon")
             with c4: 
-                units = sorted(df['واحد'].dropna().unique().tolist()) if 'واحد' in df.columns else []
+                units = filter_index.values['واحد']
                 f_unit = st.selectbox("واحد", ['همه'] + units, key="sm_unt")
             with c5:
-                locs = sorted(df['محل خدمت'].dropna().unique().tolist()) if 'محل خدمت' in df.columns else []
+                locs = filter_index.values['محل خدمت']
                 f_loc = st.selectbox("محل خدمت", ['همه'] + locs, key="sm_loc")
 
             # --- اعمال فیلتر ---
-            df_show = df.copy()
-            if f_family and 'نام خانوادگی' in df_show.columns: df_show = df_show[df_show['نام خانوادگی'].astype(str).str.contains(f_family, case=False, na=False)]
-            if f_code and 'شماره پرسنلی' in df_show.columns: df_show = df_show[df_show['شماره پرسنلی'].astype(str).str.contains(f_code, na=False)]
-            
-            if f_month != "همه" and 'ماه' in df_show.columns: df_show = df_show[df_show['ماه'] == f_month]
-            if f_unit != "همه" and 'واحد' in df_show.columns: df_show = df_show[df_show['واحد'] == f_unit]
-            if f_loc != "همه" and 'محل خدمت' in df_show.columns: df_show = df_show[df_show['محل خدمت'] == f_loc]
+            # فیلترهای انتخابی یک جستجوی دیکشنری در ایندکس ترکیبی‌اند و جستجوی متنی
+            # فقط روی همان ردیف‌ها انجام می‌شود؛ هزینه به طول کل تاریخچه بستگی ندارد
+            positions = filter_index.lookup({'ماه': f_month, 'واحد': f_unit, 'محل خدمت': f_loc})
+            positions = search_index.search({'نام خانوادگی': f_family, 'شماره پرسنلی': f_code}, positions)
+            df_show = df.iloc[positions]
             
             # =========================================================
             # ✅✅✅ اعمال ترتیب ستون‌ها قبل از نمایش
@@ -2200,17 +1602,38 @@ def show_hr_content():
 
 
             st.markdown(f"##### تعداد رکورد: {len(df_show)}")
-            # 5. نمایش جدول (با استایل آبی و ستون‌های مرتب شده)
-            st.dataframe(
-                style_dataframe(df_show), 
-                use_container_width=True,
-                height=500,
-                hide_index=True
-            )
+            if st.session_state.get('user_info', {}).get('role') == "admin":
+                st.caption(f"⏱️ آماده‌سازی گزارش: {(time.perf_counter() - render_started) * 1000:.1f} میلی‌ثانیه (بدون پاس تمیزکاری دوم)")
+            # 5. نمایش جدول (با استایل آبی و ستون‌های مرتب شده، صفحه‌بندی‌شده)
+            render_table(df_show, key="sm_table", height=500, theme=TABLE_THEME)
 
 
         else:
             st.info("👈 دکمه دریافت اطلاعات را بزنید.")
+
+    # گزارش مصرف حافظه انبار مشترک (فقط برای مدیر سیستم)
+    if st.session_state.get('user_info', {}).get('role') == "admin":
+        with st.expander("💾 مصرف حافظه داده‌ها"):
+            st.dataframe(get_sheet_store().memory_report(), use_container_width=True, hide_index=True)
+            st.caption(f"نسخه منطق ETL: {ETL_VERSION}")
+            # کنترل کیفیت اتصال لیست ماهانه به بانک پرسنلی (با همان ایندکسی که داشبورد استفاده می‌کند)
+            monthly_entry = get_hr_entry("monthly")
+            personnel_entry = get_hr_entry("personnel")
+            if monthly_entry is not None and personnel_entry is not None and PERSONNEL_KEY in monthly_entry.data.columns:
+                personnel_index = get_personnel_index(personnel_entry.data, personnel_entry.cache_key)
+                missing = personnel_index.unmatched(monthly_entry.data[PERSONNEL_KEY])
+                st.caption(f"شماره‌های پرسنلی بانک پرسنلی: {len(personnel_index):,} | تکراری: {personnel_index.duplicates:,}")
+                if missing:
+                    st.warning(f"⚠️ {len(missing):,} شماره پرسنلی لیست ماهانه در بانک پرسنلی پیدا نشد")
+                    st.dataframe(pd.DataFrame({PERSONNEL_KEY: missing}), use_container_width=True, hide_index=True, height=200)
+                else:
+                    st.caption("✅ همه شماره‌های پرسنلی لیست ماهانه در بانک پرسنلی وجود دارند")
+            # بروزرسانی تکی هر شیت بدون دریافت مجدد بقیه
+            sheet_cols = st.columns(len(HR_SHEETS))
+            for col, sheet_name in zip(sheet_cols, HR_SHEETS.values()):
+                if col.button(f"🔄 {sheet_name}", use_container_width=True, key=f"refresh_sheet_{sheet_name}"):
+                    refresh_sheet(sheet_name)
+                    st.rerun()
     # ---------------------------------------------------------
 def show_production_content():
     st.markdown('<h1>🏭 مدیریت تولید</h1>', unsafe_allow_html=True)
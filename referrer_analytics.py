@@ -0,0 +1,198 @@
+"""
+تحلیل عملکرد کانال‌های جذب (معرف‌ها): تعداد معرفی، استخدام موفق و نرخ تبدیل هر معرف.
+
+خارج از رابط کاربری هم قابل اجراست (مثلاً برای گزارش زمان‌بندی‌شده روی آخرین نسخه ذخیره‌شده شیت جذب):
+    python referrer_analytics.py [تعداد]
+"""
+import sys
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
+
+import pandas as pd
+
+from hr_analytics import ALL, RecruitmentFunnel
+
+# =========================================================
+# 💎 آمار کانال‌های جذب با رتبه‌بندی‌های مرتب و بروزرسانی افزایشی
+# =========================================================
+
+# حداقل تعداد معرفی برای حضور در رتبه‌بندی نرخ تبدیل (کانال‌های کم‌حجم نرخ گمراه‌کننده دارند)
+MIN_SAMPLE = 3
+
+
+@dataclass(frozen=True)
+class ReferrerStat:
+    """آمار یک کانال جذب"""
+    referrer: str
+    total: int = 0
+    hired: int = 0
+
+    @property
+    def conversion(self):
+        return (self.hired / self.total * 100) if self.total > 0 else 0
+
+
+class ReferrerStats:
+    """
+    شمارنده‌های تجمعی هر معرف. add/remove فقط ردیف‌های شمارش جدید یا حذف‌شده را اعمال می‌کنند
+    و سه رتبه‌بندی (حجم، جذب، نرخ تبدیل) همراه شمارنده‌ها به صورت لیست مرتب نگه داشته می‌شوند؛
+    top-k فقط برش ابتدای همان لیست است و کل جدول دوباره مرتب نمی‌شود.
+    """
+
+    RANKINGS = ('total', 'hired', 'conversion')
+
+    def __init__(self):
+        self.totals = Counter()
+        self.hired = Counter()
+        self._ranked = {ranking: [] for ranking in self.RANKINGS}  # لیست‌های (-مقدار، معرف) به ترتیب صعودی
+
+    @classmethod
+    def from_counts(cls, counts):
+        """ساخت از جدول شمارش قیف جذب (ستون‌های referrer، started و n)"""
+        return cls().add(counts)
+
+    def _stat(self, referrer):
+        return ReferrerStat(referrer, self.totals[referrer], self.hired[referrer])
+
+    def _rank_keys(self, referrer):
+        stat = self._stat(referrer)
+        return zip(self.RANKINGS, ((-stat.total, referrer), (-stat.hired, referrer), (-stat.conversion, referrer)))
+
+    def add(self, counts, sign=1):
+        """اعمال چند ردیف شمارش (referrer، started، n)؛ sign=-1 برای حذف"""
+        if counts.empty:
+            return self
+        grouped = counts.assign(hired_n=counts['n'] * counts['started']).groupby('referrer')[['n', 'hired_n']].sum()
+        for referrer, total, hired in zip(grouped.index, grouped['n'], grouped['hired_n']):
+            if referrer in self.totals:
+                for ranking, key in self._rank_keys(referrer):
+                    ranked = self._ranked[ranking]
+                    del ranked[bisect_left(ranked, key)]
+            self.totals[referrer] += sign * int(total)
+            self.hired[referrer] += sign * int(hired)
+            if self.totals[referrer] <= 0:
+                del self.totals[referrer]
+                self.hired.pop(referrer, None)
+                continue
+            for ranking, key in self._rank_keys(referrer):
+                insort(self._ranked[ranking], key)
+        return self
+
+    def remove(self, counts):
+        return self.add(counts, sign=-1)
+
+    def copy(self):
+        clone = ReferrerStats()
+        clone.totals = self.totals.copy()
+        clone.hired = self.hired.copy()
+        clone._ranked = {ranking: list(ranked) for ranking, ranked in self._ranked.items()}
+        return clone
+
+    def __len__(self):
+        return len(self.totals)
+
+    def stats(self):
+        return [self._stat(r) for r in self.totals]
+
+    def _top(self, ranking, k, min_sample=0):
+        referrers = (r for _, r in self._ranked[ranking] if self.totals[r] >= min_sample)
+        return [self._stat(r) for r in islice(referrers, k)]
+
+    def top_by_volume(self, k):
+        return self._top('total', k)
+
+    def top_by_hired(self, k):
+        return self._top('hired', k)
+
+    def top_by_conversion(self, k, min_sample=MIN_SAMPLE):
+        return self._top('conversion', k, min_sample)
+
+    def report(self, k=5):
+        """جدول خلاصه برای گزارش: پرحجم‌ترین‌ها و بهترین نرخ تبدیل (با حداقل نمونه)"""
+        rows = [("حجم", s) for s in self.top_by_volume(k)] + [("نرخ تبدیل", s) for s in self.top_by_conversion(k)]
+        return pd.DataFrame([{
+            'رتبه‌بندی': kind, 'معرف': s.referrer, 'کل معرفی': s.total,
+            'جذب شده': s.hired, 'نرخ تبدیل': round(s.conversion, 1),
+        } for kind, s in rows])
+
+
+def stats_by_gender(counts):
+    """آمار معرف‌ها برای همه متقاضیان (ALL) و هر جنسیت از یک جدول شمارش قیف جذب"""
+    stats = {ALL: ReferrerStats.from_counts(counts)}
+    for gender, group in counts.groupby('gender', sort=False):
+        stats[gender] = ReferrerStats.from_counts(group)
+    return stats
+
+
+class ReferrerStatsTracker:
+    """
+    آمار معرف‌ها به تفکیک جنسیت که با رسیدن ردیف‌های تغییرکرده شیت جذب (apply_sheet_delta)
+    افزایشی بروز می‌شود. آمار به واترمارک شیت گره خورده است: اگر نسخه نمایش‌داده‌شده با آن
+    نخواند (دریافت کامل، ری‌استارت یا ادغام ناموفق)، یک بار از کل شیت دوباره ساخته می‌شود.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.watermark = None
+        self.version = None
+
+    def apply_delta(self, since, watermark, removed, added):
+        """
+        اعمال یک دریافت تغییرات: removed ردیف‌های جایگزین‌شده یا حذف‌شده نسخه قبلی و added ردیف‌های جدید.
+        اگر آمار فعلی مربوط به واترمارک since نباشد کاری انجام نمی‌شود (خروجی False).
+        """
+        with self._lock:
+            if since is None or since != self.watermark:
+                return False
+            for rows, sign in ((removed, -1), (added, 1)):
+                counts = RecruitmentFunnel.build(rows).counts
+                self._stats.setdefault(ALL, ReferrerStats()).add(counts, sign)
+                for gender, group in counts.groupby('gender', sort=False):
+                    self._stats.setdefault(gender, ReferrerStats()).add(group, sign)
+            # تا ثبت نسخه جدید در انبار، نسخه قبلی با این آمار نمی‌خواند
+            self.watermark, self.version = watermark, None
+            return True
+
+    def stats_for(self, employment, version, watermark, gender=ALL):
+        """کپی آمار یک جنسیت برای نسخه version (با واترمارک watermark) شیت جذب"""
+        with self._lock:
+            in_sync = ((watermark is not None and watermark == self.watermark)
+                       or (version is not None and version == self.version))
+            if not in_sync:
+                self._stats = stats_by_gender(RecruitmentFunnel.build(employment).counts)
+            self.watermark, self.version = watermark, version
+            stats = self._stats.get(gender)
+            return stats.copy() if stats is not None else ReferrerStats()
+
+
+def stats_frame(stats):
+    """لیست ReferrerStat به جدول (ستون‌های مورد استفاده در نمودار کانال‌های جذب)"""
+    return pd.DataFrame({
+        'معرف': [s.referrer for s in stats],
+        'کل معرفی': [s.total for s in stats],
+        'جذب شده': [s.hired for s in stats],
+        'نرخ تبدیل': [s.conversion for s in stats],
+    })
+
+
+def latest_referrer_stats():
+    """آمار معرف‌ها از آخرین نسخه شیت جذب ذخیره‌شده روی دیسک (بدون استریم‌لیت)"""
+    from data_store import SnapshotCache
+    from hr_etl import ETL_VERSION
+
+    loaded = SnapshotCache(etl_version=ETL_VERSION).load("employment")
+    if loaded is None:
+        return None
+    df, _ = loaded
+    return ReferrerStats.from_counts(RecruitmentFunnel.build(df).counts)
+
+
+if __name__ == "__main__":
+    stats = latest_referrer_stats()
+    if stats is None:
+        raise SystemExit("نسخه ذخیره‌شده‌ای از شیت جذب (با نسخه ETL فعلی) پیدا نشد")
+    print(stats.report(int(sys.argv[1]) if len(sys.argv) > 1 else 5).to_string(index=False))
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from hr_etl import DIGIT_TRANSLATION, TEXT_TRANSLATION
+
+# =========================================================
+# 🔎 ایندکس‌های جستجو و فیلتر (بانک پرسنلی و گزارش ماهانه)
+# =========================================================
+
+# ستون‌هایی که در بانک پرسنلی و گزارش ماهانه قابل جستجو هستند
+PERSONNEL_SEARCH_COLUMNS = ['نام خانوادگی', 'نام', 'شماره پرسنلی']
+
+# ستون‌های فیلتر انتخابی گزارش ماهانه (ماه ← واحد ← محل خدمت)
+MONTHLY_FILTER_COLUMNS = ['ماه', 'واحد', 'محل خدمت']
+
+# مقدار «بدون فیلتر» در لیست‌های انتخابی
+ALL = "همه"
+
+EMPTY_POSTING = np.empty(0, dtype=np.int64)
+
+# اگر تعداد مقادیر یکتای منطبق بیشتر از این باشد، ردیف‌ها با یک take برداری پیدا می‌شوند
+CSR_KEY_LIMIT = 256
+
+
+def normalize_search_text(text):
+    """یکسان‌سازی متن برای جستجو: همان قواعد ETL (ی/ک، آ، نیم‌فاصله)، ارقام فارسی و حروف کوچک"""
+    return str(text).translate(TEXT_TRANSLATION).translate(DIGIT_TRANSLATION).lower()
+
+
+class NgramIndex:
+    """
+    ایندکس معکوس یک ستون: هر n-gram (از ۱ تا n نویسه) به شماره مقادیر یکتایی که آن را دارند.
+    پرس‌وجوهای کوتاه‌تر از n مستقیماً یک جستجوی دیکشنری هستند؛ برای پرس‌وجوهای بلندتر
+    فهرست‌های n-gram ها اشتراک گرفته و نامزدها با بررسی زیررشته تأیید می‌شوند.
+    نتیجه همان ردیف‌هایی است که astype(str).str.contains(query) (بدون regex) برمی‌گرداند.
+    """
+
+    def __init__(self, values, n=3):
+        self.n = n
+        codes, uniques = pd.factorize(values.astype(str))
+        self.codes = codes
+        self.keys = [normalize_search_text(u) for u in uniques]
+
+        postings = defaultdict(set)
+        for i, key in enumerate(self.keys):
+            for size in range(1, n + 1):
+                for start in range(len(key) - size + 1):
+                    postings[key[start:start + size]].add(i)
+        self.postings = {gram: np.fromiter(sorted(ids), dtype=np.int64, count=len(ids))
+                         for gram, ids in postings.items()}
+
+        # ردیف‌های هر مقدار یکتا (CSR) تا هزینه جستجو متناسب با تعداد نتایج باشد، نه طول جدول
+        self._order = np.argsort(codes, kind='stable')
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(self.keys)))])
+
+    def _matching_keys(self, query):
+        if len(query) <= self.n:
+            return self.postings.get(query, EMPTY_POSTING)
+
+        grams = {query[i:i + self.n] for i in range(len(query) - self.n + 1)}
+        lists = sorted((self.postings.get(g, EMPTY_POSTING) for g in grams), key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return [k for k in candidates if query in self.keys[k]]
+
+    def _hit_mask(self, query):
+        hit = np.zeros(len(self.keys), dtype=bool)
+        hit[self._matching_keys(query)] = True
+        return hit
+
+    def lookup(self, query):
+        """شماره ردیف‌های (مرتب) که مقدارشان query را به صورت زیررشته دارد"""
+        query = normalize_search_text(query).strip()
+        if not query:
+            return np.arange(len(self.codes))
+        keys = self._matching_keys(query)
+        if len(keys) > CSR_KEY_LIMIT:
+            return np.flatnonzero(self._hit_mask(query)[self.codes])
+        if not len(keys):
+            return EMPTY_POSTING
+        return np.sort(np.concatenate([self._order[self._offsets[k]:self._offsets[k + 1]] for k in keys]))
+
+    def filter(self, positions, query):
+        """زیرمجموعه‌ای از positions که با query منطبق است (هزینه متناسب با طول positions)"""
+        query = normalize_search_text(query).strip()
+        if not query:
+            return positions
+        return positions[self._hit_mask(query)[self.codes[positions]]]
+
+
+class SearchIndex:
+    """ایندکس جستجوی چند ستون یک شیت؛ برای هر نسخه داده یک بار ساخته می‌شود"""
+
+    def __init__(self, df, columns):
+        self.size = len(df)
+        self.indexes = {col: NgramIndex(df[col]) for col in columns if col in df.columns}
+
+    def search(self, queries, positions=None):
+        """
+        اشتراک نتایج چند فیلتر {ستون: عبارت}؛ فیلترهای خالی نادیده گرفته می‌شوند.
+        اگر positions داده شود، جستجو فقط روی همان ردیف‌ها انجام می‌شود.
+        خروجی شماره ردیف‌ها (مناسب iloc) به ترتیب اصلی جدول است.
+        """
+        for column, query in queries.items():
+            if not query or column not in self.indexes:
+                continue
+            index = self.indexes[column]
+            positions = index.lookup(query) if positions is None else index.filter(positions, query)
+        return np.arange(self.size) if positions is None else positions
+
+
+class FilterIndex:
+    """
+    ایندکس ترکیبی فیلترهای انتخابی (مثلاً ماه ← واحد ← محل خدمت).
+    برای هر ترکیب از ستون‌های فیلترشده، شماره ردیف‌های هر مقدار از قبل نگه داشته می‌شود؛
+    هر ترکیب فیلتر یک جستجوی دیکشنری است و هزینه‌اش به طول کل تاریخچه بستگی ندارد.
+    """
+
+    def __init__(self, df, columns):
+        self.size = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self.values = {col: sorted(df[col].dropna().unique().tolist()) for col in self.columns}
+        self._groups = {}
+        for r in range(1, len(self.columns) + 1):
+            for fixed in combinations(self.columns, r):
+                indices = df.groupby(list(fixed), observed=True, sort=False).indices
+                self._groups[fixed] = {
+                    (key if isinstance(key, tuple) else (key,)): np.asarray(rows, dtype=np.int64)
+                    for key, rows in indices.items()
+                }
+
+    def lookup(self, selections):
+        """شماره ردیف‌های منطبق با {ستون: مقدار}؛ مقدار «همه» یعنی بدون فیلتر"""
+        fixed = tuple(col for col in self.columns if selections.get(col, ALL) != ALL)
+        if not fixed:
+            return np.arange(self.size)
+        key = tuple(selections[col] for col in fixed)
+        return self._groups[fixed].get(key, EMPTY_POSTING)
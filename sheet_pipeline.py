@@ -0,0 +1,95 @@
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from hr_etl import (PERSIAN_MONTHS, add_jalali_date_parts, add_recruitment_flags, canonicalize_months,
+                    categorize_rejection_series, normalize_personnel_key, normalize_text_series)
+from sheet_schema import SHEET_SCHEMAS
+from sheet_sync import merge_delta, replaced_rows
+
+# =========================================================
+# 🧹 تمیزکاری شیت‌ها (ETL): مشترک بین دریافت کامل و دریافت تغییرات
+# =========================================================
+
+
+def clean_sheet_rows(sheet_name, df):
+    """تمیزکاری ردیف به ردیف یک شیت (برای دریافت کامل و دریافت تغییرات یکسان است)"""
+    schema = SHEET_SCHEMAS[sheet_name]
+
+    # 2. یکسان‌سازی نام ستون‌ها، بررسی ستون‌های الزامی و افزودن ستون‌های پیش‌فرض (یک بار در ETL)
+    df = schema.apply(df)
+
+    # 3. تمیزکاری سلول‌ها (اعمال روی تمام ستون‌های متنی)
+    # این کار باعث می‌شود دیگر نیازی به clean_text در محیط کاربری نباشد
+    object_cols = df.select_dtypes(include=['object', 'string']).columns
+    for col in object_cols:
+        df[col] = normalize_text_series(df[col])
+
+    # استانداردسازی نام ماه‌ها (ابان ← آبان) همین‌جا و فقط یک بار، نه در هر بار نمایش
+    for col in schema.month_columns:
+        if col in df.columns:
+            df[col] = canonicalize_months(df[col])
+
+    # یکسان‌سازی شماره پرسنلی (کلید اتصال شیت‌ها) تا اتصال‌ها بدون تمیزکاری مجدد انجام شوند
+    for col in schema.key_columns:
+        if col in df.columns:
+            df[col] = normalize_personnel_key(df[col])
+
+    # تبدیل یکباره تاریخ‌های شمسی به سال/ماه/روز عددی (فیلترهای دوره‌ای مقایسه عددی می‌شوند)
+    df = add_jalali_date_parts(df, schema.date_columns)
+
+    # 4. عملیات اختصاصی بر اساس نوع شیت (Specific Transformations)
+
+    # الف) اگر شیت استخدام بود: دسته‌بندی دلایل اضافه شود
+    if sheet_name == "employment":
+        df['علت_دسته_بندی_شده'] = categorize_rejection_series(df['علت نپذیرفتن'])
+        # پرچم‌های استخدام/نامشخص/ریزش یک بار اینجا ساخته می‌شوند و صفحه‌ها فقط فیلتر بولی می‌زنند
+        df = add_recruitment_flags(df)
+    return df
+
+
+def sort_sheet_rows(sheet_name, df):
+    """مرتب‌سازی نهایی ردیف‌ها (بعد از هر دریافت کامل یا ادغام تغییرات)"""
+    # ب) اگر شیت کارکرد ماهانه بود: مرتب‌سازی ماه‌ها
+    if sheet_name == "monthlylist":
+        month_order = {name: i for i, name in enumerate(PERSIAN_MONTHS)}
+        df['month_idx'] = df['ماه'].astype(object).map(month_order).fillna(-1)
+        df = df.sort_values('month_idx', ascending=False, kind='stable').drop(columns=['month_idx'])
+    return df
+
+
+def build_sheet(sheet_name, rows):
+    """دریافت کامل: ساخت و تمیزکاری کل شیت از ردیف‌های Apps Script"""
+    # 1. تبدیل به دیتافریم (شیت خالی: جدول بدون ردیف ولی با تمام ستون‌های تعریف‌شده به جای None)
+    df = pd.DataFrame(rows) if rows else SHEET_SCHEMAS[sheet_name].empty_frame()
+    df = clean_sheet_rows(sheet_name, df)
+    df = sort_sheet_rows(sheet_name, df)
+
+    # ج) اگر شیت پرسنل بود: معکوس کردن ستون‌ها (طبق سلیقه شما)
+    if sheet_name == "personnel":
+        df = df[df.columns[::-1]]
+    return df
+
+
+def align_merged_types(merged, base, delta):
+    """
+    نوع ستون در دریافت کامل از همه ردیف‌ها استنباط می‌شود، ولی در دریافت تغییرات فقط از ردیف‌های
+    تغییرکرده (مثلاً «تعداد فرزند» با '' و عدد در کل شیت متنی است ولی ردیف‌های جدید فقط عدد دارند).
+    ستون‌هایی که در نسخه پایه و تغییرات یکی عددی و دیگری متنی است، مثل دریافت کامل متن تمیز می‌شوند.
+    """
+    for col in base.columns.intersection(delta.columns):
+        if is_numeric_dtype(base[col].dtype) != is_numeric_dtype(delta[col].dtype):
+            merged[col] = normalize_text_series(merged[col].astype(object))
+    return merged
+
+
+def apply_sheet_delta(sheet_name, base, rows, deleted=(), on_change=None):
+    """
+    دریافت تغییرات: تمیزکاری فقط ردیف‌های تغییرکرده و ادغام با نسخه قبلی.
+    on_change(removed, added) در صورت وجود با ردیف‌های کنار گذاشته‌شده نسخه قبلی و ردیف‌های جدید
+    (هر دو تمیز شده) صدا زده می‌شود تا آمارهای افزایشی بدون پیمایش کل شیت بروز شوند.
+    """
+    delta = clean_sheet_rows(sheet_name, pd.DataFrame(rows)) if rows else base.iloc[0:0]
+    df = align_merged_types(merge_delta(base, delta, deleted), base, delta)
+    if on_change is not None:
+        on_change(replaced_rows(base, delta, deleted), delta)
+    return sort_sheet_rows(sheet_name, df)
@@ -0,0 +1,144 @@
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+from hr_etl import CHURN_CATEGORY, UNKNOWN_TEXT
+
+# =========================================================
+# 📋 ثبت مرکزی ساختار شیت‌ها (نام استاندارد ستون‌ها، نام‌های جایگزین، نوع و الزامی بودن)
+# =========================================================
+
+# نوع ستون‌ها
+TEXT = 'text'          # متن تمیز شده
+CATEGORY = 'category'  # متن کم‌تنوع که به صورت categorical نگه داشته می‌شود
+JALALI = 'jalali'      # تاریخ شمسی که به سال/ماه/روز عددی تجزیه می‌شود
+MONTH = 'month'        # نام ماه شمسی (استاندارد و categorical)
+KEY = 'key'            # شناسه اتصال شیت‌ها (شماره پرسنلی یکسان‌شده)
+
+HEADER_TRANSLATION = str.maketrans({'ي': 'ی', 'ك': 'ک', '\u200c': ' '})
+
+
+class SheetSchemaError(Exception):
+    """ساختار شیت با ستون‌های الزامی تعریف‌شده سازگار نیست"""
+
+
+def normalize_header(name):
+    """تمیزکاری نام ستون: حذف فاصله اضافه، ی/ک عربی و نیم‌فاصله"""
+    return re.sub(r'\s+', ' ', str(name).translate(HEADER_TRANSLATION)).strip()
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    تعریف یک ستون. اگر default داده شود و ستون در شیت نباشد، با همان مقدار ساخته می‌شود
+    تا صفحه‌ها نیازی به بررسی وجود ستون نداشته باشند.
+    """
+    name: str
+    kind: str = TEXT
+    aliases: tuple = ()
+    required: bool = False
+    default: object = None
+
+
+class SheetSchema:
+    """ساختار یک شیت؛ در ETL یک بار روی هر دریافت اعمال می‌شود"""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = {c.name: c for c in columns}
+        self._aliases = {}
+        for column in columns:
+            for alias in (column.name,) + column.aliases:
+                self._aliases[normalize_header(alias)] = column.name
+
+    def canonical(self, header):
+        """نام استاندارد یک ستون (ستون‌های تعریف‌نشده فقط تمیز می‌شوند)"""
+        header = normalize_header(header)
+        return self._aliases.get(header, header)
+
+    def columns_of(self, kind):
+        return [c.name for c in self.columns.values() if c.kind == kind]
+
+    @property
+    def category_columns(self):
+        return self.columns_of(CATEGORY) + self.columns_of(MONTH)
+
+    @property
+    def month_columns(self):
+        return self.columns_of(MONTH)
+
+    @property
+    def date_columns(self):
+        return self.columns_of(JALALI)
+
+    @property
+    def key_columns(self):
+        return self.columns_of(KEY)
+
+    def empty_frame(self):
+        """جدول بدون ردیف با تمام ستون‌های تعریف‌شده (برای شیت خالی، تا صفحه‌ها به KeyError نخورند)"""
+        return pd.DataFrame({name: pd.Series(dtype=object) for name in self.columns})
+
+    def apply(self, df):
+        """
+        یکسان‌سازی نام ستون‌ها، بررسی ستون‌های الزامی و افزودن ستون‌های پیش‌فرض.
+        اگر دو ستون به یک نام استاندارد برسند، اولی نگه داشته می‌شود.
+        """
+        df.columns = [self.canonical(col) for col in df.columns]
+        if df.columns.has_duplicates:
+            df = df.loc[:, ~df.columns.duplicated()]
+
+        missing = [c.name for c in self.columns.values() if c.required and c.name not in df.columns]
+        if missing and len(df.columns):
+            raise SheetSchemaError(f"ستون‌های الزامی در شیت {self.name} یافت نشد: {'، '.join(missing)}")
+
+        for column in self.columns.values():
+            if column.default is not None and column.name not in df.columns:
+                df[column.name] = column.default
+        return df
+
+
+SHEET_SCHEMAS = {
+    "personnel": SheetSchema("personnel", [
+        Column('شماره پرسنلی', KEY, required=True),
+        Column('نام', default=UNKNOWN_TEXT),
+        Column('نام خانوادگی', default=UNKNOWN_TEXT),
+        Column('واحد', CATEGORY, default=UNKNOWN_TEXT),
+        Column('زیر گروه', CATEGORY, aliases=('زیرگروه',), default=UNKNOWN_TEXT),
+        Column('جنسیت', CATEGORY, default=UNKNOWN_TEXT),
+        Column('محل خدمت', CATEGORY),
+        Column('معرف', CATEGORY),
+        Column('نوع قرارداد', CATEGORY),
+        Column('وضعیت کار', CATEGORY),
+        Column('وضعیت تاهل', CATEGORY),
+        Column('میزان تحصیلات', CATEGORY),
+        Column('وضعیت نظام وظیفه', CATEGORY),
+        Column('تاریخ استخدام', JALALI),
+        Column('تاریخ ترک کار', JALALI),
+    ]),
+    "employment": SheetSchema("employment", [
+        Column('ماه', MONTH),
+        Column('وضعیت نهایی', CATEGORY, required=True),
+        Column('علت نپذیرفتن', default=UNKNOWN_TEXT),
+        Column('علت_دسته_بندی_شده', CATEGORY),
+        Column(CHURN_CATEGORY, CATEGORY),
+        Column('تاریخ شروع بکار'),
+        Column('معرف', CATEGORY, default=UNKNOWN_TEXT),
+        Column('جنسیت', CATEGORY, default=UNKNOWN_TEXT),
+        Column('واحد', CATEGORY, default=UNKNOWN_TEXT),
+        Column('نام و نام خانوادگی'),
+    ]),
+    "monthlylist": SheetSchema("monthlylist", [
+        Column('شماره پرسنلی', KEY, required=True),
+        Column('نام', default=UNKNOWN_TEXT),
+        Column('نام خانوادگی', default=UNKNOWN_TEXT),
+        Column('واحد', CATEGORY, default=UNKNOWN_TEXT),
+        Column('ماه', MONTH, required=True),
+        Column('وضعیت', CATEGORY),
+        Column('محل خدمت', CATEGORY, default=UNKNOWN_TEXT),
+        Column('علت ترک کار', CATEGORY),
+        Column('تاریخ استخدام', JALALI),
+        Column('تاریخ ترک کار', JALALI),
+    ]),
+}
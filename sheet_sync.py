@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+
+import pandas as pd
+import requests
+
+# کلید یکتای هر ردیف (شماره ردیف در شیت) که Apps Script همراه هر ردیف برمی‌گرداند
+ROW_KEY = '_row'
+
+
+class SheetSyncError(Exception):
+    """خطای دریافت اطلاعات از Apps Script"""
+
+
+@dataclass
+class SheetPayload:
+    """
+    پاسخ Apps Script برای یک شیت.
+    is_delta=True یعنی فقط ردیف‌های تغییرکرده بعد از واترمارک ارسال شده‌اند.
+    """
+    rows: list
+    watermark: str = None
+    deleted: list = field(default_factory=list)
+    is_delta: bool = False
+
+
+def fetch_sheet_payload(script_url, sheet_name, since=None, timeout=15):
+    """
+    دریافت یک شیت از Apps Script.
+
+    قرارداد حالت دلتا: با پارامتر since (آخرین واترمارک) اسکریپت پاسخ
+    {"rows": [...], "watermark": "...", "deleted": [...], "full": false} برمی‌گرداند.
+    اسکریپت قدیمی که since را نمی‌شناسد لیست کامل ردیف‌ها را برمی‌گرداند
+    و همان به عنوان دریافت کامل در نظر گرفته می‌شود.
+    """
+    params = {'sheet': sheet_name}
+    if since is not None:
+        params['since'] = since
+
+    response = requests.get(script_url, params=params, timeout=timeout)
+    if response.status_code != 200:
+        raise SheetSyncError(f"خطا در اتصال: {response.status_code}")
+
+    data = response.json()
+    if isinstance(data, dict) and 'error' in data:
+        raise SheetSyncError(f"خطا: {data['error']}")
+
+    if isinstance(data, dict) and 'rows' in data:
+        return SheetPayload(
+            rows=data.get('rows') or [],
+            watermark=data.get('watermark'),
+            deleted=data.get('deleted') or [],
+            is_delta=since is not None and not data.get('full', False),
+        )
+
+    # نسخه قدیمی اسکریپت: کل شیت به صورت لیست ردیف‌ها
+    return SheetPayload(rows=data or [])
+
+
+def _drop_keys(delta, deleted):
+    drop_keys = set(deleted)
+    if not delta.empty:
+        drop_keys.update(delta[ROW_KEY].tolist())
+    return drop_keys
+
+
+def replaced_rows(base, delta, deleted=()):
+    """ردیف‌هایی از نسخه قبلی که با ادغام تغییرات جایگزین یا حذف می‌شوند"""
+    return base[base[ROW_KEY].isin(_drop_keys(delta, deleted))]
+
+
+def merge_delta(base, delta, deleted=()):
+    """
+    ادغام ردیف‌های تغییرکرده (که قبلاً تمیز شده‌اند) با نسخه قبلی شیت.
+    ردیف‌های هم‌کلید جایگزین، ردیف‌های جدید اضافه و ردیف‌های حذف‌شده کنار گذاشته می‌شوند.
+    """
+    if ROW_KEY not in base.columns or (not delta.empty and ROW_KEY not in delta.columns):
+        raise SheetSyncError(f"ستون {ROW_KEY} برای ادغام تغییرات وجود ندارد")
+
+    kept = base[~base[ROW_KEY].isin(_drop_keys(delta, deleted))]
+    if delta.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, delta], ignore_index=True)
@@ -1,522 +1,175 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+
 import streamlit as st
 from datetime import datetime
 import jdatetime
 
-def load_login_css():
-    """استایل‌های مخصوص صفحه ورود"""
-    st.markdown("""
-    <style>
-        /* لود کردن فونت بی نازنین از سرور */
-        @import url('https://cdn.jsdelivr.net/gh/rastikerdar/b-nazanin-font/dist/font-face.css');
-
-        /* اعمال روی کل صفحه */
-        html, body, .stApp {
-            font-family: 'B Nazanin', Tahoma, sans-serif !important;
-        }
-        
-        /* اعمال روی تمام متون، دکمه‌ها و ورودی‌ها */
-        * {
-            font-family: 'B Nazanin', Tahoma, sans-serif !important;
-        }
+# =========================================================
+# 🎨 باندل CSS: فایل‌های assets/css یک بار به یک فایل فشرده با هش محتوا تبدیل می‌شوند و از
+# /app/static سرو می‌شوند؛ مرورگر آن را کش می‌کند و در هر اجرا فقط یک تگ <link> ارسال می‌شود
+# =========================================================
+
+APP_DIR = Path(__file__).resolve().parent
+CSS_SOURCE_DIR = APP_DIR / "assets" / "css"
+STATIC_DIR = APP_DIR / "static"  # پوشه‌ای که استریم‌لیت با server.enableStaticServing سرو می‌کند
+BUNDLE_PREFIX = "bundle."
+
+# (scope، فایل) به ترتیب cascade (همان ترتیب قبلی بلاک‌های <style> در صفحه)
+CSS_SOURCES = [
+    ("login", "login.css"),                    # صفحه ورود
+    ("dashboard", "dashboard.css"),            # همه صفحات داخلی
+    ("home", "home.css"),
+    ("hr", "hr.css"),
+    ("hr-personnel", "hr_personnel.css"),      # زیرتب تحلیل پرسنل
+    ("hr-recruitment", "hr_recruitment.css"),  # زیرتب تحلیل جذب و استخدام
+]
+
+# هر scope فقط وقتی فعال است که نشانگر آن (یک div خالی با این کلاس) در صفحه باشد
+SCOPE_CLASS = "css-scope-"
+
+
+def minify_css(css):
+    """حذف توضیحات و فاصله‌های اضافه"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css).replace(' !important', '!important')
+    return css.replace(';}', '}').strip()
+
+
+def _statements(css):
+    """دستورهای سطح بالای CSS فشرده: (prelude، بدنه) و برای @import بدنه None است"""
+    i = 0
+    while i < len(css):
+        brace, semi = css.find('{', i), css.find(';', i)
+        if brace == -1 or (semi != -1 and semi < brace):
+            if semi == -1:
+                return
+            yield css[i:semi], None
+            i = semi + 1
+            continue
+        depth = 0
+        for j in range(brace, len(css)):
+            depth += {'{': 1, '}': -1}.get(css[j], 0)
+            if depth == 0:
+                break
+        yield css[i:brace], css[brace + 1:j]
+        i = j + 1
+
+
+def _split_selectors(prelude):
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(prelude):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(prelude[start:i])
+            start = i + 1
+    return parts + [prelude[start:]]
+
+
+def _scope_selector(selector, scope):
+    """
+    محدود کردن سلکتور به صفحاتی که نشانگر scope را دارند. :where وزن (specificity) ندارد،
+    پس اولویت قواعد همان قبلی می‌ماند و فقط ترتیب فایل‌ها تعیین‌کننده است.
+    """
+    guard = f":has(.{SCOPE_CLASS}{scope})"
+    for root in ('html', 'body'):
+        if re.match(rf'{root}\b', selector):
+            return f"{root}:where({guard}){selector[len(root):]}"
+    return f":where(body{guard}) {selector}"
+
+
+def scope_css(css, scope):
+    """(لیست @import ها، قواعد محدودشده به scope)؛ @keyframes و @font-face سراسری می‌مانند"""
+    imports, rules = [], []
+    for prelude, body in _statements(css):
+        if body is None:
+            if prelude.startswith('@import'):
+                imports.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports')):
+            rules.append(f"{prelude}{{{scope_css(body, scope)[1]}}}")
+        elif prelude.startswith('@'):
+            rules.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = ','.join(_scope_selector(sel.strip(), scope) for sel in _split_selectors(prelude))
+            rules.append(f"{selectors}{{{body}}}")
+    return imports, ''.join(rules)
+
+
+def build_css_bundle():
+    """
+    ادغام و فشرده‌سازی همه فایل‌های CSS.
+    خروجی (نام فایل با هش محتوا، متن باندل، @import ها، قواعد هر scope به تفکیک)
+    """
+    imports, parts = [], {}
+    for scope, filename in CSS_SOURCES:
+        file_imports, rules = scope_css(minify_css((CSS_SOURCE_DIR / filename).read_text(encoding="utf-8")), scope)
+        imports += [item for item in file_imports if item not in imports]
+        parts[scope] = rules
+    # @import فقط در ابتدای فایل معتبر است
+    css = ''.join(imports) + ''.join(parts.values())
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return f"{BUNDLE_PREFIX}{digest}.css", css, ''.join(imports), parts
+
+
+@st.cache_resource(show_spinner=False)
+def get_css_bundle():
+    """باندل یک بار در هر پردازش ساخته و در static/ نوشته می‌شود؛ خروجی (آدرس، @import ها، قواعد هر scope)"""
+    name, css, imports, parts = build_css_bundle()
+    STATIC_DIR.mkdir(exist_ok=True)
+    path = STATIC_DIR / name
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(css, encoding="utf-8")
+        os.replace(tmp, path)
+    for old in STATIC_DIR.glob(f"{BUNDLE_PREFIX}*.css"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return f"app/static/{name}", imports, parts
+
+
+def _scope_tags(scopes, parts):
+    """
+    نشانگر scope ها؛ بدون سرو استاتیک، قواعد همان scope ها هم درون صفحه می‌آیند
+    (فقط بخش‌هایی از باندل که صفحه جاری استفاده می‌کند، نه کل باندل)
+    """
+    markers = ''.join(f'<div class="{SCOPE_CLASS}{scope}"></div>' for scope in scopes)
+    if st.get_option("server.enableStaticServing"):
+        return markers
+    return f"<style>{''.join(parts[scope] for scope in scopes)}</style>" + markers
+
+
+def inject_css(*scopes):
+    """تگ <link> باندل به همراه نشانگر scope ها"""
+    href, imports, parts = get_css_bundle()
+    if st.get_option("server.enableStaticServing"):
+        tag = f'<link rel="stylesheet" href="{href}">'
+    else:
+        tag = f"<style>{imports}</style>" if imports else ""
+    st.markdown(tag + _scope_tags(scopes, parts), unsafe_allow_html=True)
+
+
+def css_scope(scope):
+    """فعال کردن قواعد یک صفحه یا زیرتب از باندل"""
+    _, _, parts = get_css_bundle()
+    st.markdown(_scope_tags([scope], parts), unsafe_allow_html=True)
 
-        header[data-testid="stHeader"] {
-            display: none;
-        }
-        
-        .block-container {
-            padding-top: 0;
-            padding-bottom: 0;
-            max-width: 100%;
-            height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            overflow: hidden;
-        }
-        
-        [data-testid="InputInstructions"] {
-            display: none !important;
-        }
-        
-        [data-testid="stForm"] {
-            background-color: #033270;
-            padding: 3rem;
-            border-radius: 20px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-            border: none;
-            width: 100%;
-            max-width: 400px;
-            margin: auto;
-        }
-        
-        [data-testid="stForm"] h2 {
-            color: white;
-            text-align: center;
-            font-size: 2rem;
-            margin-left: 1rem;
-            margin-bottom: 1.5rem;
-            font-weight: 700;
-        }
-        /* استایل لیبل‌ها (نام کاربری و رمز عبور) */
-        .stTextInput label {
-            color: white !important;
-            margin-bottom: 8px;
-            font-size: 1rem;
-            text-align: right;
-            width: 100%;
-            direction: rtl;
-        }
-        /* 👇👇👇 تغییرات اصلی برای راست‌چین کردن متن و چپ‌چین کردن آیکون 👇👇👇 */
-        
-        /* 1. راست‌چین کردن متن داخل اینپوت */
-       /* 1. راست‌چین کردن متن داخل کادر */
-        .stTextInput input {
-            text-align: right !important;
-            direction: rtl !important;
-            padding-right: 10px !important;
-        }
 
-        /* 2. راست‌چین کردن آیکون چشم (حالت عادی) */
-        div[data-baseweb="input"] {
-            flex-direction: row !important; 
-        }
+def load_login_css():
+    """استایل‌های مخصوص صفحه ورود"""
+    inject_css("login")
 
-        /* 3. تنظیم فاصله آیکون چشم در سمت راست */
-        div[data-baseweb="input"] > button {
-            margin-left: auto !important;   /* فاصله از سمت چپ */
-            margin-right: 0 !important;     /* چسبیدن به راست */
-            padding-right: 0 !important;
-            padding-left: 10px !important;  /* فاصله بین متن و چشم */
-        }
-        .stTextInput input {
-            color: #333;
-            background-color: white;
-            border-radius: 8px;
-            padding: 10px;
-            text-align: center;
-            font-size: 1.1rem;
-        }
-        
-        [data-testid="stFormSubmitButton"] button {
-            background-color: #2ecc71;
-            color: white;
-            border: none;
-            padding: 10px 0;
-            margin-top: 15px;
-            font-size: 1.2rem;
-            border-radius: 8px;
-            width: 100%;
-            transition: 0.3s;
-        }
-        
-        [data-testid="stFormSubmitButton"] button:hover {
-            background-color: #27ae60;
-            box-shadow: 0 5px 15px rgba(46, 204, 113, 0.4);
-        }
-    </style>
-    """, unsafe_allow_html=True)
 
 def load_dashboard_css():
     """استایل‌های مخصوص صفحات داخلی (داشبورد)"""
-    st.markdown("""
-    <style>
-        @import url('https://cdn.jsdelivr.net/gh/rastikerdar/b-nazanin-font/dist/font-face.css');
-        @import url('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css');
-
-        html, body, .stApp {
-        /* B Nazanin اضافه شد */
-        font-family: 'B Nazanin', 'Vazirmatn', sans-serif !important; 
-        direction: rtl;
-        text-align: right;
-        background-color: #ffffff;
-        overflow: auto;
-        color: #000000;
-    }
-
-        p, span, div, label {
-            color: #000000;
-        }
-        
-        h1, h2, h3, h4, h5, h6 {
-            color: #000000;
-            text-align: right;
-            direction: rtl;
-        }
-        
-        h1 {
-            margin-top: 5px;
-            padding-top: 5px;
-            margin-bottom: 10px;
-        }
-        
-        h2, h3, h4, h5, h6 {
-            margin-top: 10px;
-            padding-top: 5px;
-        }
-
-        .stMarkdown, .stText {
-            color: #000000;
-            text-align: right;
-        }
-
-        header[data-testid="stHeader"] {
-            display: none;
-        }
-
-        .block-container {
-            padding-top: 90px !important;
-            padding-bottom: 2rem !important;
-            max-width: 100% !important;
-            padding-left: 2rem !important;
-            padding-right: 2rem !important;
-        }
-
-        .custom-navbar {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 50px;
-            background: linear-gradient(135deg, #033270 0%, #0455a8 100%);
-            z-index: 999999;
-            display: flex;
-            align-items: center;
-            justify-content: flex-start;
-            padding: 0 80px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.15);
-        }
-
-        .nav-right {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-            flex-direction: row;
-            width: 100%;
-            justify-content: space-between;
-        }
-        
-        .nav-items-left {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-        }
-        
-        .nav-items-right {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-        }
-
-        .nav-item, .logout-item {
-            color: white !important;
-            padding: 8px 18px;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            font-size: 0.95rem;
-            font-weight: 500;
-            text-decoration: none !important;
-            background: transparent;
-            white-space: nowrap;
-            display: inline-block;
-            border: 2px solid transparent;
-        }
-        
-        .nav-item.disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-        }
-
-        .nav-item:hover:not(.disabled) {
-            background: rgba(255,255,255,0.15);
-            border: 2px solid rgba(255,255,255,0.3);
-        }
-
-        .nav-item.active {
-            background: rgba(46,204,113,0.3);
-            border: 2px solid #2ecc71;
-        }
-
-        .logout-item {
-            background: rgba(231, 76, 60, 0.3);
-            border: 2px solid rgba(231, 76, 60, 0.5);
-        }
-
-        .logout-item:hover {
-            background: rgba(231, 76, 60, 0.5);
-            border: 2px solid rgba(231, 76, 60, 0.8);
-        }
-
-        pre, code {
-            display: none !important;
-        }
-        
-        [data-testid="stCode"] {
-            display: none !important;
-        }
-
-        .stButton button {
-            background-color: #014fb5;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            padding: 8px 20px;
-            font-size: 0.9rem;
-            transition: all 0.3s;
-        }
-
-        .stButton button:hover {
-            background-color: #0455a8;
-            box-shadow: 0 4px 12px rgba(3,50,112,0.3);
-        }
-
-        .dashboard-card {
-            background: white;
-            padding: 25px;
-            border-radius: 12px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-            margin-bottom: 20px;
-            transition: transform 0.3s;
-        }
-
-        .dashboard-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 25px rgba(0,0,0,0.12);
-        }
-
-       /* ------------------------------------------------------- */
-        /* استایل جدول (فقط تنظیم فونت - رنگ را به پایتون می‌سپاریم) */
-        /* ------------------------------------------------------- */
-        div[data-testid="stDataFrame"] {
-            width: 100%;
-            font-family: 'B Nazanin', Tahoma, sans-serif !important;
-        }
-
-        /* اجبار فونت روی هدر و سلول‌ها */
-        div[data-testid="stDataFrame"] * {
-            font-family: 'B Nazanin', Tahoma, sans-serif !important;
-        }
-        
-        /* حذف بوردر پیش‌فرض */
-        div[data-testid="stDataFrame"] > div {
-            border: none !important;
-        }
-        
-        div[data-testid="stElementToolbar"] {
-            display: block !important;
-            visibility: visible !important;
-            opacity: 1 !important;
-            background-color: #033270 !important;
-            border-radius: 5px;
-            padding: 4px;
-        }
-        
-        div[data-testid="stElementToolbar"] button {
-            color: white !important;
-            background-color: transparent !important;
-        }
-        
-        div[data-testid="stElementToolbar"] button:hover {
-            background-color: rgba(255,255,255,0.1) !important;
-        }
-
-        div[data-testid="stElementToolbar"] button:nth-child(1),
-        div[data-testid="stElementToolbar"] button:nth-child(2) {
-            display: none !important;
-        }
-        
-        div[data-testid="stElementToolbar"] button:nth-child(3) {
-            display: block !important;
-        }
-
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 8px;
-        }
-
-        .stTabs [data-baseweb="tab"] {
-            background-color: #f0f0f0;
-            border-radius: 8px 8px 0 0;
-            padding: 10px 20px;
-            color: #333;
-        }
-        /* 1. تب انتخاب شده (Selected): سرمه‌ای با متن سفید */
-        .stTabs [aria-selected="true"] {
-            background-color: #033270 !important;
-            border-radius: 8px 8px 0 0 !important;
-            border: none !important;
-            box-shadow: 0 -2px 5px rgba(0,0,0,0.1);
-        }
-        /* سفید کردن متن داخل تب انتخاب شده */
-        .stTabs [aria-selected="true"] p {
-            color: #ffffff !important;
-            font-weight: 900 !important;
-        }
-
-        /* 2. تب انتخاب نشده (Unselected): آبی روشن با متن سرمه‌ای */
-        .stTabs [aria-selected="false"] {
-            background-color: #E3F2FD !important; /* همان رنگ دکمه‌های ثانویه */
-            border-radius: 8px 8px 0 0 !important;
-            border: 1px solid #E2E8F0 !important;
-            border-bottom: none !important;
-            margin-left: 2px !important; /* فاصله ریز بین تب‌ها */
-            transition: all 0.3s ease;
-        }
-        /* سرمه‌ای کردن متن داخل تب انتخاب نشده */
-        .stTabs [aria-selected="false"] p {
-            color: #033270 !important;
-            font-weight: 600 !important;
-        }
-
-        /* 3. هاور روی تب انتخاب نشده (وقتی موس میره روش) */
-        .stTabs [aria-selected="false"]:hover {
-            background-color: #BFDBFE !important; /* آبی کمی تیره‌تر */
-            color: #033270 !important;
-        }
-        .stTabs [aria-selected="false"]:hover p {
-            color: #033270 !important;
-        }
-        
-        /* حذف خط قرمز پیش‌فرض بالای تب‌های استریم‌لیت */
-        .stTabs [data-baseweb="tab-highlight"] {
-            background-color: transparent !important;
-        }
-        /* کاهش ارتفاع کارت‌های استخدام - با فونت درشت‌تر */
-        .stat-card {
-            padding: 15px !important;
-            min-height: auto !important;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 12px;
-            color: white;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            transition: all 0.3s;
-            text-align: center;
-        }
-        
-        .stat-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-        }
-        
-        /* عنوان کارت */
-        .stat-card h3 {
-            color: #000000 !important;
-            font-size: 1.1rem !important; /* افزایش سایز فونت عنوان */
-            margin-bottom: 8px !important;
-            font-weight: 700 !important;
-        }
-        
-        /* عدد اصلی وسط کارت */
-        .stat-card .stat-number {
-            font-size: 2.2rem !important; /* افزایش سایز فونت عدد */
-            font-weight: 800;
-            margin: 8px 0 !important;
-            line-height: 1.2 !important;
-        }
-        
-        /* متن توضیحات پایین کارت */
-        .stat-card .stat-label {
-            color: #000000 !important;      /* رنگ مشکی مطلق */
-            font-size: 1rem !important;     /* کمی درشت‌تر برای دیده شدن بهتر */
-            opacity: 1 !important;
-            font-weight: 300 !important;    /* 👈 ضخامت حداکثری فونت */
-            text-shadow: 0px 0px 1px #000000; /* 👈 ترفند سایه برای پررنگ‌تر دیده شدن */
-            margin-top: 5px !important;
-        }
-        
-        /* استایل فیلترهای پرسنل - باکس‌های نام خانوادگی و شماره پرسنلی */
-        .stTextInput input {
-            background-color: #ffffff !important;
-            color: #212529 !important;
-            border: 1px solid #ced4da !important;
-            border-radius: 6px !important;
-            padding: 8px 12px !important;
-            font-size: 0.9rem !important;
-            text-align: right !important;
-        }
-        
-        .stTextInput input:focus {
-            background-color: #ffffff !important;
-            border-color: #033270 !important;
-            outline: none !important;
-            box-shadow: 0 0 0 0.2rem rgba(3, 50, 112, 0.15) !important;
-        }
-        
-        .stTextInput input::placeholder {
-            color: transparent !important;
-        }
-        
-        .stTextInput label {
-            color: #212529 !important;
-            font-weight: 500 !important;
-            font-size: 0.9rem !important;
-            margin-bottom: 5px !important;
-        }
-        
-        /* حذف پیام "Press Enter to apply" */
-        [data-testid="InputInstructions"] {
-            display: none !important;
-        }
-        
-        /* استایل فیلترهای لیستی (واحد و زیرگروه) */
-        .stSelectbox > div > div {
-            background-color: #f8f9fa !important;
-            color: #212529 !important;
-            border: 1px solid #ced4da !important;
-            border-radius: 6px !important;
-            /* کاهش پدینگ برای نمایش متن بیشتر */
-            padding: 0px 8px !important; 
-            /* تنظیم ارتفاع ثابت برای هماهنگی با اینپوت‌های کناری */
-            min-height: 42px !important; 
-            display: flex !important;
-            align-items: center !important;
-        }
-        
-        /* تنظیم فونت و جلوگیری از شکستن متن */
-        .stSelectbox [data-baseweb="select"] div {
-            font-size: 0.8rem !important; /* فونت کمی ریزتر برای جا شدن متن طولانی */
-            font-weight: 500 !important;
-            white-space: nowrap !important;
-            overflow: hidden !important;
-            text-overflow: ellipsis !important;
-            padding-left: 20px !important; /* جلوگیری از رفتن متن زیر فلش سمت چپ */
-        }
+    inject_css("dashboard")
 
-        .stSelectbox label {
-            color: #212529 !important;
-            font-weight: 500 !important;
-            font-size: 0.9rem !important;
-            margin-bottom: 5px !important;
-        }
-        /* استایل منوی باز شده selectbox */
-        [data-baseweb="popover"] {
-            background-color: #f8f9fa !important;
-        }
-        
-        [role="listbox"] {
-            background-color: #f8f9fa !important;
-            border: 1px solid #ced4da !important;
-            border-radius: 6px !important;
-        }
-        
-        [role="option"] {
-            background-color: #f8f9fa !important;
-            color: #212529 !important;
-            padding: 10px 15px !important;
-            font-size: 0.9rem !important;
-        }
-        
-        [role="option"]:hover {
-            background-color: #e9ecef !important;
-            color: #033270 !important;
-        }
-        
-        [role="option"][aria-selected="true"] {
-            background-color: #dee2e6 !important;
-            color: #033270 !important;
-            font-weight: 600 !important;
-        }
-    </style>
-    """, unsafe_allow_html=True)
 
 def show_custom_navbar(current_page="home"):
     """نمایش نوار ناوبری سفارشی"""
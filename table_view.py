@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import streamlit as st
+
+# =========================================================
+# 📄 نمایش صفحه‌بندی‌شده جدول‌ها (فقط صفحه قابل مشاهده استایل و ارسال می‌شود)
+# =========================================================
+
+# حالت‌های نمایش رنگ آبی جدول
+STYLER_THEME = "styler"    # استایل سلول به سلول pandas (فقط روی صفحه جاری)
+COLUMNS_THEME = "columns"  # column_config و رنگ سرستون از [theme] در .streamlit/config.toml (بدون CSS سلولی)
+
+PAGE_SIZES = [50, 100, 200, 500]
+DEFAULT_PAGE_SIZE = 100
+
+NO_SORT = "بدون مرتب‌سازی"
+
+
+# رنگ جداول گوگل شیت
+def style_dataframe(df):
+    return df.style.set_properties(**{
+        'background-color': '#F0F8FF',     # آبی ملیح برای سلول‌ها
+        'color': '#000000',
+        'font-family': 'B Nazanin',
+        'border-color': '#ffffff',
+        'text-align': 'right',
+        'font-size': '15px'
+    }).set_table_styles([
+        {'selector': 'th', 'props': [
+            ('background-color', '#2E86C1'), # ✅ آبی روشن (دیگر مشکی نیست)
+            ('color', 'white'),
+            ('font-family', 'B Nazanin'),
+            ('font-size', '16px'),
+            ('text-align', 'center'),
+            ('font-weight', 'bold')
+        ]}
+    ])
+
+
+def blue_column_config(columns):
+    """
+    جایگزین سبک Styler با column_config: چینش راست‌به‌چپ ستون‌ها و رنگ سرستون از تم برنامه.
+    زمینه آبی سلول‌ها و فونت B Nazanin در این حالت اعمال نمی‌شود.
+    """
+    return {col: st.column_config.Column(alignment="right") for col in columns}
+
+
+def paginate(df, page, page_size, sort_column=None, ascending=True):
+    """
+    برش یک صفحه از جدول. مرتب‌سازی فقط روی همان یک ستون انجام می‌شود و
+    بقیه ستون‌ها فقط برای ردیف‌های صفحه جاری برداشته می‌شوند.
+    خروجی: (صفحه، شماره صفحه معتبر، تعداد صفحات)
+    """
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page = min(max(1, page), page_count)
+    start = (page - 1) * page_size
+    stop = start + page_size
+
+    if sort_column is None or sort_column not in df.columns:
+        return df.iloc[start:stop], page, page_count
+
+    order = df[sort_column].reset_index(drop=True).sort_values(
+        ascending=ascending, na_position='last', kind='stable').index
+    return df.iloc[np.asarray(order[start:stop])], page, page_count
+
+
+def render_table(df, key, height=500, theme=STYLER_THEME):
+    """
+    جدول صفحه‌بندی‌شده با انتخاب اندازه صفحه، ستون مرتب‌سازی و شماره صفحه (cursor).
+    وضعیت هر جدول با پیشوند key در session_state نگه داشته می‌شود.
+    """
+    page_key = f"{key}_page"
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: page_size = st.selectbox("تعداد ردیف در صفحه", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}_size")
+    with c2: sort_column = st.selectbox("مرتب‌سازی بر اساس", [NO_SORT] + list(df.columns), key=f"{key}_sort")
+    with c3: ascending = st.radio("جهت", ["صعودی", "نزولی"], horizontal=True, key=f"{key}_dir") == "صعودی"
+
+    page_count = max(1, math.ceil(len(df) / page_size))
+    # اگر با تغییر فیلتر تعداد صفحات کم شد، cursor به آخرین صفحه معتبر برمی‌گردد
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    with c4: page = st.number_input("صفحه", min_value=1, max_value=page_count, step=1, key=page_key)
+
+    page_df, page, page_count = paginate(df, int(page), page_size,
+                                         None if sort_column == NO_SORT else sort_column, ascending)
+
+    first = (page - 1) * page_size + 1 if len(df) else 0
+    st.caption(f"صفحه {page} از {page_count} | ردیف {first} تا {first + len(page_df) - 1 if len(df) else 0} از {len(df)}")
+
+    if theme == COLUMNS_THEME:
+        st.dataframe(page_df, use_container_width=True, height=height, hide_index=True,
+                     column_config=blue_column_config(page_df.columns))
+    else:
+        st.dataframe(style_dataframe(page_df), use_container_width=True, height=height, hide_index=True)
@@ -0,0 +1,49 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import data_store
+from data_store import RETRY_BACKOFF, RefreshScheduler, SheetStore
+
+
+def wait_idle(store, name):
+    for thread in threading.enumerate():
+        if thread.name == f"refresh-{name}":
+            thread.join(timeout=5)
+    assert not store.is_refreshing(name)
+
+
+def test_failed_refresh_backs_off_exponentially(monkeypatch):
+    store = SheetStore()
+    calls = []
+
+    def failing(entry):
+        calls.append(entry)
+        raise RuntimeError("Apps Script در دسترس نیست")
+
+    assert store.refresh_async("personnel", failing)
+    wait_idle(store, "personnel")
+    first_retry = store.retry_at("personnel")
+    assert first_retry - datetime.now() <= RETRY_BACKOFF
+
+    # در فاصله انتظار نه صفحه‌ها و نه زمان‌بند دریافت جدیدی شروع نمی‌کنند
+    scheduler = RefreshScheduler(store, lambda name, entry: failing(entry))
+    assert not scheduler.is_due("personnel")
+    assert not store.refresh_async("personnel", failing)
+    assert len(calls) == 1
+
+    # بروزرسانی دستی از فاصله انتظار عبور می‌کند و خطای بعدی انتظار را دو برابر می‌کند
+    assert scheduler.refresh("personnel", force=True)
+    wait_idle(store, "personnel")
+    assert len(calls) == 2
+    assert store.retry_at("personnel") - datetime.now() > RETRY_BACKOFF
+
+    # بعد از پایان فاصله انتظار دوباره تلاش می‌شود و موفقیت، شمارنده خطا را پاک می‌کند
+    later = datetime.now() + timedelta(hours=1)
+    monkeypatch.setattr(data_store, "datetime", type("FrozenNow", (datetime,), {"now": staticmethod(lambda: later)}))
+    assert scheduler.is_due("personnel")
+    assert store.refresh_async("personnel", lambda entry: (None, pd.DataFrame({'a': [1]}), None, 0.1))
+    wait_idle(store, "personnel")
+    assert store.retry_at("personnel") is None
+    assert store.get("personnel") is not None
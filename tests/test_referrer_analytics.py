@@ -0,0 +1,63 @@
+from functools import partial
+
+import pytest
+
+from hr_analytics import ALL, GENDER_FEMALE, GENDER_MALE, RecruitmentFunnel
+from hr_etl import HIRED_STATUS, REJECTED_STATUS
+from referrer_analytics import ReferrerStatsTracker, stats_by_gender
+from sheet_pipeline import apply_sheet_delta, build_sheet
+from sheet_sync import ROW_KEY
+
+
+def employment_rows(rows):
+    return [{ROW_KEY: row, 'وضعیت نهایی': status, 'معرف': referrer, 'جنسیت': gender,
+             'تاریخ شروع بکار': '1403/02/01' if status == HIRED_STATUS else ''}
+            for row, status, referrer, gender in rows]
+
+
+BASE = [
+    (2, HIRED_STATUS, 'سایت', GENDER_MALE),
+    (3, REJECTED_STATUS, 'سایت', GENDER_FEMALE),
+    (4, HIRED_STATUS, 'معرفی همکار', GENDER_FEMALE),
+    (5, REJECTED_STATUS, 'دیوار', GENDER_MALE),
+]
+CHANGED = [
+    (3, HIRED_STATUS, 'سایت', GENDER_FEMALE),      # تغییر وضعیت
+    (6, HIRED_STATUS, 'دیوار', GENDER_MALE),       # ردیف جدید
+    (7, REJECTED_STATUS, 'جابینجا', GENDER_MALE),   # معرف جدید
+]
+DELETED = [4]
+
+
+def summary(stats):
+    return ([(s.referrer, s.total, s.hired) for s in stats.top_by_volume(10)],
+            [(s.referrer, s.total, s.hired) for s in stats.top_by_hired(10)],
+            [(s.referrer, s.total, s.hired) for s in stats.top_by_conversion(10, min_sample=1)])
+
+
+@pytest.mark.parametrize("gender", [ALL, GENDER_MALE, GENDER_FEMALE])
+def test_delta_updates_match_full_rebuild(gender):
+    tracker = ReferrerStatsTracker()
+    base = build_sheet("employment", employment_rows(BASE))
+    tracker.stats_for(base, 1, "w1", gender)
+
+    merged = apply_sheet_delta("employment", base, employment_rows(CHANGED), DELETED,
+                               on_change=partial(tracker.apply_delta, "w1", "w2"))
+    assert tracker.watermark == "w2"
+
+    expected = stats_by_gender(RecruitmentFunnel.build(merged).counts)[gender]
+    assert summary(tracker.stats_for(merged, 2, "w2", gender)) == summary(expected)
+    assert 'معرفی همکار' not in tracker.stats_for(merged, 2, "w2", ALL).totals
+
+
+def test_delta_for_other_watermark_is_ignored():
+    tracker = ReferrerStatsTracker()
+    base = build_sheet("employment", employment_rows(BASE))
+    tracker.stats_for(base, 1, "w1")
+
+    merged = apply_sheet_delta("employment", base, employment_rows(CHANGED), DELETED,
+                               on_change=partial(tracker.apply_delta, "w0", "w2"))
+    assert tracker.watermark == "w1"
+
+    expected = stats_by_gender(RecruitmentFunnel.build(merged).counts)[ALL]
+    assert summary(tracker.stats_for(merged, 2, "w2")) == summary(expected)
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+from hr_analytics import ChurnMatrix, PersonnelIndex
+from hr_etl import HIRED_FLAG, UNKNOWN_TEXT, compact_dtypes
+from search_index import MONTHLY_FILTER_COLUMNS, FilterIndex
+from sheet_pipeline import apply_sheet_delta, build_sheet, clean_sheet_rows
+from sheet_schema import SHEET_SCHEMAS
+from sheet_sync import ROW_KEY
+from table_view import paginate
+
+CHILDREN = 'تعداد فرزند'
+
+
+def personnel_rows(rows):
+    return [{ROW_KEY: row, 'شماره پرسنلی': 1000 + row, 'نام': 'علی', CHILDREN: children}
+            for row, children in rows]
+
+
+def stored(sheet_name, df):
+    """همان فشرده‌سازی که انبار شیت‌ها قبل از نگهداری انجام می‌دهد"""
+    return compact_dtypes(df, SHEET_SCHEMAS[sheet_name].category_columns)
+
+
+def by_row(df):
+    return df.sort_values(ROW_KEY).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("base_rows, delta_rows", [
+    ([(2, ''), (3, 2)], [(4, 1), (5, 3)]),   # پایه متنی (ترکیبی)، تغییرات فقط عدد
+    ([(2, 1), (3, 2)], [(4, ''), (5, 3)]),   # پایه عددی، تغییرات ترکیبی
+])
+def test_delta_with_different_inferred_dtype_matches_full_load(base_rows, delta_rows):
+    base = stored("personnel", build_sheet("personnel", personnel_rows(base_rows)))
+    merged = apply_sheet_delta("personnel", base, personnel_rows(delta_rows))
+    full = build_sheet("personnel", personnel_rows(base_rows + delta_rows))
+
+    assert by_row(merged)[CHILDREN].tolist() == by_row(full)[CHILDREN].tolist()
+    assert {type(v) for v in merged[CHILDREN]} == {str}
+
+    page, _, _ = paginate(merged, 1, 50, sort_column=CHILDREN)
+    assert len(page) == len(merged)
+
+
+def test_merged_delta_writes_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    base = stored("personnel", build_sheet("personnel", personnel_rows([(2, ''), (3, 2)])))
+    merged = apply_sheet_delta("personnel", base, personnel_rows([(4, 1)]))
+    merged.to_parquet(tmp_path / "personnel.parquet")
+
+
+@pytest.mark.parametrize("sheet_name", sorted(SHEET_SCHEMAS))
+def test_empty_sheet_has_every_declared_column(sheet_name):
+    df = stored(sheet_name, build_sheet(sheet_name, []))
+    assert df.empty
+    assert set(SHEET_SCHEMAS[sheet_name].columns) <= set(df.columns)
+
+
+def test_empty_sheets_build_views():
+    employment = stored("employment", build_sheet("employment", []))
+    assert employment[employment[HIRED_FLAG]].empty
+    assert ChurnMatrix.build(employment).total() == 0
+
+    monthly = stored("monthlylist", build_sheet("monthlylist", []))
+    assert FilterIndex(monthly, MONTHLY_FILTER_COLUMNS).values['ماه'] == []
+
+
+@pytest.mark.parametrize("dtype", ["str", "string"])
+def test_string_dtype_text_columns_are_normalized(dtype):
+    df = pd.DataFrame({
+        'شماره پرسنلی': pd.Series(['1001', '1002'], dtype=dtype),
+        'نام': pd.Series([' علي ', ''], dtype=dtype),
+    })
+    df = clean_sheet_rows("personnel", df)
+    assert df['نام'].tolist() == ['علی', UNKNOWN_TEXT]
+
+
+def test_missing_personnel_number_displays_unknown_but_never_joins():
+    personnel = build_sheet("personnel", [
+        {'شماره پرسنلی': '۱۰۰۱', 'جنسیت': 'زن'},
+        {'شماره پرسنلی': '', 'جنسیت': 'مرد'},
+    ])
+    monthly = build_sheet("monthlylist", [
+        {'شماره پرسنلی': 1001.0, 'ماه': 'مهر'},
+        {'شماره پرسنلی': None, 'ماه': 'مهر'},
+        {'شماره پرسنلی': 1002, 'ماه': 'مهر'},
+    ])
+    assert personnel['شماره پرسنلی'].tolist() == ['1001', UNKNOWN_TEXT]
+    assert monthly['شماره پرسنلی'].tolist() == ['1001', UNKNOWN_TEXT, '1002']
+
+    index = PersonnelIndex(personnel)
+    assert len(index) == 1 and index.duplicates == 0
+    assert index.enrich(monthly, ['جنسیت'])['جنسیت'].tolist() == ['زن', UNKNOWN_TEXT, UNKNOWN_TEXT]
+    assert index.unmatched(monthly['شماره پرسنلی']) == ['1002']